@@ -0,0 +1,7 @@
+__all__ = [
+    "thermal_capture",
+    "thermal_storage",
+    "basler_encoding",
+    "video_writers",
+    "basler_raw",
+]
@@ -0,0 +1,116 @@
+"""
+Per-frame CPU cost of encoding Basler mono frames as mono or as BGR video.
+
+Encodes synthetic 8-bit frames at common Basler resolutions through
+``cv2.VideoWriter``, once expanded to BGR with ``isColor=True`` (the former
+path) and once as single-channel frames with ``isColor=False``, and reports
+the CPU and wall time per frame and the file size. Run it with::
+
+    python -m poulet_py.benchmarks.basler_encoding --frames 300
+    python -m poulet_py.benchmarks.basler_encoding --resolutions 640x480 1280x1024
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+from poulet_py.hardware.camera.basler_encoding import FrameConverter
+
+RESOLUTIONS = ["720x540", "1280x1024", "1920x1200"]
+MODES = [("bgr", True), ("mono", False)]
+
+
+def synthetic_mono_frames(n_frames, width, height, seed=0):
+    """
+    Generates moving 8-bit frames, a blurred noise background with a bright blob.
+
+    Returns:
+        np.ndarray: A ``(n_frames, height, width)`` uint8 array.
+    """
+    rng = np.random.default_rng(seed)
+    background = cv2.GaussianBlur(
+        rng.integers(40, 120, (height, width), dtype=np.uint8), (0, 0), 3
+    )
+    frames = np.empty((n_frames, height, width), dtype=np.uint8)
+    radius = max(min(width, height) // 12, 2)
+    for i in range(n_frames):
+        frame = frames[i]
+        np.copyto(frame, background)
+        frame += rng.integers(0, 8, (height, width), dtype=np.uint8)
+        center = (int((i * 7) % width), height // 2)
+        cv2.circle(frame, center, radius, 230, -1)
+    return frames
+
+
+def run_mode(frames, color, fps, directory):
+    """
+    Converts and encodes the frames in one mode.
+
+    Returns:
+        dict: CPU and wall milliseconds per frame, of which the conversion, and the file size.
+    """
+    height, width = frames.shape[1:]
+    converter = FrameConverter("Mono8", color=color)
+    path = os.path.join(directory, f"benchmark_{'bgr' if color else 'mono'}.mp4")
+    out = cv2.VideoWriter(
+        path, cv2.VideoWriter_fourcc(*"MP4V"), fps, (width, height), isColor=color
+    )
+
+    convert_s = 0.0
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    for frame in frames:
+        start = time.perf_counter()
+        image = converter(frame)
+        convert_s += time.perf_counter() - start
+        out.write(image)
+    out.release()
+    cpu_s = time.process_time() - cpu_start
+    wall_s = time.perf_counter() - wall_start
+
+    file_bytes = os.path.getsize(path)
+    os.remove(path)
+    n = len(frames)
+    return {
+        "cpu_ms": cpu_s / n * 1e3,
+        "wall_ms": wall_s / n * 1e3,
+        "convert_ms": convert_s / n * 1e3,
+        "file_mb": file_bytes / 1e6,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Basler mono versus BGR encoding benchmark."
+    )
+    parser.add_argument("--frames", type=int, default=300, help="frames per run")
+    parser.add_argument("--fps", type=float, default=30.0)
+    parser.add_argument(
+        "--resolutions", nargs="+", default=RESOLUTIONS, help="WIDTHxHEIGHT"
+    )
+    parser.add_argument("--output-dir", help="directory for the temporary files")
+    args = parser.parse_args(argv)
+
+    print(
+        f"{'resolution':<11} {'mode':<5} {'CPU ms/frame':>12} {'wall ms/frame':>13} "
+        f"{'convert ms':>10} {'file MB':>8}"
+    )
+    with tempfile.TemporaryDirectory(dir=args.output_dir) as directory:
+        for resolution in args.resolutions:
+            width, height = (int(n) for n in resolution.lower().split("x"))
+            frames = synthetic_mono_frames(args.frames, width, height)
+            for name, color in MODES:
+                result = run_mode(frames, color, args.fps, directory)
+                print(
+                    f"{resolution:<11} {name:<5} {result['cpu_ms']:>12.2f} "
+                    f"{result['wall_ms']:>13.2f} {result['convert_ms']:>10.3f} "
+                    f"{result['file_mb']:>8.2f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
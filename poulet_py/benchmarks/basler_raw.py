@@ -0,0 +1,95 @@
+"""
+Frames per second of raw Basler recording against video encoding at several ROIs.
+
+Writes the same synthetic mono frames into the raw memory-mapped .npy and
+chunked HDF5 stores and through the OpenCV MP4V writer, and reports the
+frames per second each sustains and the file size. Small ROIs show how far
+the raw stores outrun the encoder. Run it with::
+
+    python -m poulet_py.benchmarks.basler_raw --frames 2000
+    python -m poulet_py.benchmarks.basler_raw --resolutions 128x128 640x480
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from poulet_py.benchmarks.basler_encoding import synthetic_mono_frames
+from poulet_py.hardware.camera.basler_raw import RawFrameWriter
+from poulet_py.hardware.camera.video_writers import open_video_writer
+
+RESOLUTIONS = ["128x128", "320x240", "640x480", "1280x1024"]
+WRITERS = ["raw npy", "raw hdf5", "opencv mp4v"]
+
+
+def open_writer(name, directory, frames, fps):
+    """
+    Opens one of the benchmarked writers, preallocated for all frames if raw.
+
+    Returns:
+        tuple: The writer and its file.
+    """
+    height, width = frames.shape[1:]
+    if name.startswith("raw"):
+        raw_format = name.split()[1]
+        path = os.path.join(directory, f"benchmark.{raw_format}")
+        writer = RawFrameWriter(
+            path,
+            (height, width),
+            frames.dtype,
+            raw_format=raw_format,
+            expected_frames=len(frames),
+        )
+    else:
+        path = os.path.join(directory, "benchmark.mp4")
+        writer = open_video_writer(path, fps, (width, height), is_color=False)
+    return writer, path
+
+
+def run_writer(name, frames, fps, directory):
+    """
+    Writes the frames with one writer.
+
+    Returns:
+        dict: Frames per second and the file size.
+    """
+    start = time.perf_counter()
+    writer, path = open_writer(name, directory, frames, fps)
+    for frame in frames:
+        writer.write(frame)
+    writer.release()
+    wall_s = time.perf_counter() - start
+
+    file_bytes = os.path.getsize(path)
+    os.remove(path)
+    return {"fps": len(frames) / wall_s, "file_mb": file_bytes / 1e6}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Raw recording against video encoding of Basler frames."
+    )
+    parser.add_argument("--frames", type=int, default=2000, help="frames per ROI")
+    parser.add_argument("--fps", type=float, default=30.0)
+    parser.add_argument(
+        "--resolutions", nargs="+", default=RESOLUTIONS, help="WIDTHxHEIGHT"
+    )
+    parser.add_argument("--output-dir", help="directory for the temporary files")
+    args = parser.parse_args(argv)
+
+    print(f"{'ROI':<10} {'writer':<12} {'frames/s':>9} {'file MB':>8}")
+    with tempfile.TemporaryDirectory(dir=args.output_dir) as directory:
+        for resolution in args.resolutions:
+            width, height = (int(n) for n in resolution.lower().split("x"))
+            frames = synthetic_mono_frames(args.frames, width, height)
+            for name in WRITERS:
+                result = run_writer(name, frames, args.fps, directory)
+                print(
+                    f"{resolution:<10} {name:<12} {result['fps']:>9.0f} "
+                    f"{result['file_mb']:>8.2f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
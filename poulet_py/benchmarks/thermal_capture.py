@@ -0,0 +1,141 @@
+"""
+End-to-end throughput benchmark for ``ThermalCamera.capture_frame`` and
+``ThermalCamera.grab_data_func``.
+
+Frames come from the synthetic (or replay) backend through the same ring
+buffer the hardware backends use. Without ``--rate`` the backend waits for
+room in the buffer, which measures the maximum sustainable frame rate; with
+``--rate`` frames are paced like a camera and dropped frames are reported.
+Run it with::
+
+    python -m poulet_py.benchmarks.thermal_capture --frames 5000
+    python -m poulet_py.benchmarks.thermal_capture --rate 50 --duration 10
+"""
+
+import argparse
+import tempfile
+import time
+
+from poulet_py.hardware.camera.thermal_camera import ThermalCamera
+
+CONFIGURATIONS = [
+    ("per_frame/celsius", {"layout": "per_frame"}),
+    ("contiguous/celsius", {"layout": "contiguous"}),
+    ("contiguous/raw", {"layout": "contiguous", "storage": "raw"}),
+    (
+        "contiguous/raw/background",
+        {"layout": "contiguous", "storage": "raw", "background_writer": True},
+    ),
+]
+
+
+def make_camera(args):
+    """
+    Creates a ThermalCamera streaming from the synthetic or replay backend.
+    """
+    if args.rate is None:
+        options = {"rate_hz": None, "lossless": True}
+    else:
+        options = {"rate_hz": args.rate, "lossless": False}
+
+    if args.replay:
+        backend = "replay"
+        options.update(path=args.replay, loop=True)
+    else:
+        backend = "synthetic"
+
+    return ThermalCamera(
+        buffer_size=args.buffer_size, backend=backend, backend_options=options
+    )
+
+
+def run(args, directory, name, output_options, mode):
+    """
+    Streams frames through capture_frame or grab_data_func, per frame or in
+    batches of ``--batch-size`` frames.
+
+    Returns:
+        dict: Frames processed, frames per second and the ring buffer counters.
+    """
+    cam = make_camera(args)
+    extra_name = name.replace("/", "-").replace(" ", "-").replace(",", "")
+    cam.set_output_file(directory, extra_name, **output_options)
+    cam.create_hdf5_file()
+    cam.start_streaming()
+    cam.set_timer(time.time())
+
+    grab_options = {}
+    if mode == "grab_data_func" and name.endswith("batched"):
+        grab_options["batch_size"] = args.batch_size
+
+    start = time.perf_counter()
+    if args.rate is None:
+        n_frames = args.frames
+        if mode == "capture_frame":
+            for _ in range(n_frames):
+                cam.capture_frame()
+        else:
+            def done(thermal_image_data, frame_number, **kwargs):
+                # frame_number is the first frame of the batch in batched mode
+                if thermal_image_data.ndim == 3:
+                    frame_number += len(thermal_image_data) - 1
+                return frame_number >= n_frames
+
+            cam.grab_data_func(done, **grab_options)
+    else:
+        end = start + args.duration
+        if mode == "capture_frame":
+            while time.perf_counter() < end:
+                cam.capture_frame()
+        else:
+            cam.grab_data_func(
+                lambda **kwargs: time.perf_counter() >= end, **grab_options
+            )
+    cam.close_hdf5_file()
+    elapsed = time.perf_counter() - start
+
+    stats = cam.frame_buffer.stats()
+    cam.stop_streaming()
+
+    n_frames = cam.frame_number - 1
+    return {"frames": n_frames, "fps": n_frames / elapsed, **stats}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="ThermalCamera capture_frame/grab_data_func throughput benchmark."
+    )
+    parser.add_argument("--frames", type=int, default=2000, help="frames per run")
+    parser.add_argument(
+        "--rate", type=float, help="paced frame rate, default as fast as possible"
+    )
+    parser.add_argument(
+        "--duration", type=float, default=10, help="seconds per paced run"
+    )
+    parser.add_argument("--replay", help="replay this recording instead of synthetic frames")
+    parser.add_argument("--buffer-size", type=int, default=32)
+    parser.add_argument(
+        "--batch-size", type=int, default=32, help="frames per batched grab_data_func call"
+    )
+    parser.add_argument("--output-dir", help="directory for the temporary files")
+    args = parser.parse_args(argv)
+
+    print(
+        f"{'mode':<15} {'output':<26} {'frames':>7} {'fps':>9} "
+        f"{'dropped':>8} {'overwritten':>11}"
+    )
+    with tempfile.TemporaryDirectory(dir=args.output_dir) as directory:
+        # grab_data_func leaves storage to the callback, one run is enough
+        runs = [("capture_frame", name, options) for name, options in CONFIGURATIONS]
+        runs.append(("grab_data_func", "callback only", {}))
+        runs.append(("grab_data_func", "callback only, batched", {}))
+        for mode, name, output_options in runs:
+            result = run(args, directory, f"{mode}_{name}", output_options, mode)
+            print(
+                f"{mode:<15} {name:<26} {result['frames']:>7} {result['fps']:>9.1f} "
+                f"{result['frames_dropped']:>8} {result['frames_overwritten']:>11}"
+            )
+
+
+if __name__ == "__main__":
+    main()
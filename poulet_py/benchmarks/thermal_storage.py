@@ -0,0 +1,146 @@
+"""
+Throughput and compression benchmark for the thermal camera HDF5 output.
+
+Writes synthetic or replayed Lepton frames through ``ContiguousFrameWriter``
+with every available compression filter and reports write/read MB/s and the
+compression ratio. Run it with::
+
+    python -m poulet_py.benchmarks.thermal_storage --frames 2000
+    python -m poulet_py.benchmarks.thermal_storage --replay recording.hdf5
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import h5py
+import numpy as np
+
+from poulet_py.hardware.camera.thermal_replay import (
+    iter_recording_frames,
+    synthetic_frames,
+)
+from poulet_py.hardware.camera.thermal_storage import (
+    FRAMES_DATASET,
+    ContiguousFrameWriter,
+    compression_kwargs,
+    kelvin_to_celsius,
+)
+
+FRAME_SHAPE = (120, 160)
+
+CONFIGURATIONS = [
+    ("none", None, None, False),
+    ("gzip-1", "gzip", 1, False),
+    ("gzip-4", "gzip", 4, False),
+    ("gzip-4+shuffle", "gzip", 4, True),
+    ("lzf", "lzf", None, False),
+    ("lzf+shuffle", "lzf", None, True),
+    ("blosc-lz4", "blosc", 5, False),
+    ("blosc-lz4+shuffle", "blosc", 5, True),
+    ("lz4+shuffle", "lz4", None, True),
+]
+
+
+def replay_frames(path, n_frames=None):
+    """
+    Loads frames from an existing ThermalCamera recording as centi-Kelvin counts.
+
+    Args:
+        path (str): The HDF5 recording, in the per-frame or contiguous layout.
+        n_frames (int, optional): Maximum number of frames to load. Defaults to all.
+
+    Returns:
+        np.ndarray: A ``(N, 120, 160)`` uint16 array.
+    """
+    batches = []
+    count = 0
+    for batch in iter_recording_frames(path):
+        batches.append(batch)
+        count += len(batch)
+        if n_frames is not None and count >= n_frames:
+            break
+    return np.concatenate(batches)[:n_frames]
+
+
+def run_configuration(frames, storage, compression, level, shuffle, directory):
+    """
+    Writes and reads back the frames with one compression setting.
+
+    Returns:
+        dict: Write and read throughput in MB/s of uncompressed data, the compression
+            ratio and the file size.
+    """
+    kwargs = compression_kwargs(compression, level, shuffle)
+    data = frames if storage == "raw" else kelvin_to_celsius(frames)
+    path = os.path.join(directory, "benchmark.hdf5")
+
+    start = time.perf_counter()
+    with h5py.File(path, "w") as f:
+        writer = ContiguousFrameWriter(
+            f, FRAME_SHAPE, dtype=data.dtype, storage=storage, compression=kwargs
+        )
+        for i, frame in enumerate(data):
+            writer.append(frame, i / 8.7)
+        writer.close()
+    write_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with h5py.File(path, "r") as f:
+        f[FRAMES_DATASET][:]
+    read_s = time.perf_counter() - start
+
+    file_bytes = os.path.getsize(path)
+    os.remove(path)
+    megabytes = data.nbytes / 1e6
+    return {
+        "write_mb_s": megabytes / write_s,
+        "read_mb_s": megabytes / read_s,
+        "ratio": data.nbytes / file_bytes,
+        "file_mb": file_bytes / 1e6,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Thermal camera HDF5 throughput and compression benchmark."
+    )
+    parser.add_argument("--frames", type=int, default=2000, help="number of frames")
+    parser.add_argument("--replay", help="replay frames from this recording")
+    parser.add_argument("--storage", choices=["raw", "celsius", "both"], default="both")
+    parser.add_argument("--output-dir", help="directory for the temporary files")
+    args = parser.parse_args(argv)
+
+    if args.replay:
+        frames = replay_frames(args.replay, args.frames)
+        source = f"replayed from {args.replay}"
+    else:
+        frames = synthetic_frames(args.frames)
+        source = "synthetic"
+    print(f"{len(frames)} {source} frames of {FRAME_SHAPE[1]}x{FRAME_SHAPE[0]}")
+
+    storages = ["raw", "celsius"] if args.storage == "both" else [args.storage]
+    print(
+        f"{'storage':<8} {'compression':<18} {'write MB/s':>10} {'read MB/s':>10} "
+        f"{'ratio':>7} {'file MB':>8}"
+    )
+    with tempfile.TemporaryDirectory(dir=args.output_dir) as directory:
+        for storage in storages:
+            for name, compression, level, shuffle in CONFIGURATIONS:
+                try:
+                    result = run_configuration(
+                        frames, storage, compression, level, shuffle, directory
+                    )
+                except ImportError as e:
+                    print(f"{storage:<8} {name:<18} skipped: {e}")
+                    continue
+                print(
+                    f"{storage:<8} {name:<18} {result['write_mb_s']:>10.1f} "
+                    f"{result['read_mb_s']:>10.1f} {result['ratio']:>7.2f} "
+                    f"{result['file_mb']:>8.2f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Throughput and file size of the Basler video writers on synthetic frames.
+
+Writes the same synthetic mono frames through the OpenCV writer (MP4V, the
+former default) and through ffmpeg with several codecs and presets, and
+reports frames per second, CPU time per frame including the ffmpeg process,
+and the file size. Run it with::
+
+    python -m poulet_py.benchmarks.video_writers --frames 600 --resolution 1280x1024
+    python -m poulet_py.benchmarks.video_writers --color --ffmpeg /usr/local/bin/ffmpeg
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from poulet_py.benchmarks.basler_encoding import synthetic_mono_frames
+from poulet_py.hardware.camera.basler_encoding import FrameConverter
+from poulet_py.hardware.camera.video_writers import open_video_writer
+
+CONFIGURATIONS = [
+    ("opencv mp4v", "opencv", "mp4", {}),
+    (
+        "ffmpeg x264 ultrafast",
+        "ffmpeg",
+        "mp4",
+        {"codec": "libx264", "preset": "ultrafast"},
+    ),
+    (
+        "ffmpeg x264 veryfast",
+        "ffmpeg",
+        "mp4",
+        {"codec": "libx264", "preset": "veryfast"},
+    ),
+    ("ffmpeg x264 medium", "ffmpeg", "mp4", {"codec": "libx264", "preset": "medium"}),
+    ("ffmpeg ffv1 lossless", "ffmpeg", "mkv", {"codec": "ffv1"}),
+]
+
+
+def cpu_seconds():
+    """
+    Returns:
+        float: CPU time of this process and its finished child processes.
+    """
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+
+def run_configuration(frames, color, fps, writer, video_format, options, directory):
+    """
+    Writes the frames with one writer configuration.
+
+    Returns:
+        dict: Frames per second, CPU milliseconds per frame and the file size.
+    """
+    height, width = frames.shape[1:]
+    converter = FrameConverter("Mono8", color=color)
+    path = os.path.join(directory, f"benchmark.{video_format}")
+
+    cpu_start = cpu_seconds()
+    start = time.perf_counter()
+    out = open_video_writer(
+        path, fps, (width, height), is_color=color, writer=writer, **options
+    )
+    for frame in frames:
+        out.write(converter(frame))
+    out.release()
+    wall_s = time.perf_counter() - start
+    cpu_s = cpu_seconds() - cpu_start
+
+    file_bytes = os.path.getsize(path)
+    os.remove(path)
+    return {
+        "fps": len(frames) / wall_s,
+        "cpu_ms": cpu_s / len(frames) * 1e3,
+        "file_mb": file_bytes / 1e6,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Basler video writer throughput and file size benchmark."
+    )
+    parser.add_argument("--frames", type=int, default=600, help="number of frames")
+    parser.add_argument("--resolution", default="1280x1024", help="WIDTHxHEIGHT")
+    parser.add_argument("--fps", type=float, default=30.0)
+    parser.add_argument("--color", action="store_true", help="encode BGR frames")
+    parser.add_argument("--threads", type=int, default=0, help="ffmpeg encoder threads")
+    parser.add_argument("--ffmpeg", default="ffmpeg", help="the ffmpeg executable")
+    parser.add_argument("--output-dir", help="directory for the temporary files")
+    args = parser.parse_args(argv)
+
+    width, height = (int(n) for n in args.resolution.lower().split("x"))
+    frames = synthetic_mono_frames(args.frames, width, height)
+    print(
+        f"{len(frames)} synthetic {'BGR' if args.color else 'mono'} frames of "
+        f"{width}x{height}, {frames.nbytes / len(frames) / 1e6:.2f} MB each"
+    )
+    print(f"{'writer':<22} {'frames/s':>9} {'CPU ms/frame':>12} {'file MB':>8}")
+
+    with tempfile.TemporaryDirectory(dir=args.output_dir) as directory:
+        for name, writer, video_format, options in CONFIGURATIONS:
+            if writer == "ffmpeg":
+                if shutil.which(args.ffmpeg) is None:
+                    print(f"{name:<22} skipped: '{args.ffmpeg}' not found")
+                    continue
+                options = dict(options, ffmpeg=args.ffmpeg, threads=args.threads)
+            result = run_configuration(
+                frames, args.color, args.fps, writer, video_format, options, directory
+            )
+            print(
+                f"{name:<22} {result['fps']:>9.1f} {result['cpu_ms']:>12.2f} "
+                f"{result['file_mb']:>8.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,25 @@
 __all__ = ["julabo_chiller", "thermal_stimulators"]
 
-from poulet_py.hardware.camera import BaslerCamera
-from poulet_py.hardware.camera import ThermalCamera
-from poulet_py.hardware.julabo_chiller import JulaboChiller
-from poulet_py.hardware.thermal_stimulators import TCSIIController, TCSIIStimulus
\ No newline at end of file
+import importlib
+
+# the devices are imported on first access, so that a script using one of them does
+# not need the drivers of the others
+_LAZY_EXPORTS = {
+    "BaslerCamera": "poulet_py.hardware.camera.basler",
+    "ThermalCamera": "poulet_py.hardware.camera.thermal_camera",
+    "JulaboChiller": "poulet_py.hardware.julabo_chiller",
+    "TCSIIController": "poulet_py.hardware.thermal_stimulators",
+    "TCSIIStimulus": "poulet_py.hardware.thermal_stimulators",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_EXPORTS:
+        value = getattr(importlib.import_module(_LAZY_EXPORTS[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_EXPORTS))
@@ -1,4 +1,23 @@
-__all__ = ["basler", "thermal_camera"]
+__all__ = ["basler", "thermal_camera", "thermal_recording"]
 
-from poulet_py.hardware.camera.basler import BaslerCamera
-from poulet_py.hardware.camera.thermal_camera import ThermalCamera
+import importlib
+
+# the cameras are imported on first access, so that importing one module of the
+# package does not load pypylon and OpenCV for the others
+_LAZY_EXPORTS = {
+    "BaslerCamera": "poulet_py.hardware.camera.basler",
+    "ThermalCamera": "poulet_py.hardware.camera.thermal_camera",
+    "ThermalRecording": "poulet_py.hardware.camera.thermal_recording",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_EXPORTS:
+        value = getattr(importlib.import_module(_LAZY_EXPORTS[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_EXPORTS))
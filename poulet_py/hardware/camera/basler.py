@@ -3,10 +3,14 @@ from pypylon import pylon
 import cv2
 import os
 import time
-import csv
 import json
 import logging
-from poulet_py.tools import save_metadata_exp
+from poulet_py.tools.serializers import save_metadata_exp
+from poulet_py.hardware.camera.basler_encoding import FrameConverter
+from poulet_py.hardware.camera.basler_pipeline import GrabPipeline
+from poulet_py.hardware.camera.basler_raw import RawFrameWriter, raw_frame_layout
+from poulet_py.hardware.camera.basler_timestamps import TimestampLog
+from poulet_py.hardware.camera.video_writers import open_video_writer
 import datetime
 
 
@@ -21,6 +25,15 @@ class BaslerCamera:
         """
         self.basler_camera = None
         self.out = None
+        self.timestamp_log = None
+        self.pipeline = None
+        self.pipeline_stats = None
+        self.converter = None
+        self.video_format = None
+        self.writer = None
+        self.writer_options = {}
+        self.video_paths = []
+        self.raw_format = None
 
         while self.basler_camera is None:
             try:
@@ -57,7 +70,21 @@ class BaslerCamera:
         """
         self.error_log_file = os.path.join(path, file_name)
 
-    def set_output_file(self, path, extra_name, base_file_name="basler-camera"):
+    def set_output_file(
+        self,
+        path,
+        extra_name,
+        base_file_name="basler-camera",
+        timestamp_format=None,
+        timestamp_block_rows=256,
+        color=None,
+        video_format="mp4",
+        writer="opencv",
+        writer_options=None,
+        segment_s=None,
+        raw_format=None,
+        expected_duration_s=None,
+    ):
         """
         Sets the output file for recording the video.
 
@@ -65,47 +92,103 @@ class BaslerCamera:
             path (str): The directory where the output file will be saved.
             extra_name (str): An additional name to be added to the base file name.
             base_file_name (str, optional): The base name of the output file. Defaults to 'basler-camera'.
+            timestamp_format (str, optional): None, 'npy' or 'hdf5' to also log the host time,
+                camera timestamp tick and frame id of every frame in a binary file next to
+                the timestamps CSV. Defaults to None.
+            timestamp_block_rows (int, optional): Timestamps buffered before they are written.
+                Defaults to 256.
+            color (bool, optional): Whether frames are encoded as BGR. Defaults to None, which
+                encodes mono pixel formats as single-channel video without expanding them.
+            video_format (str, optional): The container and file extension, e.g. 'mp4', 'avi'
+                or 'mkv'. Defaults to 'mp4'.
+            writer (str, optional): 'opencv' encodes through cv2.VideoWriter, 'ffmpeg' pipes the
+                frames to an ffmpeg process. Defaults to 'opencv'.
+            writer_options (dict, optional): Options of the writer, e.g. {'fourcc': 'MJPG'} for
+                OpenCV or {'codec': 'libx264', 'preset': 'veryfast', 'crf': 18, 'threads': 4}
+                and {'codec': 'ffv1'} for lossless video with ffmpeg. Defaults to None.
+            segment_s (float, optional): Splits the video into files of this many seconds,
+                numbered '_000', '_001', ... Defaults to None, one file.
+            raw_format (str, optional): 'npy' or 'hdf5' records the grabbed frames losslessly,
+                exactly as the camera delivers them, into a memory-mapped .npy file or a
+                chunked HDF5 dataset instead of a video, see RawFrameWriter. Read them with
+                RawRecording. Defaults to None, which records a video.
+            expected_duration_s (float, optional): The expected recording length, for which
+                the raw store is preallocated. Defaults to None.
         """
         os.makedirs(path, exist_ok=True)
 
-        fourcc = cv2.VideoWriter_fourcc(*"MP4V")
-
         frame_width = int(self.basler_camera.Width.Value)
         frame_height = int(self.basler_camera.Height.Value)
+        pixel_format = str(self.basler_camera.PixelFormat.Value)
+        self.converter = FrameConverter(pixel_format, color)
+        self.raw_format = raw_format
 
         # Construct the full output file name and path
-        self.output_file_name = f"{base_file_name}_{extra_name}.mp4"
+        extension = video_format if raw_format is None else raw_format
+        self.output_file_name = f"{base_file_name}_{extra_name}.{extension}"
         self.output_path = os.path.join(path, self.output_file_name)
 
-        # Create the VideoWriter object for recording
-        self.out = cv2.VideoWriter(
-            self.output_path,
-            fourcc,
-            self.frames_per_second,
-            (frame_width, frame_height),
-        )
+        # Create the writer for recording, finishing the previous file first
+        if self.out is not None:
+            self.out.release()
+        if raw_format is not None:
+            frame_shape, dtype = raw_frame_layout(
+                pixel_format, frame_width, frame_height
+            )
+            expected_frames = 0
+            if expected_duration_s is not None:
+                expected_frames = round(expected_duration_s * self.frames_per_second)
+            self.video_format = None
+            self.out = RawFrameWriter(
+                self.output_path,
+                frame_shape,
+                dtype,
+                raw_format=raw_format,
+                expected_frames=expected_frames,
+            )
+        else:
+            self.video_format = video_format
+            self.writer = writer
+            self.writer_options = dict(writer_options or {})
+            segment_frames = None
+            if segment_s is not None:
+                segment_frames = max(round(segment_s * self.frames_per_second), 1)
+            self.out = open_video_writer(
+                self.output_path,
+                self.frames_per_second,
+                (frame_width, frame_height),
+                is_color=self.converter.color,
+                writer=writer,
+                segment_frames=segment_frames,
+                **self.writer_options,
+            )
+        # grows as segments are opened
+        self.video_paths = self.out.paths
 
         self.timestamps_file = os.path.join(
             path, f"{base_file_name}_{extra_name}_timestamps.csv"
         )
 
-        # Create the CSV file and write the header if it doesn't exist
-        if not os.path.isfile(self.timestamps_file):
-            with open(self.timestamps_file, mode="w", newline="") as csvfile:
-                writer = csv.writer(csvfile)
-                writer.writerow(["timestamp"])
+        # The CSV file stays open, the header is written if it doesn't exist
+        if self.timestamp_log is not None:
+            self.timestamp_log.close()
+        self.timestamp_log = TimestampLog(
+            self.timestamps_file,
+            binary=timestamp_format,
+            block_rows=timestamp_block_rows,
+        )
 
-    def save_timestamp(self, timestamp):
+    def save_timestamp(self, timestamp, camera_tick=-1, frame_id=-1):
         """
-        Save the timestamp to a CSV file.
+        Save the timestamp to the timestamp log, written to the CSV file in blocks.
 
         Args:
             timestamp: The timestamp to be saved.
+            camera_tick (int, optional): The camera's timestamp of the frame. Defaults to -1.
+            frame_id (int, optional): The camera's frame id. Defaults to -1.
         """
         try:
-            with open(self.timestamps_file, mode="a", newline="") as csvfile:
-                writer = csv.writer(csvfile)
-                writer.writerow([timestamp])
+            self.timestamp_log.append(timestamp, camera_tick, frame_id)
         except Exception as e:
             print(f"Error saving timestamp: {e}")
 
@@ -125,38 +208,99 @@ class BaslerCamera:
         self.frame_number = 1
         self.basler_camera.StartGrabbing()
 
+    def start_pipeline(self, n_encoders=1, pool_size=64, policy="drop_newest"):
+        """
+        Records in the background: a grab thread copies every frame into a bounded frame
+        pool and encode threads convert and write them, instead of calling capture_frame.
+        Call it after start_streaming, set_output_file and set_timer.
+
+        Args:
+            n_encoders (int, optional): Number of encode threads. Defaults to 1.
+            pool_size (int, optional): Number of frames waiting for the encoders at most.
+                Defaults to 64.
+            policy (str, optional): What happens when the pool is full, 'drop_newest' or
+                'block'. Defaults to 'drop_newest'.
+
+        Returns:
+            GrabPipeline: The running pipeline, its stats() are also saved by save_metadata.
+        """
+        self.pipeline = GrabPipeline(
+            self, n_encoders=n_encoders, pool_size=pool_size, policy=policy
+        )
+        self.pipeline_stats = None
+        self.pipeline.start()
+        return self.pipeline
+
+    def stop_pipeline(self):
+        """
+        Stops grabbing and waits until the grabbed frames are written.
+
+        Raises:
+            Exception: The error that stopped the pipeline early, the recording is
+                incomplete. The stats are kept for save_metadata all the same.
+        """
+        if self.pipeline is not None:
+            pipeline, self.pipeline = self.pipeline, None
+            try:
+                pipeline.stop()
+            finally:
+                self.pipeline_stats = pipeline.stats()
+
     def stop_streaming(self):
         """
         Stops the camera recording.
         """
-        self.basler_camera.StopGrabbing()
-        self.basler_camera.Close()
+        try:
+            self.stop_pipeline()
+        finally:
+            self.basler_camera.StopGrabbing()
+            self.basler_camera.Close()
 
-        if self.out is not None:
-            self.out.release()
+            if self.out is not None:
+                self.out.release()
+                self.out = None
+
+            if self.timestamp_log is not None:
+                self.timestamp_log.close()
+                self.timestamp_log = None
 
     def capture_frame(self):
         """
-        Captures a single frame from the Basler camera, converts it to BGR color format,
-        and writes it to the output file.
+        Captures a single frame from the Basler camera, converts it for the video writer,
+        or keeps it as it is for a raw recording, and writes it to the output file.
         """
         try:
             grab_result = self.basler_camera.RetrieveResult(
                 5000, pylon.TimeoutHandling_ThrowException
             )
             if grab_result.GrabSucceeded():
-                img = grab_result.Array
-                img_bgr = cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
-                self.out.write(img_bgr)
+                self.out.write(self._convert_frame(grab_result.Array))
 
                 timestamp = time.time() - self.start_time
-                self.save_timestamp(timestamp)
+                self.save_timestamp(
+                    timestamp, grab_result.TimeStamp, grab_result.BlockID
+                )
 
                 self.frame_number += 1
             grab_result.Release()
         except Exception as e:
             self.log_error(e)
 
+    def _convert_frame(self, img):
+        """
+        Converts a grabbed frame to the format the video writer expects.
+
+        Args:
+            img (np.ndarray): The grabbed frame.
+
+        Returns:
+            np.ndarray: The frame to encode, mono frames as they are unless colour
+                encoding was requested. Raw recordings store the grabbed frame unchanged.
+        """
+        if self.raw_format is not None:
+            return img
+        return self.converter(img)
+
     def save_metadata(self):
         """
         Saves metadata about the recording to a JSON file in the output directory.
@@ -175,6 +319,30 @@ class BaslerCamera:
             "number_of_frames": self.frame_number,
         }
 
+        if self.video_format is not None:
+            data["video_format"] = self.video_format
+            data["writer"] = self.writer
+            data["writer_options"] = self.writer_options
+            data["video_files"] = [os.path.basename(p) for p in self.video_paths]
+
+        if self.raw_format is not None:
+            frame_shape, dtype = raw_frame_layout(
+                self.converter.pixel_format, data["width"], data["height"]
+            )
+            data["raw_format"] = self.raw_format
+            data["frame_shape"] = list(frame_shape)
+            data["dtype"] = dtype.str
+
+        if self.converter is not None:
+            data["pixel_format"] = self.converter.pixel_format
+            if self.raw_format is None:
+                data["color"] = self.converter.color
+
+        if self.pipeline is not None:
+            data["pipeline"] = self.pipeline.stats()
+        elif self.pipeline_stats is not None:
+            data["pipeline"] = self.pipeline_stats
+
         with open(metadata_path, "w") as f:
             json.dump(data, f, indent=4)
 
@@ -253,7 +421,9 @@ class BaslerCamera:
 
                 current_time = datetime.datetime.now().strftime("%H%M%S")
                 self.set_output_file(
-                    data_save_folder, f"recording_{rec_count + 1}_{current_time}"
+                    data_save_folder,
+                    f"recording_{rec_count + 1}_{current_time}",
+                    video_format=video_format,
                 )
 
                 try:
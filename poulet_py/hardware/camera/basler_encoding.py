@@ -0,0 +1,109 @@
+import re
+
+import cv2
+import numpy as np
+
+# GenICam pixel formats: a colour family, the bits per channel and an optional packing
+PIXEL_FORMAT = re.compile(
+    r"(?P<family>Mono|BayerRG|BayerGR|BayerGB|BayerBG|RGB|BGR)"
+    r"(?P<bits>8|10|12|16)(?P<packing>p|Packed|packed)?"
+)
+
+# The OpenCV conversion of each Bayer mosaic, named by its top-left 2x2 pixels
+BAYER_TO_BGR = {
+    "BayerRG": cv2.COLOR_BayerRGGB2BGR,
+    "BayerGR": cv2.COLOR_BayerGRBG2BGR,
+    "BayerGB": cv2.COLOR_BayerGBRG2BGR,
+    "BayerBG": cv2.COLOR_BayerBGGR2BGR,
+}
+
+
+def parse_pixel_format(pixel_format):
+    """
+    Splits a GenICam pixel format into its colour family and bit depth.
+
+    Args:
+        pixel_format (str): The camera's PixelFormat value, e.g. 'Mono12p' or 'BayerRG8'.
+
+    Returns:
+        tuple: The family, e.g. 'Mono' or 'BayerRG', and the bits per channel.
+
+    Raises:
+        ValueError: If the format is not a Mono, Bayer, RGB or BGR format.
+    """
+    match = PIXEL_FORMAT.fullmatch(pixel_format)
+    if match is None:
+        raise ValueError(
+            f"Unsupported pixel format '{pixel_format}'. Use a Mono, Bayer, RGB or BGR "
+            "format, e.g. 'Mono8', 'Mono12p', 'BayerRG8' or 'RGB8'."
+        )
+    return match.group("family"), int(match.group("bits"))
+
+
+def pixel_bit_depth(pixel_format):
+    """
+    Returns the bits per channel of a GenICam pixel format, e.g. 12 for 'Mono12p'.
+
+    Args:
+        pixel_format (str): The camera's PixelFormat value.
+
+    Returns:
+        int: The bit depth.
+
+    Raises:
+        ValueError: If the format is not supported, see parse_pixel_format.
+    """
+    return parse_pixel_format(pixel_format)[1]
+
+
+class FrameConverter:
+    """
+    Converts grabbed frames into what the video writer encodes.
+
+    Mono pixel formats are encoded as single-channel frames, with the writer
+    opened with ``isColor=False``, so a mono frame is handed over as it is
+    instead of being expanded to three identical BGR channels. Bayer frames
+    are demosaiced to BGR. Frames with more than 8 bits are shifted down to
+    8 bits, which video codecs expect.
+    """
+
+    def __init__(self, pixel_format="Mono8", color=None):
+        """
+        Initializes the FrameConverter object.
+
+        Args:
+            pixel_format (str, optional): The camera's PixelFormat. Defaults to 'Mono8'.
+            color (bool, optional): Whether to encode BGR frames. Defaults to None, which
+                encodes mono formats as mono and all others in colour.
+
+        Raises:
+            ValueError: If the pixel format is not supported, see parse_pixel_format.
+        """
+        self.pixel_format = pixel_format
+        self.family, self.bit_depth = parse_pixel_format(pixel_format)
+        self.mono = self.family == "Mono"
+        self.color = not self.mono if color is None else bool(color)
+
+    def __call__(self, img):
+        """
+        Converts one frame.
+
+        Args:
+            img (np.ndarray): The grabbed frame, ``(H, W)`` or ``(H, W, 3)``.
+
+        Returns:
+            np.ndarray: A uint8 ``(H, W)`` frame for mono encoding, ``(H, W, 3)`` BGR
+                otherwise. A mono 8-bit frame is returned without copying.
+        """
+        if img.dtype != np.uint8:
+            img = (img >> (self.bit_depth - 8)).astype(np.uint8)
+
+        if self.family in BAYER_TO_BGR:
+            bgr = cv2.cvtColor(img, BAYER_TO_BGR[self.family])
+            return bgr if self.color else cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY)
+        if img.ndim == 2:
+            return cv2.cvtColor(img, cv2.COLOR_GRAY2BGR) if self.color else img
+        if self.family == "RGB":
+            code = cv2.COLOR_RGB2BGR if self.color else cv2.COLOR_RGB2GRAY
+            return cv2.cvtColor(img, code)
+        return img if self.color else cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
@@ -0,0 +1,277 @@
+import queue
+import threading
+import time
+
+import numpy as np
+from pypylon import pylon
+
+PIPELINE_POLICIES = ("drop_newest", "block")
+LATENCY_SAMPLES = 1 << 16
+
+
+class GrabPipeline:
+    """
+    Grabs Basler frames on one thread and encodes them on others.
+
+    The grab thread only retrieves a frame, copies it into a free slot of a
+    preallocated frame pool and releases the pylon buffer, so a slow encoder
+    never delays ``RetrieveResult``. Encode threads convert the frames in
+    parallel and write them to the camera's video writer one at a time, in
+    grab order, together with their timestamps.
+
+    When all slots are in use, 'drop_newest' drops the grabbed frame and
+    counts it, 'block' makes the grab thread wait for a slot, leaving the
+    pylon buffers to absorb the delay.
+
+    The first error of a grab or encode thread stops the pipeline: no frame
+    is written after it, ``stats()`` reports it and ``stop`` raises it.
+    """
+
+    def __init__(
+        self,
+        camera,
+        n_encoders=1,
+        pool_size=64,
+        policy="drop_newest",
+        timeout_ms=1000,
+    ):
+        """
+        Initializes the GrabPipeline object.
+
+        Args:
+            camera (BaslerCamera): The grabbing camera, with its output file set.
+            n_encoders (int, optional): Number of encode threads. Defaults to 1.
+            pool_size (int, optional): Number of frames the pool holds. Defaults to 64.
+            policy (str, optional): 'drop_newest' or 'block', see above. Defaults to
+                'drop_newest'.
+            timeout_ms (int, optional): How long RetrieveResult waits for a frame before the
+                grab thread checks whether to stop. Defaults to 1000.
+        """
+        if policy not in PIPELINE_POLICIES:
+            raise ValueError(f"Invalid policy. Choose from {PIPELINE_POLICIES}.")
+        if int(n_encoders) < 1 or int(pool_size) < 1:
+            raise ValueError("n_encoders and pool_size must be at least 1.")
+
+        self.camera = camera
+        self.n_encoders = int(n_encoders)
+        self.pool_size = int(pool_size)
+        self.policy = policy
+        self.timeout_ms = timeout_ms
+
+        self.pool = None
+        self._free = queue.Queue()
+        for slot in range(self.pool_size):
+            self._free.put(slot)
+        self._frames = queue.Queue()
+
+        self.frames_grabbed = 0
+        self.frames_encoded = 0
+        self.dropped_frames = 0
+        self.failed_grabs = 0
+        self.camera_skipped_frames = 0
+        self.max_queue_depth = 0
+        self._queue_depth_sum = 0
+        self._last_block_id = None
+        self._latencies_ns = np.zeros(LATENCY_SAMPLES, dtype=np.int64)
+
+        self._next_write = 0
+        self._turn = threading.Condition()
+        self._stop = threading.Event()
+        self._grab_thread = None
+        self._encode_threads = []
+        self.error = None
+
+    @property
+    def queue_depth(self):
+        """
+        int: Frames grabbed but not yet taken by an encode thread.
+        """
+        return self._frames.qsize()
+
+    def start(self):
+        """
+        Starts the grab and encode threads. The camera must already be grabbing.
+        """
+        self._stop.clear()
+        self._encode_threads = [
+            threading.Thread(
+                target=self._encode, name=f"basler-encode-{i}", daemon=True
+            )
+            for i in range(self.n_encoders)
+        ]
+        for thread in self._encode_threads:
+            thread.start()
+        self._grab_thread = threading.Thread(
+            target=self._grab, name="basler-grab", daemon=True
+        )
+        self._grab_thread.start()
+
+    def stop(self):
+        """
+        Stops grabbing, then waits for the encode threads to write the queued frames.
+
+        Raises:
+            Exception: The first error of the pipeline threads, if one failed.
+        """
+        self._stop.set()
+        if self._grab_thread is not None:
+            self._grab_thread.join()
+            self._grab_thread = None
+        for _ in self._encode_threads:
+            self._frames.put(None)
+        for thread in self._encode_threads:
+            thread.join()
+        self._encode_threads = []
+        if self.error is not None:
+            raise self.error
+
+    def _grab(self):
+        """
+        Copies every grabbed frame into a free pool slot and queues it.
+        """
+        basler_camera = self.camera.basler_camera
+        index = 0
+        try:
+            while not self._stop.is_set():
+                grab_result = basler_camera.RetrieveResult(
+                    self.timeout_ms, pylon.TimeoutHandling_Return
+                )
+                if grab_result is None or not grab_result.IsValid():
+                    continue
+                try:
+                    if not grab_result.GrabSucceeded():
+                        self.failed_grabs += 1
+                        continue
+
+                    grab_ns = time.perf_counter_ns()
+                    timestamp = time.time() - self.camera.start_time
+                    self.frames_grabbed += 1
+                    block_id = grab_result.BlockID
+                    last_block_id, self._last_block_id = self._last_block_id, block_id
+                    if last_block_id is not None and block_id > last_block_id:
+                        # gaps in the block ids are frames the camera could not deliver
+                        self.camera_skipped_frames += block_id - last_block_id - 1
+
+                    try:
+                        if self.policy == "block":
+                            slot = self._free.get()
+                        else:
+                            slot = self._free.get_nowait()
+                    except queue.Empty:
+                        self.dropped_frames += 1
+                        continue
+
+                    array = grab_result.Array
+                    if self.pool is None:
+                        self.pool = np.empty(
+                            (self.pool_size,) + array.shape, dtype=array.dtype
+                        )
+                    np.copyto(self.pool[slot], array)
+                    self._frames.put(
+                        (
+                            index,
+                            slot,
+                            grab_ns,
+                            timestamp,
+                            grab_result.TimeStamp,
+                            block_id,
+                        )
+                    )
+                    index += 1
+
+                    depth = self._frames.qsize()
+                    self._queue_depth_sum += depth
+                    self.max_queue_depth = max(self.max_queue_depth, depth)
+                finally:
+                    grab_result.Release()
+        except Exception as e:
+            self._fail(e)
+
+    def _encode(self):
+        """
+        Converts queued frames and writes them in grab order.
+        """
+        while True:
+            item = self._frames.get()
+            if item is None:
+                return
+            index, slot, grab_ns, timestamp, camera_tick, block_id = item
+            frame = self.pool[slot]
+            image = None
+            if self.error is None:
+                try:
+                    image = self.camera._convert_frame(frame)
+                except Exception as e:
+                    self._fail(e)
+            if image is None or not np.shares_memory(image, frame):
+                # the slot is not needed for writing, it can be refilled already
+                self._free.put(slot)
+                slot = None
+
+            with self._turn:
+                while self._next_write != index:
+                    self._turn.wait()
+                try:
+                    # after an error the remaining frames are only released
+                    if image is not None and self.error is None:
+                        self.camera.out.write(image)
+                        self.camera.save_timestamp(timestamp, camera_tick, block_id)
+                        self.camera.frame_number += 1
+                        self._latencies_ns[self.frames_encoded % LATENCY_SAMPLES] = (
+                            time.perf_counter_ns() - grab_ns
+                        )
+                        self.frames_encoded += 1
+                except Exception as e:
+                    self._fail(e)
+                finally:
+                    self._next_write += 1
+                    self._turn.notify_all()
+            if slot is not None:
+                self._free.put(slot)
+
+    def _fail(self, error):
+        """
+        Keeps the first error of the pipeline threads and stops the pipeline.
+        """
+        if self.error is None:
+            self.error = error
+            self._stop.set()
+            print(f"Grab pipeline stopped: {error!r}")
+
+    def stats(self):
+        """
+        Returns:
+            dict: The frames grabbed, encoded and dropped, the frames the camera skipped
+                according to the block ids, the failed grabs, the mean and maximum queue
+                depth, the grab-to-write latency percentiles in milliseconds and the error
+                that stopped the pipeline, None if there was none.
+        """
+        latencies = self._latencies_ns[: min(self.frames_encoded, LATENCY_SAMPLES)]
+        if len(latencies):
+            p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) / 1e6
+            latency = {
+                "latency_p50_ms": float(p50),
+                "latency_p95_ms": float(p95),
+                "latency_p99_ms": float(p99),
+                "latency_max_ms": float(latencies.max() / 1e6),
+            }
+        else:
+            latency = dict.fromkeys(
+                ("latency_p50_ms", "latency_p95_ms", "latency_p99_ms", "latency_max_ms")
+            )
+        return {
+            "encoders": self.n_encoders,
+            "pool_size": self.pool_size,
+            "policy": self.policy,
+            "frames_grabbed": self.frames_grabbed,
+            "frames_encoded": self.frames_encoded,
+            "dropped_frames": self.dropped_frames,
+            "camera_skipped_frames": self.camera_skipped_frames,
+            "failed_grabs": self.failed_grabs,
+            "queue_depth_mean": self._queue_depth_sum / self.frames_grabbed
+            if self.frames_grabbed
+            else 0.0,
+            "queue_depth_max": self.max_queue_depth,
+            **latency,
+            "error": None if self.error is None else repr(self.error),
+        }
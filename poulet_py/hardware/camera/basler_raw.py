@@ -0,0 +1,368 @@
+import os
+
+import h5py
+import numpy as np
+
+from poulet_py.hardware.camera.basler_encoding import parse_pixel_format
+from poulet_py.hardware.camera.basler_timestamps import (
+    NPY_HEADER_BYTES,
+    npy_header,
+    read_npy_rows,
+)
+
+RAW_FORMATS = ("npy", "hdf5")
+RAW_FRAMES_DATASET = "frames"
+DEFAULT_RAW_CHUNK_FRAMES = 16
+
+
+def raw_frame_layout(pixel_format, width, height):
+    """
+    Returns the shape and dtype of the ``grab_result.Array`` of a pixel format.
+
+    Args:
+        pixel_format (str): The camera's PixelFormat value.
+        width (int): The frame width.
+        height (int): The frame height.
+
+    Returns:
+        tuple: The frame shape, ``(height, width)`` or ``(height, width, 3)`` for RGB and
+            BGR formats, and the dtype, uint8 up to 8 bits and uint16 above.
+    """
+    family, bit_depth = parse_pixel_format(pixel_format)
+    if family in ("RGB", "BGR"):
+        shape = (int(height), int(width), 3)
+    else:
+        shape = (int(height), int(width))
+    dtype = np.uint8 if bit_depth <= 8 else np.uint16
+    return shape, np.dtype(dtype)
+
+
+class RawFrameWriter:
+    """
+    Records grabbed frames exactly as the camera delivers them, without
+    colour conversion or encoding, into one ``(N, height, width)`` store.
+
+    'npy' writes into a memory-mapped ``.npy`` file: a frame costs one copy
+    into the page cache, so small ROIs can be recorded at frame rates the
+    video encoders cannot sustain. The header is rewritten every
+    ``chunk_frames`` frames with the recorded count, so the file loads with
+    ``np.load`` even while it is written. 'hdf5' writes whole chunks of
+    ``chunk_frames`` frames into a resizable dataset whose ``frame_count``
+    attribute holds the recorded count.
+
+    Both stores are preallocated for ``expected_frames``, grow by doubling
+    when a recording runs longer and are trimmed on ``release``. The writer
+    has the ``write`` and ``release`` methods of the video writers, so
+    ``BaslerCamera`` and ``GrabPipeline`` use it the same way.
+    """
+
+    def __init__(
+        self,
+        path,
+        frame_shape,
+        dtype=np.uint8,
+        raw_format="npy",
+        expected_frames=0,
+        chunk_frames=DEFAULT_RAW_CHUNK_FRAMES,
+    ):
+        """
+        Initializes the RawFrameWriter object.
+
+        Args:
+            path (str): The output file, '.npy' or '.hdf5'.
+            frame_shape (tuple): The shape of one frame, see raw_frame_layout.
+            dtype (np.dtype, optional): The dtype of the frames. Defaults to uint8.
+            raw_format (str, optional): 'npy' or 'hdf5'. Defaults to 'npy'.
+            expected_frames (int, optional): Frames to preallocate, e.g. the duration times
+                the frame rate. Defaults to 0.
+            chunk_frames (int, optional): Frames per HDF5 chunk and between header updates
+                of the .npy file. Defaults to 16.
+        """
+        if raw_format not in RAW_FORMATS:
+            raise ValueError(f"Invalid raw format. Choose from {RAW_FORMATS}.")
+        if int(chunk_frames) < 1:
+            raise ValueError("chunk_frames must be at least 1.")
+
+        self.path = path
+        self.paths = [path]
+        self.frame_shape = tuple(int(n) for n in frame_shape)
+        self.dtype = np.dtype(dtype)
+        self.raw_format = raw_format
+        self.chunk_frames = int(chunk_frames)
+        self.frames_written = 0
+        self.capacity = self._round_to_chunk(max(int(expected_frames), 1))
+
+        self._file = None
+        self._map = None
+        self._h5_file = None
+        self._pending = 0
+        if raw_format == "npy":
+            self._file = open(path, "w+b")
+            self._file.write(npy_header(self.dtype, (0,) + self.frame_shape))
+            self._map_frames(self.capacity)
+        else:
+            self._h5_file = h5py.File(path, "w")
+            self.frames = self._h5_file.create_dataset(
+                RAW_FRAMES_DATASET,
+                shape=(self.capacity,) + self.frame_shape,
+                maxshape=(None,) + self.frame_shape,
+                chunks=(self.chunk_frames,) + self.frame_shape,
+                dtype=self.dtype,
+            )
+            self.frames.attrs["frame_count"] = 0
+            self._block = np.empty(
+                (self.chunk_frames,) + self.frame_shape, dtype=self.dtype
+            )
+
+    def write(self, frame):
+        """
+        Stores one frame.
+
+        Args:
+            frame (np.ndarray): The grabbed frame, e.g. ``grab_result.Array``.
+        """
+        if self._file is not None:
+            if self.frames_written == self.capacity:
+                self._map_frames(2 * self.capacity)
+            self._map[self.frames_written] = frame
+            self.frames_written += 1
+            if self.frames_written % self.chunk_frames == 0:
+                self._write_header()
+        else:
+            self._block[self._pending] = frame
+            self._pending += 1
+            self.frames_written += 1
+            if self._pending == self.chunk_frames:
+                self.flush()
+
+    def flush(self):
+        """
+        Writes the pending frames and the recorded count.
+        """
+        if self._file is not None:
+            self._write_header()
+        elif self._h5_file is not None and self._pending:
+            start = self.frames_written - self._pending
+            if self.frames_written > self.capacity:
+                self.capacity = self._round_to_chunk(
+                    max(2 * self.capacity, self.frames_written)
+                )
+                self.frames.resize(self.capacity, axis=0)
+            self.frames[start : self.frames_written] = self._block[: self._pending]
+            self.frames.attrs["frame_count"] = self.frames_written
+            self._pending = 0
+            self._h5_file.flush()
+
+    def release(self):
+        """
+        Writes the pending frames, trims the store to the recorded frames and closes it.
+        """
+        if self._file is not None:
+            self._map.flush()
+            self._map = None
+            self._write_header()
+            self._file.truncate(
+                NPY_HEADER_BYTES + self.frames_written * self._frame_bytes
+            )
+            self._file.close()
+            self._file = None
+        elif self._h5_file is not None:
+            self.flush()
+            self.frames.resize(self.frames_written, axis=0)
+            self._h5_file.close()
+            self._h5_file = None
+
+    @property
+    def _frame_bytes(self):
+        return self.dtype.itemsize * int(np.prod(self.frame_shape))
+
+    def _map_frames(self, capacity):
+        """
+        Grows the .npy file to hold ``capacity`` frames and maps it.
+        """
+        if self._map is not None:
+            self._map.flush()
+            self._map = None
+        self._file.truncate(NPY_HEADER_BYTES + capacity * self._frame_bytes)
+        self._map = np.memmap(
+            self._file,
+            dtype=self.dtype,
+            mode="r+",
+            offset=NPY_HEADER_BYTES,
+            shape=(capacity,) + self.frame_shape,
+        )
+        self.capacity = capacity
+
+    def _write_header(self):
+        """
+        Rewrites the .npy header with the recorded frames.
+        """
+        self._file.seek(0)
+        self._file.write(
+            npy_header(self.dtype, (self.frames_written,) + self.frame_shape)
+        )
+        self._file.flush()
+
+    def _round_to_chunk(self, n_frames):
+        """
+        Rounds a number of frames up to a whole number of chunks.
+        """
+        return -(-n_frames // self.chunk_frames) * self.chunk_frames
+
+
+class RawRecording:
+    """
+    Reads a raw recording made by ``RawFrameWriter`` lazily, also while it is
+    being written.
+
+    Indexing reads only the requested frames, e.g. ``rec[1000:2000]``, from
+    the memory-mapped ``.npy`` file or the HDF5 dataset. ``rec.times`` holds
+    the host timestamps from the ``_timestamps`` file ``BaslerCamera`` writes
+    next to the recording, None if there is none.
+
+    Example::
+
+        with RawRecording("basler-camera_mouse1.npy") as rec:
+            for index, frames in rec.iter_batches(batch_size=256):
+                ...
+    """
+
+    def __init__(self, path):
+        """
+        Opens a raw recording for reading.
+
+        Args:
+            path (str): The '.npy' or '.hdf5' recording.
+        """
+        self.path = path
+        self._times = None
+        self._h5_file = None
+        if path.endswith(".npy"):
+            self.raw_format = "npy"
+            self._frames = np.load(path, mmap_mode="r")
+            self._length = len(self._frames)
+            self.chunk_frames = DEFAULT_RAW_CHUNK_FRAMES
+        else:
+            self.raw_format = "hdf5"
+            self._h5_file = h5py.File(path, "r")
+            self._frames = self._h5_file[RAW_FRAMES_DATASET]
+            # an interrupted recording is not trimmed, frame_count holds the written frames
+            self._length = int(
+                self._frames.attrs.get("frame_count", self._frames.shape[0])
+            )
+            self.chunk_frames = self._frames.chunks[0]
+        self.frame_shape = self._frames.shape[1:]
+        self.dtype = self._frames.dtype
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """
+        Closes the file.
+        """
+        self._frames = None
+        if self._h5_file is not None:
+            self._h5_file.close()
+            self._h5_file = None
+
+    def __len__(self):
+        return self._length
+
+    @property
+    def shape(self):
+        """
+        tuple: The ``(N, height, width)`` shape of the recording.
+        """
+        return (len(self),) + self.frame_shape
+
+    @property
+    def times(self):
+        """
+        np.ndarray: The host timestamps of the frames in seconds, or None.
+        """
+        if self._times is None:
+            self._times = self._read_times()
+        return self._times
+
+    def __getitem__(self, key):
+        if isinstance(key, tuple):
+            # frames first, then the pixel selection applied to the loaded frames
+            frames = self._read(key[0])
+            leading = frames.ndim - len(self.frame_shape)
+            return frames[(slice(None),) * leading + key[1:]]
+        return self._read(key)
+
+    def __iter__(self):
+        for _, frames in self.iter_batches():
+            yield from frames
+
+    def iter_batches(self, batch_size=None, start=0, stop=None):
+        """
+        Iterates over the frames in batches that follow the HDF5 chunks.
+
+        Args:
+            batch_size (int, optional): Frames per batch, rounded to whole chunks.
+                Defaults to one chunk.
+            start (int, optional): The first frame. Defaults to 0.
+            stop (int, optional): One past the last frame. Defaults to the number of frames.
+
+        Yields:
+            tuple: The index of the first frame and the ``(k, height, width)`` frames.
+        """
+        chunk = self.chunk_frames
+        batch_size = (
+            chunk if batch_size is None else max(batch_size // chunk, 1) * chunk
+        )
+        stop = len(self) if stop is None else min(stop, len(self))
+        index = start
+        while index < stop:
+            end = min((index // batch_size + 1) * batch_size, stop)
+            yield index, self._read(slice(index, end))
+            index = end
+
+    def _read(self, key):
+        """
+        Reads frames for an int, slice or list of frame indices.
+        """
+        n = len(self)
+        if isinstance(key, slice):
+            return np.asarray(self._frames[slice(*key.indices(n))])
+        if np.ndim(key) == 0:
+            index = int(key)
+            if index < 0:
+                index += n
+            if not 0 <= index < n:
+                raise IndexError(f"Frame index {key} is out of range for {n} frames.")
+            return np.asarray(self._frames[index])
+
+        indices = np.asarray(key)
+        indices = np.where(indices < 0, indices + n, indices)
+        if len(indices) and (indices.min() < 0 or indices.max() >= n):
+            raise IndexError(f"Frame indices are out of range for {n} frames.")
+        if self.raw_format == "npy":
+            return np.asarray(self._frames[indices])
+        # h5py reads increasing indices only
+        unique, inverse = np.unique(indices, return_inverse=True)
+        return self._frames[unique][inverse]
+
+    def _read_times(self):
+        """
+        Loads the host timestamps from the binary or CSV timestamp file.
+        """
+        base = os.path.splitext(self.path)[0]
+        if os.path.isfile(f"{base}_timestamps.npy"):
+            times = read_npy_rows(f"{base}_timestamps.npy")["host_time"]
+        elif os.path.isfile(f"{base}_timestamps.hdf5"):
+            with h5py.File(f"{base}_timestamps.hdf5", "r") as f:
+                times = f["host_time"][:]
+        elif os.path.isfile(f"{base}_timestamps.csv"):
+            times = np.loadtxt(
+                f"{base}_timestamps.csv", delimiter=",", skiprows=1, ndmin=1
+            )
+        else:
+            return None
+        return times[: len(self)]
@@ -0,0 +1,217 @@
+import ast
+import csv
+import os
+import struct
+
+import h5py
+import numpy as np
+
+TIMESTAMP_DTYPE = np.dtype(
+    [("host_time", np.float64), ("camera_tick", np.int64), ("frame_id", np.int64)]
+)
+TIMESTAMP_FORMATS = ("npy", "hdf5")
+DEFAULT_BLOCK_ROWS = 256
+
+# Fixed .npy header size, so the row count can be rewritten in place after every block
+NPY_HEADER_BYTES = 256
+NPY_MAGIC = b"\x93NUMPY\x01\x00"
+
+
+def npy_header(dtype, rows):
+    """
+    Returns a version 1.0 .npy header of ``NPY_HEADER_BYTES`` bytes.
+
+    Args:
+        dtype (np.dtype): The dtype of the rows.
+        rows (int or tuple): The number of rows of a 1-D array, or the shape.
+
+    Returns:
+        bytes: The header, padded with spaces.
+    """
+    header = repr(
+        {
+            "descr": np.lib.format.dtype_to_descr(dtype),
+            "fortran_order": False,
+            "shape": (rows,) if np.ndim(rows) == 0 else tuple(rows),
+        }
+    )
+    size = NPY_HEADER_BYTES - len(NPY_MAGIC) - 2
+    if len(header) + 1 > size:
+        raise ValueError("The .npy header does not fit in NPY_HEADER_BYTES.")
+    header = header.ljust(size - 1) + "\n"
+    return NPY_MAGIC + struct.pack("<H", size) + header.encode("latin1")
+
+
+def read_npy_rows(path):
+    """
+    Reads a timestamp column written by TimestampLog, also while it is being written.
+
+    Args:
+        path (str): The .npy file.
+
+    Returns:
+        np.ndarray: The structured rows with 'host_time', 'camera_tick' and 'frame_id'.
+    """
+    with open(path, "rb") as f:
+        dtype, rows = read_npy_header(f)
+        return np.fromfile(f, dtype=dtype, count=rows)
+
+
+def read_npy_header(f):
+    """
+    Reads the header of a 1-D .npy file and leaves the file at the first row.
+
+    Args:
+        f (file): The .npy file, opened in binary mode.
+
+    Returns:
+        tuple: The dtype and the number of rows.
+    """
+    f.seek(len(NPY_MAGIC))
+    (size,) = struct.unpack("<H", f.read(2))
+    header = ast.literal_eval(f.read(size).decode("latin1"))
+    return np.dtype(header["descr"]), header["shape"][0]
+
+
+class TimestampLog:
+    """
+    Logs the timestamp of every frame into a CSV file that stays open.
+
+    Rows are collected in a preallocated block and written a block at a time,
+    so the grab loop does not open, write and close a file per frame. With
+    ``binary`` the host time, the camera's timestamp tick and the frame id of
+    every frame are also written as a compact binary column: a structured
+    ``.npy`` file whose header is rewritten after every block, so it always
+    loads, or three datasets in an HDF5 file. Like the CSV, an existing
+    binary column is appended to.
+    """
+
+    def __init__(self, csv_path, binary=None, block_rows=DEFAULT_BLOCK_ROWS):
+        """
+        Initializes the TimestampLog object.
+
+        Args:
+            csv_path (str): The CSV file, rows are appended if it exists.
+            binary (str, optional): None, 'npy' or 'hdf5' for a binary column next to the
+                CSV with the same base name, rows are appended if it exists. Defaults to None.
+            block_rows (int, optional): Rows written at once. Defaults to 256.
+        """
+        if binary not in (None,) + TIMESTAMP_FORMATS:
+            raise ValueError(
+                f"Invalid timestamp format. Choose None or one of {TIMESTAMP_FORMATS}."
+            )
+
+        self.csv_path = csv_path
+        self.binary = binary
+        self.block_rows = int(block_rows)
+        self.row_count = 0
+        self._block = np.empty(self.block_rows, dtype=TIMESTAMP_DTYPE)
+        self._pending = 0
+
+        new_file = not os.path.isfile(csv_path) or os.path.getsize(csv_path) == 0
+        self._csv_file = open(csv_path, mode="a", newline="")
+        self._csv = csv.writer(self._csv_file)
+        if new_file:
+            self._csv.writerow(["timestamp"])
+
+        base = os.path.splitext(csv_path)[0]
+        self.binary_path = None
+        self._npy_file = None
+        self._h5_file = None
+        if binary == "npy":
+            self.binary_path = f"{base}.npy"
+            if os.path.isfile(self.binary_path):
+                self._npy_file = open(self.binary_path, "r+b")
+                _, self.row_count = read_npy_header(self._npy_file)
+                # drops a row that was only partly written
+                self._npy_file.truncate(
+                    NPY_HEADER_BYTES + self.row_count * TIMESTAMP_DTYPE.itemsize
+                )
+                self._npy_file.seek(0, os.SEEK_END)
+            else:
+                self._npy_file = open(self.binary_path, "wb")
+                self._npy_file.write(npy_header(TIMESTAMP_DTYPE, 0))
+        elif binary == "hdf5":
+            self.binary_path = f"{base}.hdf5"
+            self._h5_file = h5py.File(self.binary_path, "a")
+            self._datasets = {}
+            for name in TIMESTAMP_DTYPE.names:
+                if name not in self._h5_file:
+                    self._h5_file.create_dataset(
+                        name,
+                        shape=(0,),
+                        maxshape=(None,),
+                        chunks=(self.block_rows,),
+                        dtype=TIMESTAMP_DTYPE[name],
+                    )
+                self._datasets[name] = self._h5_file[name]
+            self.row_count = len(self._datasets["host_time"])
+            self._datasets["host_time"].attrs["units"] = "s"
+            self._datasets["camera_tick"].attrs["units"] = "camera timestamp ticks"
+
+    def append(self, timestamp, camera_tick=-1, frame_id=-1):
+        """
+        Logs the timestamp of one frame.
+
+        Args:
+            timestamp (float): Seconds since the recording start on the host.
+            camera_tick (int, optional): The camera's timestamp of the frame. Defaults to -1.
+            frame_id (int, optional): The camera's frame id. Defaults to -1.
+        """
+        self._block[self._pending] = (timestamp, camera_tick, frame_id)
+        self._pending += 1
+        if self._pending == self.block_rows:
+            self.flush()
+
+    def flush(self, durable=False):
+        """
+        Writes the buffered rows.
+
+        Args:
+            durable (bool, optional): Whether to also fsync the files, so the rows survive
+                a crash of the machine. Defaults to False.
+        """
+        if self._pending:
+            rows = self._block[: self._pending]
+            self._csv.writerows([timestamp] for timestamp in rows["host_time"].tolist())
+
+            if self._npy_file is not None:
+                self._npy_file.write(rows.tobytes())
+                # the header holds the row count, rewritten so the file always loads
+                self._npy_file.seek(0)
+                self._npy_file.write(
+                    npy_header(TIMESTAMP_DTYPE, self.row_count + self._pending)
+                )
+                self._npy_file.seek(0, os.SEEK_END)
+            elif self._h5_file is not None:
+                stop = self.row_count + self._pending
+                for name, dataset in self._datasets.items():
+                    dataset.resize(stop, axis=0)
+                    dataset[self.row_count : stop] = rows[name]
+
+            self.row_count += self._pending
+            self._pending = 0
+
+        for f in (self._csv_file, self._npy_file):
+            if f is not None:
+                f.flush()
+                if durable:
+                    os.fsync(f.fileno())
+        if self._h5_file is not None:
+            self._h5_file.flush()
+
+    def close(self):
+        """
+        Writes the buffered rows durably and closes the files.
+        """
+        if self._csv_file is None:
+            return
+        self.flush(durable=True)
+        self._csv_file.close()
+        self._csv_file = None
+        if self._npy_file is not None:
+            self._npy_file.close()
+            self._npy_file = None
+        if self._h5_file is not None:
+            self._h5_file.close()
+            self._h5_file = None
@@ -0,0 +1,220 @@
+import ctypes
+import threading
+import time
+from queue import Empty
+
+import numpy as np
+
+
+class FrameRingBuffer:
+    """
+    A preallocated ring buffer of fixed-shape frames.
+
+    Frames are copied into the buffer with a single ``memmove`` from the
+    driver's memory to precomputed slot addresses, so no numpy array or ctypes
+    object is allocated per incoming frame. Consumers can copy frames out into
+    their own preallocated arrays with ``get(out=...)``. When the buffer is
+    full the policy decides which frame is lost:
+
+    - 'drop_newest': the incoming frame is discarded.
+    - 'drop_oldest': the oldest buffered frame is overwritten.
+
+    Every slot also keeps the ``time.perf_counter_ns`` arrival time and the
+    driver's sequence number of its frame; after ``get`` they are available
+    as ``last_arrival_ns`` and ``last_sequence``. The buffer counts every
+    received, dropped and overwritten frame.
+    """
+
+    def __init__(
+        self, capacity, frame_shape, dtype=np.uint16, policy="drop_newest"
+    ):
+        """
+        Initializes the FrameRingBuffer object.
+
+        Args:
+            capacity (int): The number of frames the buffer holds.
+            frame_shape (tuple): The ``(height, width)`` of a single frame.
+            dtype (np.dtype, optional): The data type of the frames. Defaults to uint16.
+            policy (str, optional): What happens when the buffer is full, 'drop_newest' or
+                'drop_oldest'. Defaults to 'drop_newest'.
+        """
+        if int(capacity) < 1:
+            raise ValueError("The buffer capacity must be at least one frame.")
+        if policy not in ("drop_newest", "drop_oldest"):
+            raise ValueError("Invalid policy. Choose 'drop_newest' or 'drop_oldest'.")
+
+        self.capacity = int(capacity)
+        self.frame_shape = tuple(frame_shape)
+        self.policy = policy
+        self.frames = np.zeros((self.capacity,) + self.frame_shape, dtype=dtype)
+        self.frame_nbytes = self.frames[0].nbytes
+        self._slot_addresses = [
+            self.frames[slot].ctypes.data for slot in range(self.capacity)
+        ]
+        self.arrival_ns = np.zeros(self.capacity, dtype=np.int64)
+        self.sequence = np.full(self.capacity, -1, dtype=np.int64)
+        self.last_arrival_ns = None
+        self.last_sequence = None
+
+        self.received_frames = 0
+        self.dropped_frames = 0
+        self.overwritten_frames = 0
+
+        self._head = 0
+        self._count = 0
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+
+    def __len__(self):
+        return self._count
+
+    def push(self, source, nbytes=None, sequence=-1, arrival_ns=None):
+        """
+        Copies one frame from raw memory into the buffer.
+
+        The size is checked before the source memory is touched; frames whose
+        size does not match the buffer's frame size are counted as dropped.
+
+        Args:
+            source (ctypes pointer or int): The address of the frame data.
+            nbytes (int, optional): The size of the frame data in bytes. Defaults to
+                ``frame_nbytes``.
+            sequence (int, optional): The driver's sequence number of the frame. Defaults
+                to -1, unknown.
+            arrival_ns (int, optional): The ``time.perf_counter_ns`` arrival time. Defaults
+                to now.
+
+        Returns:
+            bool: Whether the frame was stored.
+        """
+        if arrival_ns is None:
+            arrival_ns = time.perf_counter_ns()
+        with self._lock:
+            if nbytes is not None and nbytes != self.frame_nbytes:
+                self.received_frames += 1
+                self.dropped_frames += 1
+                return False
+            slot = self._reserve_slot()
+            if slot is None:
+                return False
+            ctypes.memmove(self._slot_addresses[slot], source, self.frame_nbytes)
+            self.arrival_ns[slot] = arrival_ns
+            self.sequence[slot] = sequence
+            self._commit_slot()
+        return True
+
+    def put(self, frame, sequence=-1, arrival_ns=None):
+        """
+        Copies one frame from a numpy array into the buffer.
+
+        Args:
+            frame (np.ndarray): The frame, of shape ``frame_shape``.
+            sequence (int, optional): The driver's sequence number of the frame. Defaults
+                to -1, unknown.
+            arrival_ns (int, optional): The ``time.perf_counter_ns`` arrival time. Defaults
+                to now.
+
+        Returns:
+            bool: Whether the frame was stored.
+        """
+        if arrival_ns is None:
+            arrival_ns = time.perf_counter_ns()
+        with self._lock:
+            slot = self._reserve_slot()
+            if slot is None:
+                return False
+            self.frames[slot] = frame
+            self.arrival_ns[slot] = arrival_ns
+            self.sequence[slot] = sequence
+            self._commit_slot()
+        return True
+
+    def drop(self):
+        """
+        Accounts for a received frame that could not be stored, e.g. because it was malformed.
+        """
+        with self._lock:
+            self.received_frames += 1
+            self.dropped_frames += 1
+
+    def get(self, block=True, timeout=None, out=None):
+        """
+        Removes and returns a copy of the oldest frame.
+
+        Args:
+            block (bool, optional): Whether to wait for a frame. Defaults to True.
+            timeout (float, optional): Maximum number of seconds to wait. Defaults to None.
+            out (np.ndarray, optional): A preallocated array of shape ``frame_shape`` to copy
+                the frame into. Defaults to None, which allocates a new array.
+
+        Returns:
+            np.ndarray: The oldest buffered frame, ``out`` if given.
+
+        Raises:
+            queue.Empty: If no frame is available in time.
+        """
+        with self._not_empty:
+            if block:
+                if not self._not_empty.wait_for(lambda: self._count > 0, timeout):
+                    raise Empty
+            elif self._count == 0:
+                raise Empty
+
+            if out is None:
+                frame = self.frames[self._head].copy()
+            else:
+                np.copyto(out, self.frames[self._head])
+                frame = out
+            self.last_arrival_ns = int(self.arrival_ns[self._head])
+            self.last_sequence = int(self.sequence[self._head])
+            self._head = (self._head + 1) % self.capacity
+            self._count -= 1
+        return frame
+
+    def clear(self):
+        """
+        Discards the buffered frames and resets the counters.
+        """
+        with self._lock:
+            self._head = 0
+            self._count = 0
+            self.received_frames = 0
+            self.dropped_frames = 0
+            self.overwritten_frames = 0
+
+    def stats(self):
+        """
+        Returns the frame counters of the buffer.
+
+        Returns:
+            dict: The received, dropped and overwritten frame counts.
+        """
+        return {
+            "buffer_size": self.capacity,
+            "buffer_policy": self.policy,
+            "frames_received": self.received_frames,
+            "frames_dropped": self.dropped_frames,
+            "frames_overwritten": self.overwritten_frames,
+        }
+
+    def _reserve_slot(self):
+        """
+        Returns the slot for the next frame, or None if it has to be dropped.
+        Must be called with the lock held.
+        """
+        self.received_frames += 1
+        if self._count == self.capacity:
+            if self.policy == "drop_newest":
+                self.dropped_frames += 1
+                return None
+            self._head = (self._head + 1) % self.capacity
+            self._count -= 1
+            self.overwritten_frames += 1
+        return (self._head + self._count) % self.capacity
+
+    def _commit_slot(self):
+        """
+        Publishes the slot filled after ``_reserve_slot``. Must be called with the lock held.
+        """
+        self._count += 1
+        self._not_empty.notify()
@@ -1,70 +1,62 @@
-import numpy as np
-import h5py
-import platform
-import os
-import time
-import matplotlib.pyplot as plt
-import matplotlib as mpl
-from datetime import datetime
-import time
-from mpl_toolkits.axes_grid1 import make_axes_locatable
-
-try:
-    import keyboard
-except ImportError:
-    pass
-try:
-    from queue import Queue
-except ImportError:
-    from Queue import Queue
+import importlib
 import json
-from scipy import ndimage
-import clr
-import sys
+import logging
 import os
 import platform
-import numpy as np
-import pythoncom
-import signal
-import logging
+import queue
+import time
+from datetime import datetime
 
+import h5py
+import numpy as np
 
-def py_frame_callback(frame, userptr):
+from poulet_py.hardware.camera.thermal_denoise import DENOISED_GROUP, TemporalFilter
+from poulet_py.hardware.camera.thermal_duplicates import (
+    DuplicateDetector,
+    FrameIndexWriter,
+)
+from poulet_py.hardware.camera.thermal_ffc import FfcScheduler
+from poulet_py.hardware.camera.thermal_roi import RoiStatistics, RoiStatsWriter
+from poulet_py.hardware.camera.thermal_storage import (
+    BackgroundFrameWriter,
+    ContiguousFrameWriter,
+    PerFrameWriter,
+    compression_kwargs,
+    kelvin_to_celsius,
+)
+from poulet_py.hardware.camera.thermal_telemetry import (
+    TELEMETRY_ROWS,
+    TelemetryWriter,
+    parse_telemetry,
+    telemetry_rows,
+)
+
+# Backends are imported on demand so that e.g. the Windows SDK is never loaded on Linux
+BACKENDS = {
+    "libuvc": "poulet_py.hardware.camera.thermal_libuvc:LibuvcBackend",
+    "windows": "poulet_py.hardware.camera.thermal_windows:CameraWindows",
+    "replay": "poulet_py.hardware.camera.thermal_replay:ReplayBackend",
+    "synthetic": "poulet_py.hardware.camera.thermal_replay:SyntheticBackend",
+}
+
+
+def load_backend(name):
     """
-    Callback function to handle frames from the camera.
+    Imports and returns a thermal camera backend class.
 
     Args:
-        frame: The frame data from the camera.
-        userptr: User pointer.
-    """
-    array_pointer = cast(
-        frame.contents.data,
-        POINTER(c_uint16 * (frame.contents.width * frame.contents.height)),
-    )
-    data = np.frombuffer(array_pointer.contents, dtype=np.uint16).reshape(
-        frame.contents.height, frame.contents.width
-    )
-
-    # Ensure frame size is correct
-    if frame.contents.data_bytes != (2 * frame.contents.width * frame.contents.height):
-        return
-
-    # Add frame data to queue if not full
-    if not q.full():
-        q.put(data)
+        name (str): A key of ``BACKENDS``, or 'auto' to pick the one for this platform.
 
+    Returns:
+        type: The backend class.
+    """
+    if name == "auto":
+        name = "windows" if platform.system() == "Windows" else "libuvc"
+    if name not in BACKENDS:
+        raise ValueError(f"Invalid backend. Choose 'auto' or one of {list(BACKENDS)}.")
 
-# Check whether we are in Windows
-if not platform.system() == "Windows":
-    from uvctypes import *
-
-    BUF_SIZE = 2
-    q = Queue(BUF_SIZE)
-    PTR_PY_FRAME_CALLBACK = CFUNCTYPE(None, POINTER(uvc_frame), c_void_p)(
-        py_frame_callback
-    )
-    tiff_frame = 1
-    colorMapType = 0
+    module_name, class_name = BACKENDS[name].split(":")
+    return getattr(importlib.import_module(module_name), class_name)
 
 
 class ThermalCamera:
@@ -72,13 +64,36 @@ class ThermalCamera:
     A class to interact with the Lepton 3.5 thermal camera.
     """
 
-    def __init__(self, vminT=30, vmaxT=34):
+    def __init__(
+        self,
+        vminT=30,
+        vmaxT=34,
+        buffer_size=32,
+        buffer_policy="drop_newest",
+        backend="auto",
+        backend_options=None,
+        telemetry=None,
+    ):
         """
         Initializes the ThermalCamera object.
 
         Args:
             vminT (int, optional): Minimum temperature threshold. Defaults to 30.
             vmaxT (int, optional): Maximum temperature threshold. Defaults to 34.
+            buffer_size (int, optional): Number of frames the frame ring buffer holds. Defaults to 32.
+            buffer_policy (str, optional): What happens when the ring buffer is full, 'drop_newest'
+                or 'drop_oldest'. Defaults to 'drop_newest'.
+            backend (str, optional): The streaming backend, 'libuvc', 'windows' or 'auto' for the
+                one matching this platform. 'replay' streams an existing recording and
+                'synthetic' generated frames, both without hardware. It is loaded by
+                start_streaming. Defaults to 'auto'.
+            backend_options (dict, optional): Extra arguments for the backend, e.g.
+                {'serial_number': '...'} to pick one of several boards with libuvc, or
+                {'path': '...', 'rate_hz': None} to replay a recording as fast as possible.
+                Defaults to None.
+            telemetry (str, optional): 'footer' or 'header' to enable the Lepton telemetry rows.
+                The frame counter, FFC state and FPA temperature of every frame are then
+                stored in the 'telemetry' group of the recording. Defaults to None.
         """
         self.vminT = int(vminT)
         self.vmaxT = int(vmaxT)
@@ -86,93 +101,77 @@ class ThermalCamera:
         self.width = 160
         self.height = 120
         self.video_format = None
+        self.layout = "per_frame"
+        self.storage = "celsius"
+        self.compression = None
+        self.hpy_file = None
+        self.frame_writer = None
+        self.start_time = None
+        self.start_perf_counter_ns = None
+        self.processor_stats = None
+        self.roi_statistics = None
+        self.roi_writer = None
+        self.temporal_filter = None
+        self.denoise_keep_raw = True
+        self.denoised_writer = None
+        self.elide_duplicates = False
+        self.duplicate_detector = None
+        self.frame_index_writer = None
+        self.duplicates_elided = 0
+        self.background_writer = False
+        self.writer_dropped_frames = 0
 
         self.shutter_manual = False
+        self.ffc_scheduler = None
+
+        self.backend_name = backend
+        self.backend_options = dict(backend_options or {})
+        self.buffer_size = buffer_size
+        self.buffer_policy = buffer_policy
+        self.backend = None
+        self.frame_buffer = None
+
+        # Raw frames carry two extra telemetry rows, split off the image as views
+        self.telemetry = telemetry
+        self.telemetry_writer = None
+        self.telemetry_frames_missing = None
+        if telemetry is None:
+            self.raw_shape = (self.height, self.width)
+            self._image_rows, self._telemetry_rows = slice(None), None
+        else:
+            self.raw_shape = (self.height + TELEMETRY_ROWS, self.width)
+            self._image_rows, self._telemetry_rows = telemetry_rows(
+                self.raw_shape[0], telemetry
+            )
 
-        # Check whether we are in Windows
-        if platform.system() == "Windows":
-            self.windows = True
-            self.windows_camera = CameraWindows()
+        # Pooled frames reused by capture_frame
+        self._kelvin_frame = np.empty(self.raw_shape, dtype=np.uint16)
+        self._celsius_frame = np.empty((self.height, self.width), dtype=np.float64)
 
         print("Object thermal camera initialized")
         print(f"vminT = {self.vminT} and vmaxT = {self.vmaxT}")
 
     def start_streaming(self):
-        global devh
-        global dev
         """
         Method to start streaming. This method needs to be called always
         before you can extract the data from the camera.
         """
-        if self.windows:
-            self.windows_camera.initialise_camera()
-            time.sleep(1)
-            self.windows_camera.start_streaming()
-        else:
-            ctx = POINTER(uvc_context)()
-            dev = POINTER(uvc_device)()
-            devh = POINTER(uvc_device_handle)()
-            ctrl = uvc_stream_ctrl()
-            print(ctrl.__dict__)
-
-            res = libuvc.uvc_init(byref(ctx), 0)
-            if res < 0:
-                print("uvc_init error")
-                exit(1)
-
-            try:
-                res = libuvc.uvc_find_device(ctx, byref(dev), PT_USB_VID, PT_USB_PID, 0)
-                print(res)
-                if res < 0:
-                    print("uvc_find_device error")
-                    exit(1)
-
-                try:
-                    res = libuvc.uvc_open(dev, byref(devh))
-                    print(res)
-                    if res < 0:
-                        print("uvc_open error")
-                        exit(1)
-
-                    print("device opened!")
-
-                    frame_formats = uvc_get_frame_formats_by_guid(devh, VS_FMT_GUID_Y16)
-                    if len(frame_formats) == 0:
-                        print("device does not support Y16")
-                        exit(1)
-
-                    libuvc.uvc_get_stream_ctrl_format_size(
-                        devh,
-                        byref(ctrl),
-                        UVC_FRAME_FORMAT_Y16,
-                        frame_formats[0].wWidth,
-                        frame_formats[0].wHeight,
-                        int(1e7 / frame_formats[0].dwDefaultFrameInterval),
-                    )
-
-                    res = libuvc.uvc_start_streaming(
-                        devh, byref(ctrl), PTR_PY_FRAME_CALLBACK, None, 0
-                    )
-                    if res < 0:
-                        print("uvc_start_streaming failed: {0}".format(res))
-                        exit(1)
-
-                    print("done starting stream, displaying settings")
-                    print_shutter_info(devh)
-                    print("resetting settings to default")
-                    set_auto_ffc(devh)
-                    set_gain_high(devh)
-                    print("current settings")
-                    print_shutter_info(devh)
-
-                except:
-                    libuvc.uvc_unref_device(dev)
-                    print("Failed to Open Device")
-                    exit(1)
-            except:
-                libuvc.uvc_exit(ctx)
-                print("Failed to Find Device")
-                exit(1)
+        backend_class = load_backend(self.backend_name)
+        options = dict(self.backend_options)
+        if self.telemetry is not None:
+            if not getattr(backend_class, "supports_telemetry", False):
+                raise ValueError(
+                    f"The '{self.backend_name}' backend does not support telemetry."
+                )
+            options["telemetry_location"] = self.telemetry
+        self.backend = backend_class(
+            frame_shape=self.raw_shape,
+            buffer_size=self.buffer_size,
+            buffer_policy=self.buffer_policy,
+            **options,
+        )
+        self.frame_buffer = self.backend.frame_buffer
+        self.backend.start_streaming()
 
     def set_timer(self, start_time):
         """
@@ -182,6 +181,27 @@ class ThermalCamera:
             start_time (float): The time at which the camera recording started.
         """
         self.start_time = start_time
+        # Frame timestamps are taken from the monotonic arrival times of the frames,
+        # this is the perf_counter_ns value at which time.time() was start_time
+        self.start_perf_counter_ns = time.perf_counter_ns() - round(
+            (time.time() - start_time) * 1e9
+        )
+        if self.hpy_file is not None:
+            self.hpy_file.attrs["start_perf_counter_ns"] = self.start_perf_counter_ns
+
+    def frame_time(self, arrival_ns):
+        """
+        Converts a frame's perf_counter_ns arrival time to seconds since the start time.
+
+        Args:
+            arrival_ns (int): The arrival time recorded by the frame buffer.
+
+        Returns:
+            float: Seconds since the time given to set_timer.
+        """
+        if self.start_perf_counter_ns is None:
+            self.set_timer(time.time())
+        return (arrival_ns - self.start_perf_counter_ns) / 1e9
 
     def set_error_log_path(self, path, file_name):
         """
@@ -199,6 +219,20 @@ class ThermalCamera:
         base_file_name="thermal-camera",
         video_format="hdf5",
         png=False,
+        layout="per_frame",
+        storage="celsius",
+        compression=None,
+        compression_level=None,
+        shuffle=False,
+        chunk_shape=None,
+        growth_policy="linear",
+        growth_frames=None,
+        expected_duration_s=None,
+        background_writer=False,
+        writer_queue_size=256,
+        writer_batch_size=16,
+        writer_policy="block",
+        elide_duplicates=False,
     ):
         """
         Sets the output file for recording the video.
@@ -209,57 +243,184 @@ class ThermalCamera:
             base_file_name (str, optional): The base name of the output file. Defaults to 'thermal-camera'.
             video_format (str, optional): The format of the output video file. Defaults to 'hdf5'.
             png (bool, optional): Whether to save frames as PNG images. Defaults to False.
-        """
+            layout (str, optional): The HDF5 layout. 'per_frame' writes a 'frame{n}'/'time{n}' dataset
+                pair per frame, 'contiguous' appends into one chunked 'frames' dataset and a 1-D
+                'timestamps' dataset. Defaults to 'per_frame'.
+            storage (str, optional): 'celsius' stores float64 degrees Celsius, 'raw' stores the
+                sensor's uint16 centi-Kelvin counts with 'scale'/'offset' attributes to convert
+                them (see CalibratedFrames). Defaults to 'celsius'.
+            compression (str, optional): HDF5 compression of the frames, None, 'gzip', 'lzf',
+                'blosc' or 'lz4'. 'blosc' and 'lz4' need the 'hdf5plugin' package. Defaults to None.
+            compression_level (int, optional): The gzip or blosc compression level. Defaults to None.
+            shuffle (bool, optional): Whether to apply the byte shuffle filter before compressing.
+                Defaults to False.
+            chunk_shape (tuple, optional): Chunk shape (frames, height, width) of the contiguous
+                'frames' dataset. Defaults to (16, height, width).
+            growth_policy (str, optional): How the contiguous datasets grow, 'linear' or 'double'.
+                Defaults to 'linear'.
+            growth_frames (int, optional): Frames added per growth step of the contiguous datasets.
+                Defaults to eight chunks.
+            expected_duration_s (float, optional): Expected recording duration used to preallocate
+                the contiguous datasets. Defaults to None.
+            background_writer (bool, optional): Whether frames are converted and written on a
+                dedicated writer thread, so that acquisition only enqueues them. Defaults to False.
+            writer_queue_size (int, optional): Maximum number of frames waiting for the writer
+                thread. Defaults to 256.
+            writer_batch_size (int, optional): Maximum number of frames the writer thread writes
+                at once. Defaults to 16.
+            writer_policy (str, optional): What happens when the writer queue is full, 'block',
+                'drop_newest' or 'drop_oldest'. Defaults to 'block'.
+            elide_duplicates (bool, optional): Whether frames the USB stream repeats are stored
+                only once. A 'frame_index' dataset then maps every delivered frame to the
+                stored frame with its image. Defaults to False.
+        """
+        if layout not in ("per_frame", "contiguous"):
+            raise ValueError("Invalid layout. Choose 'per_frame' or 'contiguous'.")
+        if storage not in ("celsius", "raw"):
+            raise ValueError("Invalid storage. Choose 'celsius' or 'raw'.")
+
         self.video_format = video_format
         self.output_file_name = f"{base_file_name}_{extra_name}.{video_format}"
         self.output_path = os.path.join(path, self.output_file_name)
         self.png = png
+        self.layout = layout
+        self.storage = storage
+        self.compression = compression
+        self.compression_level = compression_level
+        self.shuffle = shuffle
+        # fail early if the filter is unknown or its plugin is missing
+        compression_kwargs(compression, compression_level, shuffle)
+        self.chunk_shape = chunk_shape
+        self.growth_policy = growth_policy
+        self.growth_frames = growth_frames
+        self.expected_duration_s = expected_duration_s
+        self.background_writer = background_writer
+        self.writer_queue_size = writer_queue_size
+        self.writer_batch_size = writer_batch_size
+        self.writer_policy = writer_policy
+        self.elide_duplicates = elide_duplicates
+
+    def add_roi(self, name, rect=None, mask=None):
+        """
+        Registers a region of interest whose mean, max and min temperature
+        capture_frame computes for every frame.
+
+        The statistics are stored in the (N, n_roi, 3) 'roi_stats' dataset of the
+        HDF5 file and put on the live stream ``roi_statistics.stream``. Register the
+        ROIs before create_hdf5_file.
+
+        Args:
+            name (str): The name of the ROI, e.g. 'paw'.
+            rect (tuple, optional): The rectangle ``(x, y, width, height)`` in pixels.
+                Defaults to None.
+            mask (np.ndarray, optional): A (120, 160) boolean mask, True inside the ROI.
+                Defaults to None.
+        """
+        if (rect is None) == (mask is None):
+            raise ValueError("Give either rect or mask for the ROI.")
+        if self.roi_statistics is None:
+            self.roi_statistics = RoiStatistics((self.height, self.width))
+        if rect is not None:
+            self.roi_statistics.add_rect(name, *rect)
+        else:
+            self.roi_statistics.add_mask(name, mask)
+
+    def set_denoising(
+        self, mode="mean", window=8, alpha=None, downsample=8, keep_raw=True
+    ):
+        """
+        Averages the recorded stream over time while capturing, and stores the averaged
+        frames at a reduced rate, next to or instead of the full-rate frames.
+
+        The averaged frames are rounded to centi-Kelvin counts and stored like the raw
+        frames, in Celsius or as counts depending on the storage. Next to the raw stream
+        they go to the contiguous datasets of the 'denoised' group, read them with
+        ``ThermalRecording(path, group='denoised')``. Every averaged frame carries the
+        timestamp of the newest frame it contains.
+
+        Args:
+            mode (str, optional): 'mean' over the last ``window`` frames or 'ema' for an
+                exponential moving average. Defaults to 'mean'.
+            window (int, optional): Frames averaged, or the span of the 'ema'. Defaults to 8.
+            alpha (float, optional): The 'ema' weight of the newest frame. Defaults to
+                ``2 / (window + 1)``.
+            downsample (int, optional): One averaged frame is stored every n frames.
+                Defaults to 8, about one per second.
+            keep_raw (bool, optional): Whether the full-rate frames are still stored.
+                Defaults to True.
+        """
+        self.temporal_filter = TemporalFilter(
+            (self.height, self.width),
+            mode=mode,
+            window=window,
+            alpha=alpha,
+            downsample=downsample,
+        )
+        self.denoise_keep_raw = keep_raw
 
     def set_shutter_manual(self):
         """
         Sets the camera shutter to manual mode.
-        """
-        global devh
 
-        print("Shutter is now manual.")
+        Returns:
+            bool: True if the camera is in manual mode, False if the switch failed and
+                the camera still runs its FFCs on its own.
+        """
         try:
-            if self.windows:
-                self.windows_camera.set_shutter_manual()
-            else:
-                set_manual_ffc(devh)
-        except:
-            print("Failed to set shutter to manual.")
-        finally:
-            self.shutter_manual = True
+            self.backend.set_shutter_manual()
+        except Exception as e:
+            print(f"Failed to set shutter to manual: {e}")
+            return False
+        self.shutter_manual = True
+        print("Shutter is now manual.")
+        return True
 
     def perform_manual_ffc(self):
         """
         Performs a manual Flat Field Correction (FFC).
         """
-        global devh
-
         print("Manual FFC")
-        if self.windows:
-            self.windows_camera.perform_manual_ffc()
-        else:
-            perform_manual_ffc(devh)
-            print_shutter_info(devh)
+        self.backend.perform_manual_ffc()
+
+    def schedule_ffc(self, max_interval_s=180.0, min_interval_s=30.0, **kwargs):
+        """
+        Switches to manual FFC and hands the FFCs to an FfcScheduler, so they run in the
+        inter-trial intervals announced by the experiment loop instead of during stimuli.
+
+        Args:
+            max_interval_s (float, optional): Longest time between two FFCs outside
+                measurement windows. Defaults to 180.
+            min_interval_s (float, optional): An inter-trial interval only triggers an FFC
+                if the previous one is at least this old. Defaults to 30.
+            **kwargs: Passed on to FfcScheduler, e.g. settle_s or hard_max_interval_s.
+
+        Returns:
+            FfcScheduler: The started scheduler, also stored as ffc_scheduler.
+        """
+        if self.backend is None:
+            raise RuntimeError("Call start_streaming before schedule_ffc.")
+        if self.ffc_scheduler is not None:
+            self.ffc_scheduler.stop()
+            self.ffc_scheduler = None
+        scheduler = FfcScheduler(
+            self, max_interval_s=max_interval_s, min_interval_s=min_interval_s, **kwargs
+        )
+        scheduler.start()
+        self.ffc_scheduler = scheduler
+        return scheduler
 
     def stop_streaming(self):
         """
         Stops the camera stream.
         """
-        global devh
-
         # check if there's a file open
-        if self.video_format == "hdf5" and self.create_hdf5_file:
-            self.hpy_file.close()
+        self.close_hdf5_file()
+
+        if self.ffc_scheduler is not None:
+            self.ffc_scheduler.stop()
 
         print("Stop streaming")
-        if self.windows:
-            self.windows_camera.stop_streaming()
-        else:
-            libuvc.uvc_stop_streaminging(devh)
+        self.backend.stop_streaming()
 
     def create_hdf5_file(self):
         """
@@ -268,45 +429,220 @@ class ThermalCamera:
         self.frame_number = 1
         if self.video_format == "hdf5":
             self.hpy_file = h5py.File(self.output_path, "w")
+            if self.start_perf_counter_ns is not None:
+                self.hpy_file.attrs["start_perf_counter_ns"] = self.start_perf_counter_ns
         else:
             assert False, "Invalid video format. Please set the video format to 'hdf5'."
 
+        dtype = np.uint16 if self.storage == "raw" else np.float64
+        compression = compression_kwargs(
+            self.compression, self.compression_level, self.shuffle
+        )
+        expected_frames = 0
+        if self.expected_duration_s is not None:
+            expected_frames = int(self.expected_duration_s * self.frames_per_second)
+        if self.temporal_filter is not None and not self.denoise_keep_raw:
+            expected_frames //= self.temporal_filter.downsample
+        if self.layout == "contiguous":
+            self.frame_writer = ContiguousFrameWriter(
+                self.hpy_file,
+                (self.height, self.width),
+                dtype=dtype,
+                chunk_shape=self.chunk_shape,
+                growth_policy=self.growth_policy,
+                growth_frames=self.growth_frames,
+                expected_frames=expected_frames,
+                storage=self.storage,
+                compression=compression,
+            )
+        else:
+            self.frame_writer = PerFrameWriter(
+                self.hpy_file,
+                dtype=dtype,
+                storage=self.storage,
+                compression=compression,
+            )
+
+        if self.temporal_filter is not None:
+            self.temporal_filter.reset()
+            if self.denoise_keep_raw:
+                self.denoised_writer = ContiguousFrameWriter(
+                    self.hpy_file.create_group(DENOISED_GROUP),
+                    (self.height, self.width),
+                    dtype=dtype,
+                    expected_frames=expected_frames // self.temporal_filter.downsample,
+                    storage=self.storage,
+                    compression=compression,
+                )
+                self.temporal_filter.write_attrs(self.denoised_writer.hpy_file)
+
+        if self.elide_duplicates:
+            self.duplicate_detector = DuplicateDetector(
+                self.raw_shape, self._telemetry_rows
+            )
+            self.frame_index_writer = FrameIndexWriter(self.hpy_file)
+
+        if self.roi_statistics is not None:
+            self.roi_writer = RoiStatsWriter(self.hpy_file, self.roi_statistics)
+
+        if self.telemetry is not None:
+            self.telemetry_writer = TelemetryWriter(self.hpy_file, self.width)
+
+        if self.background_writer:
+            self.frame_writer = BackgroundFrameWriter(
+                self.frame_writer,
+                transform=kelvin_to_celsius if self.storage == "celsius" else None,
+                queue_size=self.writer_queue_size,
+                batch_size=self.writer_batch_size,
+                policy=self.writer_policy,
+            )
+
+    def close_hdf5_file(self):
+        """
+        Flushes the pending frames and closes the HDF5 file, if one is open.
+        """
+        dropped = None
+        if self.frame_writer is not None:
+            self.frame_writer.close()
+            self.writer_dropped_frames = getattr(self.frame_writer, "dropped_frames", 0)
+            dropped = getattr(self.frame_writer, "dropped_tickets", None)
+            self.frame_writer = None
+        if self.denoised_writer is not None:
+            self.denoised_writer.close()
+            self.temporal_filter.write_attrs(self.denoised_writer.hpy_file)
+            self.denoised_writer = None
+        if self.frame_index_writer is not None:
+            self.frame_index_writer.close(dropped)
+            self.duplicates_elided = self.frame_index_writer.duplicates
+            self.frame_index_writer = None
+            self.duplicate_detector = None
+        if self.roi_writer is not None:
+            self.roi_writer.close()
+            self.roi_writer = None
+        if self.telemetry_writer is not None:
+            self.telemetry_writer.close()
+            self.telemetry_frames_missing = self.telemetry_writer.frames_missing
+            self.telemetry_writer = None
+        if self.hpy_file is not None:
+            self.hpy_file.close()
+            self.hpy_file = None
+
     def capture_frame(self):
         """
-        Captures a single frame from the thermal camera, converts it to Celsius,
-        and writes it to the output file.
+        Captures a single frame from the thermal camera, converts it to Celsius
+        unless raw storage is selected, and writes it to the output file.
         """
 
         # Warning if hdf5 file is not created
         if self.video_format != "hdf5":
             assert False, "Invalid video format. Please set the video format to 'hdf5'."
 
-        if self.windows:
-            thermal_image_kelvin_data = self.windows_camera.get_frame()
-        else:
-            thermal_image_kelvin_data = q.get(True, 500)
-
-        if thermal_image_kelvin_data is not None:
-            thermal_image_celsius_data = (thermal_image_kelvin_data - 27315) / 100
-
-            self.hpy_file.create_dataset(
-                (f"frame{self.frame_number}"), data=thermal_image_celsius_data
+        raw_frame = self.backend.get_frame(500, out=self._kelvin_frame)
+
+        if raw_frame is not None:
+            # the arrival time at the frame buffer, not the time it was dequeued
+            arrival_ns = self.frame_buffer.last_arrival_ns
+            sequence = self.frame_buffer.last_sequence
+            timestamp = self.frame_time(arrival_ns)
+
+            if self.duplicate_detector is not None:
+                if self.duplicate_detector.is_duplicate(raw_frame):
+                    self.frame_index_writer.append_duplicate()
+                    return
+
+            thermal_image_kelvin_data = raw_frame[self._image_rows]
+            if self.telemetry_writer is not None:
+                self.telemetry_writer.append(raw_frame[self._telemetry_rows][0])
+
+            if self.roi_statistics is not None:
+                # on the counts, only the few statistics are converted to Celsius
+                roi_stats = self.roi_statistics.compute(thermal_image_kelvin_data)[0]
+                if self.roi_writer is not None:
+                    self.roi_writer.append(roi_stats)
+                self.roi_statistics.publish(self.frame_number, timestamp, roi_stats)
+
+            if self.temporal_filter is not None:
+                if self.temporal_filter.update(thermal_image_kelvin_data) is not None:
+                    self._append_kelvin(
+                        self.denoised_writer or self.frame_writer,
+                        self.temporal_filter.counts(),
+                        timestamp,
+                        arrival_ns,
+                        sequence,
+                    )
+                    if not self.denoise_keep_raw:
+                        self._index_stored_frame()
+                elif not self.denoise_keep_raw and self.frame_index_writer is not None:
+                    # stored as part of the next averaged frame
+                    self.frame_index_writer.defer()
+                if not self.denoise_keep_raw:
+                    self.frame_number += 1
+                    return
+
+            self._append_kelvin(
+                self.frame_writer, thermal_image_kelvin_data, timestamp, arrival_ns, sequence
             )
-
-            # get current time
-            timestamp = time.time() - self.start_time
-            self.hpy_file.create_dataset((f"time{self.frame_number}"), data=[timestamp])
+            self._index_stored_frame()
 
             self.frame_number += 1
         else:
             print("Thermal data is none")
 
-    def grab_data_func(self, func, **kwargs):
+    def _index_stored_frame(self):
+        """
+        Records the frame just appended to the frame writer in the frame index.
+        """
+        if self.frame_index_writer is None:
+            return
+        if isinstance(self.frame_writer, BackgroundFrameWriter):
+            # its position in append order, shifted past dropped frames on close
+            appended = self.frame_writer.frames_appended
+        else:
+            appended = self.frame_writer.frame_count
+        self.frame_index_writer.append(appended - 1)
+
+    def _append_kelvin(self, writer, kelvin_frame, timestamp, arrival_ns, sequence):
+        """
+        Appends a centi-Kelvin frame, converted to Celsius unless raw storage is selected.
+        """
+        if self.storage == "raw" or isinstance(writer, BackgroundFrameWriter):
+            # converted to Celsius on the writer thread, if at all
+            writer.append(kelvin_frame, timestamp, arrival_ns, sequence)
+        else:
+            writer.append(
+                kelvin_to_celsius(kelvin_frame, out=self._celsius_frame),
+                timestamp,
+                arrival_ns,
+                sequence,
+            )
+
+    def grab_data_func(
+        self, func, batch_size=None, batch_interval_ms=None, processor=None, **kwargs
+    ):
         """
         Grabs data from the thermal camera and processes it using the provided function.
 
+        By default the function is called once per frame with a ``(120, 160)`` array.
+        With ``batch_size`` or ``batch_interval_ms`` it is called once per batch with a
+        ``(k, 120, 160)`` block and a ``timestamps`` vector of length k, so the analysis
+        can use NumPy reductions over the batch. A batch is handed over when it holds
+        ``batch_size`` frames or ``batch_interval_ms`` after its first frame, whichever
+        comes first. The block is reused for the next batch, copy it to keep it.
+
+        With a ``processor`` (a FrameProcessor) every frame is also handed to its worker
+        processes, without waiting for them, and the function gets the analysis results
+        that are ready, in frame order, as ``results``. Keep heavy analysis there so it
+        does not slow down acquisition.
+
+        The function returns True to stop grabbing, after the current frame or batch.
+
         Args:
             func (function): A function to process the thermal image data.
+            batch_size (int, optional): Maximum number of frames per batch. Defaults to None.
+            batch_interval_ms (float, optional): Maximum time to collect a batch, in
+                milliseconds. Defaults to None.
+            processor (FrameProcessor, optional): Worker pool for per-frame analysis.
+                Defaults to None.
             **kwargs: Additional keyword arguments to pass to the processing function.
 
         Raises:
@@ -319,19 +655,31 @@ class ThermalCamera:
         if self.video_format != "hdf5":
             assert False, "Invalid video format. Please set the video format to 'hdf5'."
 
+        if processor is not None:
+            kwargs["results"] = []
+        if batch_size is not None or batch_interval_ms is not None:
+            self._grab_batches(func, batch_size, batch_interval_ms, processor, **kwargs)
+            return
+
         print("Starting to grab data")
         try:
             while not end:
-                if self.windows:
-                    thermal_image_kelvin_data = self.windows_camera.get_frame()
-                else:
-                    thermal_image_kelvin_data = q.get(True, 500)
+                thermal_image_kelvin_data = self.backend.get_frame(500)
                 if thermal_image_kelvin_data is None:
                     print("Data is none")
                     # make an empty frame
                     thermal_image_celsius_data = np.zeros([120, 160])
 
-                thermal_image_celsius_data = (thermal_image_kelvin_data - 27315) / 100
+                thermal_image_kelvin_data = thermal_image_kelvin_data[self._image_rows]
+                thermal_image_celsius_data = kelvin_to_celsius(thermal_image_kelvin_data)
+
+                if processor is not None:
+                    processor.submit(
+                        thermal_image_celsius_data,
+                        self.frame_number,
+                        self.frame_time(self.frame_buffer.last_arrival_ns),
+                    )
+                    kwargs["results"] = processor.collect()
 
                 end = func(
                     thermal_image_data=thermal_image_celsius_data,
@@ -347,91 +695,169 @@ class ThermalCamera:
             self.log_error(e)
             self.stop_streaming()
 
-    def plot_live(self):
+        if processor is not None:
+            self.processor_stats = processor.stats()
+
+    def _grab_batches(self, func, batch_size, batch_interval_ms, processor, **kwargs):
         """
-        Method to plot the thermal camera as a 2-D raster (imshow, heatmap).
-        The min and max values of the heatmap are specified.
-        You can take a pic too.
+        Batched mode of grab_data_func. Frames are read straight into a preallocated
+        block and converted to Celsius in one vectorized pass per batch.
         """
-        print('Press "r" to refresh the shutter.')
-        print('Press "t" to take a thermal pic.')
-        print('Press "e" to exit.')
+        if batch_size is None:
+            # room for the interval at the nominal frame rate, grown if frames come faster
+            capacity = max(int(batch_interval_ms / 1000 * self.frames_per_second) * 2, 16)
+        else:
+            capacity = max(int(batch_size), 1)
+        interval = None if batch_interval_ms is None else batch_interval_ms / 1000
 
-        mpl.rc("image", cmap="coolwarm")
+        kelvin_block = np.empty((capacity,) + self.raw_shape, dtype=np.uint16)
+        celsius_block = np.empty((capacity, self.height, self.width), dtype=np.float64)
+        timestamps = np.empty(capacity, dtype=np.float64)
 
-        pressed = False
+        end = False
+        print("Starting to grab data in batches")
+        try:
+            while not end:
+                # the first frame of a batch waits as long as a single frame would
+                self.backend.get_frame(500, out=kelvin_block[0])
+                timestamps[0] = self.frame_time(self.frame_buffer.last_arrival_ns)
+                deadline = None if interval is None else time.perf_counter() + interval
+
+                n = 1
+                while batch_size is None or n < batch_size:
+                    if n == len(kelvin_block):
+                        kelvin_block = np.concatenate([kelvin_block, kelvin_block])
+                        celsius_block = np.concatenate([celsius_block, celsius_block])
+                        timestamps = np.concatenate([timestamps, timestamps])
+                    if deadline is None:
+                        timeout = 500
+                    else:
+                        timeout = deadline - time.perf_counter()
+                        if timeout <= 0:
+                            break
+                    try:
+                        self.backend.get_frame(timeout, out=kelvin_block[n])
+                    except queue.Empty:
+                        break
+                    timestamps[n] = self.frame_time(self.frame_buffer.last_arrival_ns)
+                    n += 1
+
+                thermal_image_data = kelvin_to_celsius(
+                    kelvin_block[:n, self._image_rows], out=celsius_block[:n]
+                )
+                if self.telemetry is not None:
+                    kwargs["telemetry"] = parse_telemetry(
+                        kelvin_block[:n, self._telemetry_rows][:, 0]
+                    )
+                if processor is not None:
+                    for i in range(n):
+                        processor.submit(
+                            thermal_image_data[i], self.frame_number + i, timestamps[i]
+                        )
+                    kwargs["results"] = processor.collect()
+
+                end = func(
+                    thermal_image_data=thermal_image_data,
+                    timestamps=timestamps[:n],
+                    hpy_file=self.hpy_file,
+                    frame_number=self.frame_number,
+                    cam=self,
+                    **kwargs,
+                )
+
+                self.frame_number += n
 
-        if platform.system() == "Windows":
-            plt.ion()  # Enable interactive mode
+        except Exception as e:
+            self.log_error(e)
+            self.stop_streaming()
 
-        fig = plt.figure()
-        ax = plt.axes()
-        div = make_axes_locatable(ax)
-        cax = div.append_axes("right", "5%", "5%")
+        if processor is not None:
+            self.processor_stats = processor.stats()
 
-        dummy = np.zeros([120, 160])
+    def plot_live(self, renderer="matplotlib", display_every=1):
+        """
+        Method to plot the thermal camera as a 2-D raster (imshow, heatmap).
+        The min and max values of the heatmap are specified.
+        You can take a pic too.
 
-        img = ax.imshow(
-            dummy,
-            interpolation="nearest",
-            vmin=self.vminT,
-            vmax=self.vmaxT,
-            animated=True,
+        Args:
+            renderer (str, optional): 'matplotlib' reuses one image artist and blits it,
+                'opencv' shows the frames in an OpenCV window coloured through a precomputed
+                lookup table. Defaults to 'matplotlib'.
+            display_every (int, optional): Only every n-th frame is displayed, the others are
+                still read so the preview keeps up with the camera. Defaults to 1.
+        """
+        import keyboard
+        import matplotlib.pyplot as plt
+
+        from poulet_py.hardware.camera.thermal_display import (
+            BlitDisplay,
+            OpenCVDisplay,
         )
-        ax.set_xticks([])
-        ax.set_yticks([])
 
-        ax.spines["top"].set_visible(False)
-        ax.spines["right"].set_visible(False)
-        ax.spines["left"].set_visible(False)
-        ax.spines["bottom"].set_visible(False)
+        if renderer not in ("matplotlib", "opencv"):
+            raise ValueError("Invalid renderer. Choose 'matplotlib' or 'opencv'.")
+        if int(display_every) < 1:
+            raise ValueError("display_every must be at least 1.")
+        display_every = int(display_every)
+
+        print('Press "r" to refresh the shutter.')
+        print('Press "t" to take a thermal pic.')
+        print('Press "e" to exit.')
 
-        fig.colorbar(img, cax=cax)
+        pressed = False
+
+        if renderer == "opencv":
+            display = OpenCVDisplay(self.vminT, self.vmaxT)
+        else:
+            display = BlitDisplay(
+                self.vminT, self.vmaxT, frame_shape=(self.height, self.width)
+            )
+
+        raw_frame = np.empty(self.raw_shape, dtype=np.uint16)
+        kelvin_frame = raw_frame[self._image_rows]
+        celsius_frame = np.empty((self.height, self.width), dtype=np.float32)
+        frame_count = 0
 
         try:
-            while True:
-                if platform.system() == "Windows":
-                    data = self.windows_camera.get_frame()
-                else:
-                    data = q.get(True, 500)
+            while display.is_open:
+                data = self.backend.get_frame(500, out=raw_frame)
+                if data is not None:
+                    data = data[self._image_rows]
                 if data is None:
                     print("Data is none")
                     # make an empty frame
-                    data = np.zeros([120, 160])
-
-                data = (data - 27315) / 100
+                    data = kelvin_frame
+                    data.fill(27315)
 
-                if platform.system() == "Windows":
-                    img.set_data(data)  # Update image data
-                    fig.canvas.draw()  # Redraw the figure
-                    fig.canvas.flush_events()  # Flush the GUI events for real-time updates
-                else:
-                    ax.clear()
-                    img = ax.imshow(data, vmin=self.vminT, vmax=self.vmaxT)
-                    fig.colorbar(img, cax=cax)
-
-                plt.pause(0.0005)
+                if frame_count % display_every == 0:
+                    if renderer == "opencv":
+                        display.show(data)
+                    else:
+                        display.show(kelvin_to_celsius(data, out=celsius_frame))
+                frame_count += 1
 
                 if keyboard.is_pressed("r"):
                     if not pressed:
                         print("Manual FFC")
-                        self.performManualff()
+                        self.perform_manual_ffc()
                         pressed = True
 
                 elif keyboard.is_pressed("t"):
                     if not pressed:
                         try:
+                            celsius = kelvin_to_celsius(data)
                             now = datetime.now()
                             dt_string = now.strftime("day_%d_%m_%Y_time_%H_%M_%S")
                             print(dt_string)
                             f = h5py.File(f"{self.pathset}/{dt_string}.hdf5", "w")
-                            f.create_dataset("image", data=data)
+                            f.create_dataset("image", data=celsius)
                             f = None
                             print("Thermal pic saved as hdf5")
                             if self.png:
                                 plt.imsave(
                                     f"{self.pathset}/{dt_string}.png",
-                                    data,
+                                    celsius,
                                     vmin=self.vminT,
                                     vmax=self.vmaxT,
                                 )
@@ -452,16 +878,10 @@ class ThermalCamera:
 
         except Exception as e:
             self.log_error(e)
-            if platform.system() == "Windows":
-                plt.ioff()
-                plt.close(fig)
-
             self.stop_streaming()
 
         finally:
-            if platform.system() == "Windows":
-                plt.ioff()
-                plt.close(fig)
+            display.close()
 
     def save_metadata(self):
         """
@@ -483,8 +903,47 @@ class ThermalCamera:
             "video_format": self.video_format,
             "png_frames": self.png,
             "shutter_manual": self.shutter_manual,
+            "start_perf_counter_ns": self.start_perf_counter_ns,
+            "telemetry": self.telemetry,
+            "layout": self.layout,
+            "storage": self.storage,
+            "compression": self.compression,
+            "background_writer": self.background_writer,
         }
 
+        if self.frame_buffer is not None:
+            data.update(self.frame_buffer.stats())
+
+        if self.background_writer:
+            if self.frame_writer is not None:
+                self.writer_dropped_frames = self.frame_writer.dropped_frames
+            data["writer_dropped_frames"] = self.writer_dropped_frames
+
+        if self.processor_stats is not None:
+            data.update(self.processor_stats)
+
+        if self.telemetry is not None:
+            if self.telemetry_writer is not None:
+                self.telemetry_frames_missing = self.telemetry_writer.frames_missing
+            data["telemetry_frames_missing"] = self.telemetry_frames_missing
+
+        if self.ffc_scheduler is not None:
+            data.update(self.ffc_scheduler.stats())
+
+        if self.elide_duplicates:
+            if self.frame_index_writer is not None:
+                self.duplicates_elided = self.frame_index_writer.duplicates
+            data["duplicates_elided"] = self.duplicates_elided
+
+        if self.temporal_filter is not None:
+            data["denoise"] = dict(
+                self.temporal_filter.to_dict(), keep_raw=self.denoise_keep_raw
+            )
+
+        if self.roi_statistics is not None:
+            data["rois"] = self.roi_statistics.names
+            data["roi_stats"] = list(self.roi_statistics.stats)
+
         if self.video_format == "hdf5":
             data["number_of_frames"] = self.frame_number
 
@@ -501,122 +960,3 @@ class ThermalCamera:
         else:
             print(f"An error occurred: {error_message}")
             print("Set the error log file path to log the error with set_error_log_path().")
-        
-
-# imports
-
-
-# Initialize COM
-pythoncom.CoInitialize()
-
-folder = "x64" if platform.architecture()[0] == "64bit" else "x86"
-path = os.path.sep.join(__file__.split(os.path.sep)[:-1])
-sys.path.append(os.path.sep.join([path, folder]))
-clr.AddReference("LeptonUVC")
-clr.AddReference("ManagedIR16Filters")
-
-from Lepton import CCI
-from IR16Filters import IR16Capture, NewBytesFrameEvent
-
-
-def handle_exit(sig, frame):
-    print("Exiting and cleaning up...")
-    pythoncom.CoUninitialize()
-
-
-# Register signal handlers for clean exit
-signal.signal(signal.SIGINT, handle_exit)
-signal.signal(signal.SIGTERM, handle_exit)
-
-
-class CameraWindows:
-    def __init__(self):
-        self.latest_frame = None
-        self.CCI = CCI
-        self.IR16Capture = IR16Capture
-        self.NewBytesFrameEvent = NewBytesFrameEvent
-        self.device = None
-        self.reader = None
-
-    def add_frame(self, array, width, height):
-        """
-        Add a new frame to the buffer of read data.
-        """
-        img = np.fromiter(array, dtype="uint16").reshape(height, width)  # parse
-        img = ndimage.rotate(img, angle=0, reshape=True)  # rotation
-        self.latest_frame = img.astype(np.float16)  # update the last reading
-
-    def initialise_camera(self):
-        """
-        Initialize the camera and start capturing frames.
-        """
-        devices = []
-        for i in self.CCI.GetDevices():
-            if i.Name.startswith("PureThermal"):
-                devices.append(i)
-
-        if len(devices) > 1:
-            print("Multiple Pure Thermal devices have been found.\n")
-            for i, d in enumerate(devices):
-                print("{}. {}".format(i, d))
-            while True:
-                idx = input("Select the index of the required device: ")
-                try:
-                    idx = int(idx)
-                    if idx in range(len(devices)):
-                        self.device = devices[idx]
-                        break
-                except ValueError:
-                    print("Unrecognized input value.\n")
-
-        elif len(devices) == 1:
-            self.device = devices[0]
-
-        else:
-            self.device = None
-
-        txt = "No devices called 'PureThermal' have been found."
-        assert self.device is not None, txt
-        self.device = self.device.Open()
-        self.device.sys.RunFFCNormalization()
-
-        self.device.sys.SetGainMode(self.CCI.Sys.GainMode.HIGH)
-
-        self.reader = self.IR16Capture()
-        callback = self.NewBytesFrameEvent(self.add_frame)
-        self.reader.SetupGraphWithBytesCallback(callback)
-
-    def start_streaming(self):
-        """
-        Start capturing frames.
-        """
-        self.reader.RunGraph()
-
-    def set_shutter_manual(self):
-        """
-        Set the shutter mode to manual.
-        """
-        new_shutter_mode_obj = self.device.sys.GetFfcShutterModeObj()
-        new_shutter_mode_obj.shutterMode = self.CCI.Sys.FfcShutterMode.AUTO
-
-        self.device.sys.SetFfcShutterModeObj(new_shutter_mode_obj)
-
-    def perform_manualff(self):
-        """
-        Perform a manual flat field correction.
-        """
-        self.device.sys.RunFFCNormalization()
-
-    def stop_streaming(self):
-        """
-        Stop capturing frames.
-        """
-        self.reader.StopGraph()
-        pythoncom.CoUninitialize()
-        handle_exit(None, None)
-
-    def get_frame(self):
-        """
-        Retrieve the latest frame captured by the camera.
-        """
-        return self.latest_frame
@@ -0,0 +1,314 @@
+"""
+Rewrites thermal recordings from the per-frame ``frame{n}`` / ``time{n}``
+layout into the contiguous, chunked layout, optionally compressed.
+
+Files are converted in parallel, one per worker process. Every output is
+written to ``<name>.part`` and renamed when complete, so an interrupted run
+is resumed by starting it again: finished outputs are verified and skipped,
+partial ones are redone. Run it with::
+
+    python -m poulet_py.hardware.camera.thermal_convert archive/ --output-dir converted/
+    python -m poulet_py.hardware.camera.thermal_convert archive/*.hdf5 --output-dir converted/ \\
+        --storage raw --compression gzip --shuffle --workers 8
+"""
+
+import argparse
+import concurrent.futures
+import glob
+import json
+import os
+import re
+import time
+
+import h5py
+
+from poulet_py.hardware.camera.thermal_recording import (
+    ThermalRecording,
+    metadata_path,
+    read_metadata,
+)
+from poulet_py.hardware.camera.thermal_storage import (
+    ARRIVAL_DATASET,
+    DEFAULT_CHUNK_FRAMES,
+    FRAMES_DATASET,
+    SEQUENCE_DATASET,
+    TIMESTAMPS_DATASET,
+    ContiguousFrameWriter,
+    celsius_to_kelvin,
+    compression_kwargs,
+)
+
+CONVERT_BATCH_FRAMES = 256
+
+
+def expected_frame_count(metadata):
+    """
+    Returns the number of frames a recording should contain according to its metadata.
+
+    ``save_metadata`` stores ``frame_number``, which starts at 1 and is
+    incremented after every frame, so it is one more than the frames written.
+    Frames the background writer dropped are counted in ``frame_number`` but
+    not stored, they are subtracted using ``writer_dropped_frames``.
+
+    Args:
+        metadata (dict): The metadata JSON of the recording, or None.
+
+    Returns:
+        int: The expected number of frames, or None if unknown.
+    """
+    if not metadata or metadata.get("number_of_frames") is None:
+        return None
+    dropped = int(metadata.get("writer_dropped_frames") or 0)
+    denoise = metadata.get("denoise")
+    if denoise and not denoise.get("keep_raw", True):
+        # only the averaged frames were stored
+        return int(denoise["frames_out"]) - dropped
+    return int(metadata["number_of_frames"]) - 1 - dropped
+
+
+def convert_recording(
+    source,
+    output,
+    storage="celsius",
+    compression=None,
+    compression_level=None,
+    shuffle=False,
+    chunk_frames=DEFAULT_CHUNK_FRAMES,
+    allow_mismatch=False,
+):
+    """
+    Converts one recording into the contiguous layout.
+
+    Args:
+        source (str): The recording to convert.
+        output (str): The path of the converted recording.
+        storage (str, optional): 'celsius' keeps the float64 values, 'raw' stores them as
+            uint16 centi-Kelvin counts, which is exact and four times smaller. Defaults
+            to 'celsius'.
+        compression (str, optional): None, 'gzip', 'lzf', 'blosc' or 'lz4'. Defaults to None.
+        compression_level (int, optional): The gzip or blosc level. Defaults to None.
+        shuffle (bool, optional): Whether to apply the byte shuffle filter. Defaults to False.
+        chunk_frames (int, optional): Frames per chunk. Defaults to 16.
+        allow_mismatch (bool, optional): Whether to convert a recording whose frame count
+            disagrees with its metadata. Defaults to False.
+
+    Returns:
+        dict: The source, output, status ('converted', 'skipped' or 'mismatch'), number
+            of frames, expected number of frames and conversion time.
+
+    Raises:
+        ValueError: If the output is the source itself.
+    """
+    if same_file(source, output):
+        raise ValueError(f"The output {output} is the recording itself.")
+    start = time.perf_counter()
+    metadata = read_metadata(source)
+    expected = expected_frame_count(metadata)
+    result = {"source": source, "output": output, "expected_frames": expected}
+
+    if os.path.exists(output):
+        # finished by an earlier run, outputs only appear once complete
+        with ThermalRecording(output, celsius=False) as rec:
+            frames = len(rec)
+        if expected is None or frames == expected:
+            result.update(status="skipped", frames=frames, seconds=0.0)
+            return result
+
+    with ThermalRecording(source, celsius=False) as rec:
+        frames = len(rec)
+        result["frames"] = frames
+        if expected is not None and frames != expected and not allow_mismatch:
+            result.update(status="mismatch", seconds=time.perf_counter() - start)
+            return result
+
+        source_storage = rec.storage
+        if source_storage == "raw":
+            storage = "raw"
+
+        partial = output + ".part"
+        with h5py.File(partial, "w") as f:
+            writer = ContiguousFrameWriter(
+                f,
+                rec.frame_shape,
+                dtype="uint16" if storage == "raw" else rec.dtype,
+                chunk_shape=(chunk_frames,) + tuple(rec.frame_shape),
+                expected_frames=frames,
+                storage=storage,
+                compression=compression_kwargs(compression, compression_level, shuffle),
+            )
+            for index, batch, times in rec.iter_batches(CONVERT_BATCH_FRAMES):
+                if storage == "raw" and source_storage != "raw":
+                    batch = celsius_to_kelvin(batch)
+                frames_slice = slice(index, index + len(batch))
+                writer.append_batch(
+                    batch,
+                    times,
+                    rec.arrival_ns[frames_slice],
+                    rec.sequence[frames_slice],
+                )
+            writer.close()
+
+            # keep everything else the recording holds, e.g. ROI statistics
+            for key in rec.file.keys():
+                if key in (
+                    FRAMES_DATASET,
+                    TIMESTAMPS_DATASET,
+                    ARRIVAL_DATASET,
+                    SEQUENCE_DATASET,
+                ) or re.fullmatch(
+                    r"(frame|time)\d+", key
+                ):
+                    continue
+                rec.file.copy(key, f)
+            if "start_perf_counter_ns" in rec.file.attrs:
+                f.attrs["start_perf_counter_ns"] = rec.file.attrs["start_perf_counter_ns"]
+            f.attrs["converted_from"] = os.path.basename(source)
+            f.attrs["source_layout"] = rec.layout
+
+    with ThermalRecording(partial, celsius=False) as converted:
+        written = len(converted)
+    if written != frames:
+        raise RuntimeError(
+            f"Converted {written} of {frames} frames from {source}, keeping {partial}."
+        )
+    os.replace(partial, output)
+
+    if metadata is not None:
+        metadata.update(
+            layout="contiguous",
+            storage=storage,
+            compression=compression,
+            converted_from=os.path.basename(source),
+        )
+        with open(metadata_path(output), "w") as f:
+            json.dump(metadata, f, indent=4)
+
+    result.update(status="converted", seconds=time.perf_counter() - start)
+    return result
+
+
+def same_file(source, output):
+    """
+    Returns whether two paths name the same file, also if the output does not exist yet.
+    """
+    return os.path.normcase(os.path.realpath(source)) == os.path.normcase(
+        os.path.realpath(output)
+    )
+
+
+def find_recordings(paths):
+    """
+    Expands files and directories into the HDF5 recordings to convert.
+
+    Args:
+        paths (list): Recording files or directories searched for '*.hdf5' files.
+
+    Returns:
+        list: The recording paths, sorted.
+    """
+    recordings = []
+    for path in paths:
+        if os.path.isdir(path):
+            recordings.extend(glob.glob(os.path.join(path, "*.hdf5")))
+        else:
+            recordings.append(path)
+    return sorted(recordings)
+
+
+def convert_recordings(paths, output_dir, workers=None, **options):
+    """
+    Converts recordings in parallel, one file per worker process.
+
+    Args:
+        paths (list): Recording files or directories.
+        output_dir (str): The directory for the converted recordings and their metadata.
+        workers (int, optional): Number of worker processes. Defaults to one per CPU.
+        **options: Passed on to ``convert_recording``.
+
+    Returns:
+        list: The result of every recording, see ``convert_recording``. Recordings that
+            failed have the status 'failed' and the error.
+
+    Raises:
+        ValueError: If a recording would be converted onto itself, before any is converted.
+    """
+    sources = find_recordings(paths)
+    outputs = [os.path.join(output_dir, os.path.basename(source)) for source in sources]
+    for source, output in zip(sources, outputs):
+        if same_file(source, output):
+            raise ValueError(
+                f"{source} would be overwritten, choose another output directory."
+            )
+
+    os.makedirs(output_dir, exist_ok=True)
+    results = []
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(convert_recording, source, output, **options): source
+            for source, output in zip(sources, outputs)
+        }
+        for i, future in enumerate(concurrent.futures.as_completed(futures), 1):
+            source = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {"source": source, "status": "failed", "error": str(e)}
+            results.append(result)
+            print(f"[{i}/{len(sources)}] {result['status']:<9} {source}")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Convert per-frame thermal recordings to the contiguous layout."
+    )
+    parser.add_argument("paths", nargs="+", help="recordings or directories of recordings")
+    parser.add_argument("--output-dir", required=True)
+    parser.add_argument("--workers", type=int, help="worker processes, default one per CPU")
+    parser.add_argument("--storage", choices=["celsius", "raw"], default="celsius")
+    parser.add_argument("--compression", choices=["gzip", "lzf", "blosc", "lz4"])
+    parser.add_argument("--compression-level", type=int)
+    parser.add_argument("--shuffle", action="store_true")
+    parser.add_argument("--chunk-frames", type=int, default=DEFAULT_CHUNK_FRAMES)
+    parser.add_argument(
+        "--allow-mismatch",
+        action="store_true",
+        help="convert recordings whose frame count disagrees with the metadata",
+    )
+    args = parser.parse_args(argv)
+
+    if os.path.abspath(args.output_dir) in map(os.path.abspath, args.paths):
+        parser.error("The output directory must differ from the input directories.")
+
+    try:
+        results = convert_recordings(
+            args.paths,
+            args.output_dir,
+            workers=args.workers,
+            storage=args.storage,
+            compression=args.compression,
+            compression_level=args.compression_level,
+            shuffle=args.shuffle,
+            chunk_frames=args.chunk_frames,
+            allow_mismatch=args.allow_mismatch,
+        )
+    except ValueError as e:
+        parser.error(str(e))
+
+    counts = {}
+    for result in results:
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+    print(", ".join(f"{n} {status}" for status, n in sorted(counts.items())))
+    for result in results:
+        if result["status"] == "mismatch":
+            print(
+                f"{result['source']}: {result['frames']} frames, "
+                f"metadata expects {result['expected_frames']}"
+            )
+        elif result["status"] == "failed":
+            print(f"{result['source']}: {result['error']}")
+    return 1 if counts.get("failed") or counts.get("mismatch") else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
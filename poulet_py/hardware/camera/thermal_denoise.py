@@ -0,0 +1,143 @@
+import numpy as np
+
+DENOISED_GROUP = "denoised"
+DENOISE_MODES = ("mean", "ema")
+
+
+class TemporalFilter:
+    """
+    Averages a thermal stream over time, one frame at a time.
+
+    'mean' keeps the last ``window`` frames in a ring and a running int64 sum,
+    so every update subtracts the oldest frame and adds the newest, exactly
+    and without summing the window again. 'ema' keeps an exponential average.
+    Both work in place on preallocated arrays.
+
+    With ``downsample`` n, only every n-th update returns a frame, so the
+    averaged stream can be stored at a fraction of the sensor rate.
+    """
+
+    def __init__(
+        self, frame_shape=(120, 160), mode="mean", window=8, alpha=None, downsample=1
+    ):
+        """
+        Initializes the TemporalFilter object.
+
+        Args:
+            frame_shape (tuple, optional): The ``(height, width)`` of a frame. Defaults to (120, 160).
+            mode (str, optional): 'mean' for a running mean over the last ``window`` frames,
+                'ema' for an exponential moving average. Defaults to 'mean'.
+            window (int, optional): Frames averaged by 'mean', and the span that sets the
+                default 'ema' weight. Defaults to 8.
+            alpha (float, optional): The weight of the newest frame for 'ema'. Defaults to
+                ``2 / (window + 1)``.
+            downsample (int, optional): Returns every n-th averaged frame. Defaults to 1.
+        """
+        if mode not in DENOISE_MODES:
+            raise ValueError(f"Invalid denoising mode. Choose from {DENOISE_MODES}.")
+        if int(window) < 1 or int(downsample) < 1:
+            raise ValueError("window and downsample must be at least 1.")
+
+        self.frame_shape = tuple(frame_shape)
+        self.mode = mode
+        self.window = int(window)
+        self.alpha = 2 / (self.window + 1) if alpha is None else float(alpha)
+        if not 0 < self.alpha <= 1:
+            raise ValueError("alpha must be in (0, 1].")
+        self.downsample = int(downsample)
+        self.frames_seen = 0
+        self.frames_out = 0
+
+        self._out = np.empty(self.frame_shape, dtype=np.float32)
+        self._counts = np.empty(self.frame_shape, dtype=np.uint16)
+        if mode == "mean":
+            self._ring = np.zeros((self.window,) + self.frame_shape, dtype=np.uint16)
+            self._sum = np.zeros(self.frame_shape, dtype=np.int64)
+        else:
+            self._state = np.zeros(self.frame_shape, dtype=np.float32)
+            self._step = np.empty(self.frame_shape, dtype=np.float32)
+
+    def reset(self):
+        """
+        Forgets the averaged frames, e.g. between recordings.
+        """
+        self.frames_seen = 0
+        self.frames_out = 0
+        if self.mode == "mean":
+            self._ring.fill(0)
+            self._sum.fill(0)
+
+    def update(self, frame):
+        """
+        Adds a frame to the average.
+
+        Args:
+            frame (np.ndarray): A uint16 frame in centi-Kelvin.
+
+        Returns:
+            np.ndarray: The averaged float32 frame if this update is one of every
+                ``downsample``, otherwise None. The array is reused by the next update.
+        """
+        if self.mode == "mean":
+            slot = self.frames_seen % self.window
+            np.subtract(self._sum, self._ring[slot], out=self._sum)
+            self._ring[slot] = frame
+            np.add(self._sum, self._ring[slot], out=self._sum)
+        elif self.frames_seen == 0:
+            self._state[...] = frame
+        else:
+            np.subtract(frame, self._state, out=self._step)
+            self._step *= self.alpha
+            self._state += self._step
+        self.frames_seen += 1
+
+        if self.frames_seen % self.downsample:
+            return None
+        self.frames_out += 1
+        return self.value
+
+    @property
+    def value(self):
+        """
+        np.ndarray: The current float32 average, over fewer frames until the window is full.
+        """
+        if self.mode == "mean":
+            np.divide(self._sum, min(self.frames_seen, self.window), out=self._out)
+        else:
+            self._out[...] = self._state
+        return self._out
+
+    def counts(self):
+        """
+        Returns:
+            np.ndarray: The current average rounded to uint16 centi-Kelvin counts, the
+                form raw frames are stored in. The array is reused by the next call.
+        """
+        np.rint(self.value, out=self._out)
+        self._counts[...] = self._out
+        return self._counts
+
+    def to_dict(self):
+        """
+        Returns:
+            dict: The filter settings and frame counts, for the recording's metadata.
+        """
+        return {
+            "mode": self.mode,
+            "window": self.window,
+            "alpha": self.alpha if self.mode == "ema" else None,
+            "downsample": self.downsample,
+            "frames_in": self.frames_seen,
+            "frames_out": self.frames_out,
+        }
+
+    def write_attrs(self, obj):
+        """
+        Stores the filter settings and frame counts as HDF5 attributes.
+
+        Args:
+            obj (h5py.Group or h5py.Dataset): The group or dataset of the averaged frames.
+        """
+        for name, value in self.to_dict().items():
+            if value is not None:
+                obj.attrs[name] = value
@@ -0,0 +1,167 @@
+import matplotlib as mpl
+import matplotlib.pyplot as plt
+import numpy as np
+from mpl_toolkits.axes_grid1 import make_axes_locatable
+
+
+def colormap_lut(vmin, vmax, cmap="coolwarm"):
+    """
+    Precomputes a BGR colour for every possible raw Lepton count.
+
+    Args:
+        vmin (float): The temperature in Celsius mapped to the lowest colour.
+        vmax (float): The temperature in Celsius mapped to the highest colour.
+        cmap (str, optional): The matplotlib colormap. Defaults to 'coolwarm'.
+
+    Returns:
+        np.ndarray: A ``(65536, 3)`` uint8 lookup table indexed by centi-Kelvin counts.
+    """
+    celsius = (np.arange(2**16, dtype=np.float64) - 27315) / 100
+    normalised = np.clip((celsius - vmin) / (vmax - vmin), 0, 1)
+    rgba = mpl.colormaps[cmap](normalised, bytes=True)
+    return np.ascontiguousarray(rgba[:, 2::-1])
+
+
+class BlitDisplay:
+    """
+    A matplotlib heatmap that reuses one image artist and only blits the
+    image area for each new frame instead of redrawing the whole figure.
+    """
+
+    def __init__(self, vmin, vmax, frame_shape=(120, 160), cmap="coolwarm"):
+        """
+        Initializes the BlitDisplay object and opens the figure.
+
+        Args:
+            vmin (float): Minimum temperature of the colour scale.
+            vmax (float): Maximum temperature of the colour scale.
+            frame_shape (tuple, optional): The ``(height, width)`` of a frame. Defaults to (120, 160).
+            cmap (str, optional): The matplotlib colormap. Defaults to 'coolwarm'.
+        """
+        plt.ion()
+        self.fig = plt.figure()
+        self.ax = plt.axes()
+        div = make_axes_locatable(self.ax)
+        cax = div.append_axes("right", "5%", "5%")
+
+        self.img = self.ax.imshow(
+            np.zeros(frame_shape),
+            interpolation="nearest",
+            vmin=vmin,
+            vmax=vmax,
+            cmap=cmap,
+            animated=True,
+        )
+        self.ax.set_xticks([])
+        self.ax.set_yticks([])
+        for spine in self.ax.spines.values():
+            spine.set_visible(False)
+        self.fig.colorbar(self.img, cax=cax)
+
+        self.canvas = self.fig.canvas
+        self.blit = getattr(self.canvas, "supports_blit", False)
+        self._background = None
+        self.canvas.mpl_connect("draw_event", self._on_draw)
+        plt.show(block=False)
+        self.canvas.draw()
+
+    @property
+    def is_open(self):
+        """
+        Whether the figure window is still open.
+        """
+        return plt.fignum_exists(self.fig.number)
+
+    def show(self, celsius):
+        """
+        Displays a frame.
+
+        Args:
+            celsius (np.ndarray): The frame in degrees Celsius.
+        """
+        self.img.set_data(celsius)
+        if self.blit and self._background is not None:
+            self.canvas.restore_region(self._background)
+            self.ax.draw_artist(self.img)
+            self.canvas.blit(self.ax.bbox)
+        else:
+            self.canvas.draw_idle()
+        self.canvas.flush_events()
+
+    def close(self):
+        """
+        Closes the figure.
+        """
+        plt.ioff()
+        plt.close(self.fig)
+
+    def _on_draw(self, event):
+        """
+        Captures the static background after every full redraw, e.g. on resize.
+        """
+        if self.blit:
+            self._background = self.canvas.copy_from_bbox(self.fig.bbox)
+            self.ax.draw_artist(self.img)
+
+
+class OpenCVDisplay:
+    """
+    An OpenCV window that colours raw frames through a precomputed lookup
+    table, so a frame is displayed with one indexing operation.
+    """
+
+    def __init__(
+        self, vmin, vmax, scale=4, cmap="coolwarm", window_name="Thermal camera"
+    ):
+        """
+        Initializes the OpenCVDisplay object.
+
+        Args:
+            vmin (float): Minimum temperature of the colour scale.
+            vmax (float): Maximum temperature of the colour scale.
+            scale (int, optional): Integer upscaling of the displayed frame. Defaults to 4.
+            cmap (str, optional): The matplotlib colormap used for the lookup table.
+                Defaults to 'coolwarm'.
+            window_name (str, optional): The window title. Defaults to 'Thermal camera'.
+        """
+        import cv2
+
+        self.cv2 = cv2
+        self.lut = colormap_lut(vmin, vmax, cmap)
+        self.scale = int(scale)
+        self.window_name = window_name
+        cv2.namedWindow(window_name, cv2.WINDOW_NORMAL)
+
+    @property
+    def is_open(self):
+        """
+        Whether the window is still open.
+        """
+        return (
+            self.cv2.getWindowProperty(self.window_name, self.cv2.WND_PROP_VISIBLE) >= 1
+        )
+
+    def show(self, raw):
+        """
+        Displays a frame.
+
+        Args:
+            raw (np.ndarray): The frame in centi-Kelvin counts.
+        """
+        bgr = self.lut[np.asarray(raw, dtype=np.uint16)]
+        if self.scale != 1:
+            bgr = self.cv2.resize(
+                bgr,
+                None,
+                fx=self.scale,
+                fy=self.scale,
+                interpolation=self.cv2.INTER_NEAREST,
+            )
+        self.cv2.imshow(self.window_name, bgr)
+        self.cv2.waitKey(1)
+
+    def close(self):
+        """
+        Closes the window.
+        """
+        self.cv2.destroyWindow(self.window_name)
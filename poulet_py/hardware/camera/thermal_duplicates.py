@@ -0,0 +1,180 @@
+import numpy as np
+
+from poulet_py.hardware.camera.thermal_storage import UNKNOWN
+from poulet_py.hardware.camera.thermal_telemetry import FRAME_COUNTER_WORDS
+
+FRAME_INDEX_DATASET = "frame_index"
+DEFAULT_INDEX_CHUNK = 1024
+
+
+class DuplicateDetector:
+    """
+    Detects frames the USB stream delivers again although the sensor has not
+    updated them.
+
+    With telemetry the Lepton's frame counter decides: a repeated frame has
+    the same counter. Otherwise the frame is compared with the previous one,
+    first on its top row, which sensor noise changes in every new frame, and
+    only if that matches on all pixels. Either way a new frame costs about
+    one row comparison.
+    """
+
+    def __init__(self, frame_shape=(120, 160), telemetry_rows=None):
+        """
+        Initializes the DuplicateDetector object.
+
+        Args:
+            frame_shape (tuple, optional): The ``(height, width)`` of a raw frame, telemetry
+                rows included. Defaults to (120, 160).
+            telemetry_rows (slice, optional): The telemetry rows of the raw frame, to compare
+                frame counters instead of pixels. Defaults to None.
+        """
+        self.telemetry_rows = telemetry_rows
+        self.duplicates = 0
+        self._previous = np.empty(tuple(frame_shape), dtype=np.uint16)
+        self._has_previous = False
+        if telemetry_rows is not None:
+            # the frame counter words of telemetry row A
+            low, high = FRAME_COUNTER_WORDS
+            self._counter = (telemetry_rows.start, slice(low, high + 1))
+
+    def is_duplicate(self, raw_frame):
+        """
+        Compares a frame with the previous one and remembers it.
+
+        Args:
+            raw_frame (np.ndarray): The uint16 raw frame, telemetry rows included.
+
+        Returns:
+            bool: True if the frame repeats the previous one.
+        """
+        if not self._has_previous:
+            duplicate = False
+        elif self.telemetry_rows is not None:
+            duplicate = np.array_equal(
+                raw_frame[self._counter], self._previous[self._counter]
+            )
+        else:
+            duplicate = np.array_equal(raw_frame[0], self._previous[0]) and (
+                np.array_equal(raw_frame, self._previous)
+            )
+
+        if duplicate:
+            self.duplicates += 1
+        else:
+            np.copyto(self._previous, raw_frame)
+            self._has_previous = True
+        return duplicate
+
+
+class FrameIndexWriter:
+    """
+    Stores, for every frame the camera delivered, the index of the stored
+    frame holding its image, in a resizable ``frame_index`` dataset.
+
+    A duplicate is stored as a reference to the frame it repeats instead of a
+    second copy, so ``frames[frame_index]`` restores the delivered stream.
+
+    A frame that is not stored itself, e.g. when only averaged frames are
+    kept, is deferred and refers to the next stored frame, the average that
+    includes it. Deferred frames left at the end and frames the writer
+    dropped refer to no stored frame and are -1.
+    """
+
+    def __init__(self, hpy_file, chunk_rows=DEFAULT_INDEX_CHUNK):
+        """
+        Initializes the FrameIndexWriter object.
+
+        Args:
+            hpy_file (h5py.File): The open HDF5 file.
+            chunk_rows (int, optional): Rows per chunk and per write. Defaults to 1024.
+        """
+        self.dataset = hpy_file.create_dataset(
+            FRAME_INDEX_DATASET,
+            shape=(0,),
+            maxshape=(None,),
+            chunks=(chunk_rows,),
+            dtype=np.int64,
+        )
+        self.dataset.attrs["duplicates_elided"] = 0
+        self.chunk_rows = chunk_rows
+        self.row_count = 0
+        self.duplicates = 0
+        self.last_stored = UNKNOWN
+        self._block = np.empty(chunk_rows, dtype=np.int64)
+        self._pending = 0
+        self._deferred = 0
+
+    def append(self, stored_index):
+        """
+        Appends a delivered frame that was stored, after the deferred frames, which
+        refer to the same stored frame.
+
+        Args:
+            stored_index (int): The index of the stored frame.
+        """
+        for _ in range(self._deferred):
+            self._append_row(stored_index)
+        self._deferred = 0
+        self._append_row(stored_index)
+        self.last_stored = stored_index
+
+    def append_duplicate(self):
+        """
+        Appends a delivered frame that was elided as a duplicate of the previous one.
+        """
+        self.duplicates += 1
+        if self._deferred:
+            # it repeats a deferred frame
+            self._deferred += 1
+        else:
+            self._append_row(self.last_stored)
+
+    def defer(self):
+        """
+        Appends a delivered frame whose image is only stored as part of the next
+        stored frame.
+        """
+        self._deferred += 1
+
+    def _append_row(self, stored_index):
+        self._block[self._pending] = stored_index
+        self._pending += 1
+        if self._pending == self.chunk_rows:
+            self.flush()
+
+    def flush(self):
+        """
+        Writes the buffered rows.
+        """
+        if not self._pending:
+            return
+        stop = self.row_count + self._pending
+        self.dataset.resize(stop, axis=0)
+        self.dataset[self.row_count : stop] = self._block[: self._pending]
+        self.dataset.attrs["duplicates_elided"] = self.duplicates
+        self.row_count = stop
+        self._pending = 0
+
+    def close(self, dropped=None):
+        """
+        Writes the buffered rows, the file is closed by its owner.
+
+        Args:
+            dropped (list, optional): The positions in append order of the frames the
+                frame writer dropped, see BackgroundFrameWriter.dropped_tickets. The
+                stored indices, given as positions in append order, are then shifted
+                past the dropped frames. Defaults to None.
+        """
+        for _ in range(self._deferred):
+            self._append_row(UNKNOWN)
+        self._deferred = 0
+        self.flush()
+        if dropped:
+            dropped = np.sort(np.asarray(dropped, dtype=np.int64))
+            index = self.dataset[:]
+            stored = index != UNKNOWN
+            lost = stored & np.isin(index, dropped)
+            index[stored] -= np.searchsorted(dropped, index[stored])
+            index[lost] = UNKNOWN
+            self.dataset[:] = index
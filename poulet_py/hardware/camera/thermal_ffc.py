@@ -0,0 +1,243 @@
+import contextlib
+import threading
+import time
+
+DEFAULT_MAX_INTERVAL_S = 180.0
+DEFAULT_MIN_INTERVAL_S = 30.0
+DEFAULT_SETTLE_S = 1.0
+
+
+class FfcScheduler:
+    """
+    Runs the flat field corrections (FFC) of a thermal camera at controlled times.
+
+    The Lepton freezes its video for the duration of an FFC, and in automatic
+    mode it decides on its own when to run one. The scheduler switches the
+    camera to manual mode and runs an FFC when the experiment loop announces an
+    inter-trial interval, and no later than ``max_interval_s`` after the
+    previous one. No FFC is started inside a measurement window, so frames are
+    delivered continuously there; an FFC that falls due during a window runs as
+    soon as the window ends.
+
+    Example::
+
+        scheduler = camera.schedule_ffc(max_interval_s=120)
+        for trial in trials:
+            with scheduler.measurement():
+                run_stimulus(trial)
+            scheduler.inter_trial()
+    """
+
+    def __init__(
+        self,
+        camera,
+        max_interval_s=DEFAULT_MAX_INTERVAL_S,
+        min_interval_s=DEFAULT_MIN_INTERVAL_S,
+        settle_s=DEFAULT_SETTLE_S,
+        hard_max_interval_s=None,
+        poll_s=0.5,
+    ):
+        """
+        Initializes the FfcScheduler object.
+
+        Args:
+            camera (ThermalCamera): The streaming camera.
+            max_interval_s (float, optional): Longest time between two FFCs outside
+                measurement windows. Defaults to 180.
+            min_interval_s (float, optional): An inter-trial interval only triggers an FFC
+                if the previous one is at least this old. Defaults to 30.
+            settle_s (float, optional): Time the camera needs to finish an FFC, a
+                measurement window starting earlier waits for it. Defaults to 1.
+            hard_max_interval_s (float, optional): If set, an FFC runs once the previous one
+                is this old even inside a measurement window. Defaults to None, which never
+                interrupts a window.
+            poll_s (float, optional): How often the maximum interval is checked. Defaults to 0.5.
+        """
+        if min_interval_s > max_interval_s:
+            raise ValueError("min_interval_s must not exceed max_interval_s.")
+        if hard_max_interval_s is not None and hard_max_interval_s < max_interval_s:
+            raise ValueError("hard_max_interval_s must not be below max_interval_s.")
+
+        self.camera = camera
+        self.max_interval_s = max_interval_s
+        self.min_interval_s = min_interval_s
+        self.settle_s = settle_s
+        self.hard_max_interval_s = hard_max_interval_s
+        self.poll_s = poll_s
+
+        self.ffc_ns = []
+        self.ffc_reasons = []
+        self.deferred = 0
+        self.in_measurement = False
+
+        self._last_ffc_ns = None
+        self._ffc_running = False
+        self._deferring = False
+        self._condition = threading.Condition()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self, initial_ffc=True):
+        """
+        Switches the camera to manual FFC and starts enforcing the maximum interval.
+
+        Args:
+            initial_ffc (bool, optional): Whether to run an FFC right away, so the interval
+                starts from a known correction. Defaults to True.
+
+        Raises:
+            RuntimeError: If the camera cannot be switched to manual FFC, it would keep
+                running FFCs inside measurement windows.
+        """
+        if not self.camera.set_shutter_manual():
+            raise RuntimeError(
+                "Could not switch the camera to manual FFC, the FFCs cannot be scheduled."
+            )
+        if initial_ffc:
+            self.perform_ffc("start")
+        else:
+            self._last_ffc_ns = time.perf_counter_ns()
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="thermal-ffc-scheduler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stops enforcing the maximum interval, the camera stays in manual mode.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def seconds_since_ffc(self):
+        """
+        Returns:
+            float: Seconds since the last FFC, infinite if none has run.
+        """
+        if self._last_ffc_ns is None:
+            return float("inf")
+        return (time.perf_counter_ns() - self._last_ffc_ns) / 1e9
+
+    def inter_trial(self, force=False):
+        """
+        Announces an inter-trial interval, the FFC runs now if one is due.
+
+        Call it right after a trial so that the camera has settled before the next one.
+
+        Args:
+            force (bool, optional): Whether to run an FFC regardless of min_interval_s.
+                Defaults to False.
+
+        Returns:
+            bool: True if an FFC was performed.
+        """
+        if not force and self.seconds_since_ffc() < self.min_interval_s:
+            return False
+        return self.perform_ffc("inter_trial")
+
+    def begin_measurement(self):
+        """
+        Starts a measurement window, no FFC is started until end_measurement.
+
+        Waits for a running FFC and for the settle time after the last one, so that the
+        window starts with live frames.
+        """
+        while True:
+            remaining = self.settle_s - self.seconds_since_ffc()
+            if remaining > 0:
+                time.sleep(remaining)
+            with self._condition:
+                if self._ffc_running:
+                    self._condition.wait()
+                elif self.seconds_since_ffc() >= self.settle_s:
+                    self.in_measurement = True
+                    return
+
+    def end_measurement(self):
+        """
+        Ends the measurement window, runs an FFC that fell due during it.
+        """
+        with self._condition:
+            self.in_measurement = False
+        if self.seconds_since_ffc() >= self.max_interval_s:
+            self.perform_ffc("max_interval")
+
+    @contextlib.contextmanager
+    def measurement(self):
+        """
+        A measurement window as a context manager, see begin_measurement.
+        """
+        self.begin_measurement()
+        try:
+            yield self
+        finally:
+            self.end_measurement()
+
+    def perform_ffc(self, reason="manual"):
+        """
+        Runs an FFC unless a measurement window is open.
+
+        Args:
+            reason (str, optional): Stored with the FFC time. Defaults to 'manual'.
+
+        Returns:
+            bool: True if the FFC was performed, False if a window is open.
+        """
+        hard = (
+            self.hard_max_interval_s is not None
+            and self.seconds_since_ffc() >= self.hard_max_interval_s
+        )
+        with self._condition:
+            if self._ffc_running or (self.in_measurement and not hard):
+                return False
+            if self.in_measurement:
+                reason = "hard_max_interval"
+            self._ffc_running = True
+        try:
+            self.camera.perform_manual_ffc()
+        finally:
+            with self._condition:
+                self._last_ffc_ns = time.perf_counter_ns()
+                self.ffc_ns.append(self._last_ffc_ns)
+                self.ffc_reasons.append(reason)
+                self._ffc_running = False
+                self._condition.notify_all()
+        return True
+
+    def _run(self):
+        """
+        Enforces the maximum interval between FFCs.
+        """
+        while not self._stop.wait(self.poll_s):
+            due = self.seconds_since_ffc() >= self.max_interval_s
+            if due and not self.perform_ffc("max_interval"):
+                # count every window that holds back a due FFC once
+                if not self._deferring:
+                    self.deferred += 1
+                self._deferring = True
+            elif not due:
+                self._deferring = False
+
+    def stats(self):
+        """
+        Returns:
+            dict: The number of FFCs, their times in seconds from the camera's start time,
+                reasons and perf_counter_ns, the number of deferred FFCs and the longest
+                interval between two FFCs.
+        """
+        start_ns = self.camera.start_perf_counter_ns
+        gaps = [(b - a) / 1e9 for a, b in zip(self.ffc_ns, self.ffc_ns[1:])]
+        return {
+            "ffc_count": len(self.ffc_ns),
+            "ffc_times": None
+            if start_ns is None
+            else [(ns - start_ns) / 1e9 for ns in self.ffc_ns],
+            "ffc_perf_counter_ns": list(self.ffc_ns),
+            "ffc_reasons": list(self.ffc_reasons),
+            "ffc_deferred": self.deferred,
+            "ffc_max_interval_s": self.max_interval_s,
+            "ffc_longest_interval_s": max(gaps) if gaps else None,
+        }
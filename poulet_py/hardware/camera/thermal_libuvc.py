@@ -0,0 +1,240 @@
+import itertools
+import time
+from ctypes import CFUNCTYPE, POINTER, byref, c_void_p
+
+from poulet_py.hardware.camera.frame_buffer import FrameRingBuffer
+from poulet_py.hardware.camera.uvctypes import (
+    PT_USB_PID,
+    PT_USB_VID,
+    TELEMETRY_LOCATION_FOOTER,
+    TELEMETRY_LOCATION_HEADER,
+    UVC_FRAME_FORMAT_Y16,
+    VS_FMT_GUID_Y16,
+    enable_telemetry,
+    libuvc,
+    perform_manual_ffc,
+    print_shutter_info,
+    set_auto_ffc,
+    set_gain_high,
+    set_manual_ffc,
+    uvc_context,
+    uvc_device,
+    uvc_device_handle,
+    uvc_frame,
+    uvc_get_frame_formats_by_guid,
+    uvc_stream_ctrl,
+)
+
+# Streaming backends by the id libuvc passes back to the callback as userptr
+streams = {}
+_stream_ids = itertools.count(1)
+
+
+def py_frame_callback(frame, userptr):
+    """
+    Callback function to handle frames from the camera.
+
+    Args:
+        frame: The frame data from the camera.
+        userptr: User pointer, the stream id of the backend the frame belongs to.
+
+    The arrival time is taken first thing and stored with the libuvc sequence
+    number, so queueing and disk latency never end up in the timestamps.
+    """
+    arrival_ns = time.perf_counter_ns()
+    backend = streams.get(userptr)
+    if backend is None:
+        return
+
+    # The ring buffer checks data_bytes against its pre-shaped frame size before
+    # copying, libuvc reuses the frame memory as soon as we return
+    contents = frame.contents
+    backend.frame_buffer.push(
+        contents.data, contents.data_bytes, contents.sequence, arrival_ns
+    )
+
+
+PTR_PY_FRAME_CALLBACK = CFUNCTYPE(None, POINTER(uvc_frame), c_void_p)(
+    py_frame_callback
+)
+
+
+class LibuvcBackend:
+    """
+    Streams a PureThermal board through libuvc (Linux and macOS).
+
+    Every instance owns its libuvc context, device handle and ring buffer, so
+    several cameras can stream in one process. Pick the board with
+    ``serial_number`` when more than one is connected.
+    """
+
+    supports_telemetry = True
+
+    def __init__(
+        self,
+        frame_shape=(120, 160),
+        buffer_size=32,
+        buffer_policy="drop_newest",
+        serial_number=None,
+        telemetry_location=None,
+    ):
+        """
+        Initializes the LibuvcBackend object.
+
+        Args:
+            frame_shape (tuple, optional): The ``(height, width)`` of a frame. Defaults to (120, 160).
+            buffer_size (int, optional): Number of frames the ring buffer holds. Defaults to 32.
+            buffer_policy (str, optional): What happens when the ring buffer is full, 'drop_newest'
+                or 'drop_oldest'. Defaults to 'drop_newest'.
+            serial_number (str, optional): Serial number of the board to open. Defaults to None,
+                which opens the first PureThermal board found.
+            telemetry_location (str, optional): 'footer' or 'header' to enable the Lepton
+                telemetry rows, frame_shape then includes them. Defaults to None.
+        """
+        self.frame_buffer = FrameRingBuffer(
+            buffer_size, frame_shape, policy=buffer_policy
+        )
+        self.frame_shape = tuple(frame_shape)
+        self.serial_number = serial_number
+        self.telemetry_location = telemetry_location
+        self.stream_id = next(_stream_ids)
+
+        self.ctx = POINTER(uvc_context)()
+        self.dev = POINTER(uvc_device)()
+        self.devh = POINTER(uvc_device_handle)()
+
+    def start_streaming(self):
+        """
+        Opens the PureThermal device and starts streaming Y16 frames into the ring buffer.
+        """
+        ctx = self.ctx
+        dev = self.dev
+        devh = self.devh
+        ctrl = uvc_stream_ctrl()
+        print(ctrl.__dict__)
+
+        res = libuvc.uvc_init(byref(ctx), 0)
+        if res < 0:
+            print("uvc_init error")
+            exit(1)
+
+        try:
+            serial_number = (
+                None if self.serial_number is None else self.serial_number.encode()
+            )
+            res = libuvc.uvc_find_device(
+                ctx, byref(dev), PT_USB_VID, PT_USB_PID, serial_number
+            )
+            print(res)
+            if res < 0:
+                print("uvc_find_device error")
+                exit(1)
+
+            try:
+                res = libuvc.uvc_open(dev, byref(devh))
+                print(res)
+                if res < 0:
+                    print("uvc_open error")
+                    exit(1)
+
+                print("device opened!")
+
+                if self.telemetry_location is not None:
+                    enable_telemetry(
+                        devh,
+                        TELEMETRY_LOCATION_HEADER
+                        if self.telemetry_location == "header"
+                        else TELEMETRY_LOCATION_FOOTER,
+                    )
+
+                frame_formats = uvc_get_frame_formats_by_guid(devh, VS_FMT_GUID_Y16)
+                if len(frame_formats) == 0:
+                    print("device does not support Y16")
+                    exit(1)
+
+                # with telemetry the frames are two rows higher
+                height, width = self.frame_shape
+                frame_format = next(
+                    (f for f in frame_formats if f.wHeight == height),
+                    frame_formats[0],
+                )
+                if frame_format.wHeight != height:
+                    print(f"device does not offer Y16 frames with {height} rows")
+                    exit(1)
+
+                libuvc.uvc_get_stream_ctrl_format_size(
+                    devh,
+                    byref(ctrl),
+                    UVC_FRAME_FORMAT_Y16,
+                    frame_format.wWidth,
+                    frame_format.wHeight,
+                    int(1e7 / frame_format.dwDefaultFrameInterval),
+                )
+
+                streams[self.stream_id] = self
+                res = libuvc.uvc_start_streaming(
+                    devh,
+                    byref(ctrl),
+                    PTR_PY_FRAME_CALLBACK,
+                    c_void_p(self.stream_id),
+                    0,
+                )
+                if res < 0:
+                    print("uvc_start_streaming failed: {0}".format(res))
+                    exit(1)
+
+                print("done starting stream, displaying settings")
+                print_shutter_info(devh)
+                print("resetting settings to default")
+                set_auto_ffc(devh)
+                set_gain_high(devh)
+                print("current settings")
+                print_shutter_info(devh)
+
+            except:
+                libuvc.uvc_unref_device(dev)
+                print("Failed to Open Device")
+                exit(1)
+        except:
+            libuvc.uvc_exit(ctx)
+            print("Failed to Find Device")
+            exit(1)
+
+    def get_frame(self, timeout=None, out=None):
+        """
+        Removes the oldest frame from the ring buffer.
+
+        Args:
+            timeout (float, optional): Maximum number of seconds to wait. Defaults to None.
+            out (np.ndarray, optional): A preallocated array to copy the frame into. Defaults to None.
+
+        Returns:
+            np.ndarray: The frame in centi-Kelvin counts.
+
+        Raises:
+            queue.Empty: If no frame arrives in time.
+        """
+        return self.frame_buffer.get(True, timeout, out=out)
+
+    def set_shutter_manual(self):
+        """
+        Sets the shutter to manual flat field correction.
+        """
+        set_manual_ffc(self.devh)
+
+    def perform_manual_ffc(self):
+        """
+        Performs a manual flat field correction.
+        """
+        perform_manual_ffc(self.devh)
+        print_shutter_info(self.devh)
+
+    def stop_streaming(self):
+        """
+        Stops the stream and releases the device and the libuvc context.
+        """
+        libuvc.uvc_stop_streaming(self.devh)
+        streams.pop(self.stream_id, None)
+        libuvc.uvc_close(self.devh)
+        libuvc.uvc_unref_device(self.dev)
+        libuvc.uvc_exit(self.ctx)
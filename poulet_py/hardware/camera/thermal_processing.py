@@ -0,0 +1,212 @@
+import collections
+import concurrent.futures
+import threading
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Per worker process: the shared frame slots and the analysis function
+_worker = {}
+
+
+def _init_worker(shm_name, slots_shape, dtype, func):
+    """
+    Attaches a worker process to the shared frame slots.
+    """
+    # Workers share the parent's resource tracker, which unlinks the block
+    # only if the parent never got to close the processor
+    shm = shared_memory.SharedMemory(name=shm_name)
+    _worker["shm"] = shm
+    _worker["slots"] = np.ndarray(slots_shape, dtype=dtype, buffer=shm.buf)
+    _worker["func"] = func
+
+
+def _process_slot(slot, frame_number, timestamp):
+    """
+    Runs the analysis function on one frame slot in a worker process.
+    """
+    return _worker["func"](
+        _worker["slots"][slot], frame_number=frame_number, timestamp=timestamp
+    )
+
+
+class FrameProcessor:
+    """
+    Runs a per-frame analysis function in a pool of worker processes.
+
+    Frames are copied into slots of a shared memory block, so only the slot
+    index crosses the process boundary. ``submit`` never blocks: once
+    ``max_lag`` frames are waiting for their result the new frame is skipped
+    and counted instead. Results are returned in frame order by ``collect``.
+
+    The function is called as ``func(frame, frame_number=..., timestamp=...)``
+    in a worker, so it has to be defined at module level to be picklable. Its
+    return value should be small, e.g. a few statistics, not a frame.
+    """
+
+    def __init__(
+        self,
+        func,
+        frame_shape=(120, 160),
+        dtype=np.float64,
+        n_workers=None,
+        max_lag=32,
+    ):
+        """
+        Initializes the FrameProcessor object and starts the worker processes.
+
+        Args:
+            func (function): The analysis function, called once per frame in a worker.
+            frame_shape (tuple, optional): The ``(height, width)`` of a frame. Defaults to (120, 160).
+            dtype (np.dtype, optional): The frame data type. Defaults to np.float64 (Celsius).
+            n_workers (int, optional): Number of worker processes. Defaults to None, which uses
+                one per CPU.
+            max_lag (int, optional): Maximum number of frames waiting for their result, also the
+                number of shared frame slots. Defaults to 32.
+        """
+        self.frame_shape = tuple(frame_shape)
+        self.dtype = np.dtype(dtype)
+        self.max_lag = int(max_lag)
+        if self.max_lag < 1:
+            raise ValueError("max_lag must be at least 1.")
+
+        slots_shape = (self.max_lag,) + self.frame_shape
+        nbytes = int(np.prod(slots_shape)) * self.dtype.itemsize
+        self._shm = shared_memory.SharedMemory(create=True, size=nbytes)
+        self._slots = np.ndarray(slots_shape, dtype=self.dtype, buffer=self._shm.buf)
+        self._free_slots = collections.deque(range(self.max_lag))
+        self._lock = threading.Lock()
+
+        # (frame_number, timestamp, future) in submission order
+        self._pending = collections.deque()
+
+        self.frames_submitted = 0
+        self.frames_processed = 0
+        self.frames_skipped = 0
+        self.max_lag_seen = 0
+        self.last_submitted = None
+
+        self._executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=n_workers,
+            initializer=_init_worker,
+            initargs=(self._shm.name, slots_shape, self.dtype.str, func),
+        )
+
+    @property
+    def lag(self):
+        """
+        Number of submitted frames whose result has not been collected yet.
+        """
+        return len(self._pending)
+
+    @property
+    def lag_seconds(self):
+        """
+        Time between the newest submitted frame and the oldest one without a collected result.
+        """
+        if not self._pending:
+            return 0.0
+        return self.last_submitted - self._pending[0][1]
+
+    def submit(self, frame, frame_number, timestamp):
+        """
+        Hands a frame to the workers without waiting for them.
+
+        Args:
+            frame (np.ndarray): The frame, copied into a shared slot.
+            frame_number (int): The number of the frame.
+            timestamp (float): The capture time of the frame.
+
+        Returns:
+            bool: Whether the frame was submitted, False if it was skipped because the
+                workers are ``max_lag`` frames behind.
+        """
+        with self._lock:
+            if len(self._pending) >= self.max_lag or not self._free_slots:
+                self.frames_skipped += 1
+                return False
+            slot = self._free_slots.popleft()
+
+        timestamp = float(timestamp)
+        self._slots[slot] = frame
+        future = self._executor.submit(_process_slot, slot, frame_number, timestamp)
+        future.add_done_callback(lambda _, slot=slot: self._release(slot))
+
+        self._pending.append((frame_number, timestamp, future))
+        self.frames_submitted += 1
+        self.last_submitted = timestamp
+        self.max_lag_seen = max(self.max_lag_seen, len(self._pending))
+        return True
+
+    def collect(self, timeout=0):
+        """
+        Returns the results that are ready, in frame order.
+
+        Collection stops at the first frame still being processed, so a result
+        is never returned before the results of earlier frames.
+
+        Args:
+            timeout (float, optional): Seconds to wait for the oldest pending result.
+                Defaults to 0, which does not wait. None waits for all pending results.
+
+        Returns:
+            list: ``(frame_number, timestamp, result)`` tuples.
+
+        Raises:
+            Exception: Any exception raised by the analysis function.
+        """
+        results = []
+        while self._pending:
+            frame_number, timestamp, future = self._pending[0]
+            if not future.done():
+                if timeout == 0:
+                    break
+                try:
+                    future.result(timeout)
+                except concurrent.futures.TimeoutError:
+                    break
+            self._pending.popleft()
+            results.append((frame_number, timestamp, future.result()))
+            self.frames_processed += 1
+        return results
+
+    def stats(self):
+        """
+        Returns the processor counters.
+
+        Returns:
+            dict: Frames submitted, processed and skipped, and the current and maximum lag.
+        """
+        return {
+            "processor_max_lag": self.max_lag,
+            "processor_frames_submitted": self.frames_submitted,
+            "processor_frames_processed": self.frames_processed,
+            "processor_frames_skipped": self.frames_skipped,
+            "processor_lag_frames": self.lag,
+            "processor_lag_seconds": self.lag_seconds,
+            "processor_max_lag_seen": self.max_lag_seen,
+        }
+
+    def close(self, wait=True):
+        """
+        Stops the workers and frees the shared memory.
+
+        Args:
+            wait (bool, optional): Whether to finish the pending frames first. Their results
+                are dropped unless collected before. Defaults to True.
+        """
+        if not wait:
+            for _, _, future in self._pending:
+                future.cancel()
+        self._executor.shutdown(wait=True)
+        self._pending.clear()
+        del self._slots
+        self._shm.close()
+        self._shm.unlink()
+
+    def _release(self, slot):
+        """
+        Returns a slot once its frame has been processed.
+        """
+        with self._lock:
+            self._free_slots.append(slot)
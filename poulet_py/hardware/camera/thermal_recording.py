@@ -0,0 +1,362 @@
+import json
+import os
+import re
+
+import h5py
+import numpy as np
+
+from poulet_py.hardware.camera.thermal_duplicates import FRAME_INDEX_DATASET
+from poulet_py.hardware.camera.thermal_storage import (
+    ARRIVAL_DATASET,
+    DEFAULT_CHUNK_FRAMES,
+    FRAMES_DATASET,
+    SEQUENCE_DATASET,
+    TIMESTAMPS_DATASET,
+    UNKNOWN,
+    CalibratedFrames,
+)
+from poulet_py.hardware.camera.thermal_telemetry import TELEMETRY_GROUP
+
+
+def per_frame_numbers(hpy_file):
+    """
+    Returns the frame numbers of a per-frame recording in order.
+
+    Args:
+        hpy_file (h5py.File): A file with ``frame{n}`` / ``time{n}`` datasets.
+
+    Returns:
+        list: The numbers ``n`` of the ``frame{n}`` datasets, sorted.
+    """
+    return sorted(
+        int(key[5:]) for key in hpy_file.keys() if re.fullmatch(r"frame\d+", key)
+    )
+
+
+def metadata_path(path):
+    """
+    Returns the path of the JSON file ``ThermalCamera.save_metadata`` writes next to a recording.
+    """
+    directory, file_name = os.path.split(path)
+    return os.path.join(directory, f"{file_name.split('.')[0]}.json")
+
+
+def read_metadata(path):
+    """
+    Reads the metadata JSON of a recording.
+
+    Args:
+        path (str): The HDF5 recording.
+
+    Returns:
+        dict: The metadata, or None if there is no metadata file.
+    """
+    try:
+        with open(metadata_path(path)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+class RecordingColumn:
+    """
+    A per-frame column of a recording, e.g. its timestamps, as a lazily sliced array.
+    """
+
+    def __init__(self, recording, field):
+        self.recording = recording
+        self.field = field
+
+    def __len__(self):
+        return len(self.recording)
+
+    @property
+    def shape(self):
+        return (len(self),)
+
+    def __getitem__(self, key):
+        return self.recording._read(key, self.field)
+
+    def __array__(self, dtype=None, copy=None):
+        return np.asarray(self[:], dtype=dtype)
+
+
+class ThermalRecording:
+    """
+    Reads a recording made by ``ThermalCamera``, in the per-frame
+    (``frame{n}`` / ``time{n}``) or the contiguous (``frames`` / ``timestamps``)
+    layout.
+
+    Indexing reads only the requested frames, e.g. ``rec[1000:2000]`` or
+    ``rec[[3, 5, 8]]``, and ``rec.times`` slices the timestamps the same way.
+    ``rec.arrival_ns`` and ``rec.sequence`` hold the frames' perf_counter_ns
+    arrival times and driver sequence numbers, -1 where not recorded.
+    Frames are returned in degrees Celsius as float32 unless ``celsius=False``,
+    which returns the stored values.
+
+    Example::
+
+        with ThermalRecording("thermal-camera_mouse1.hdf5") as rec:
+            start = rec.index_at(60.0)
+            for index, frames, times in rec.iter_batches(start=start):
+                ...
+    """
+
+    def __init__(self, path, celsius=True, group=None):
+        """
+        Opens a recording for reading.
+
+        Args:
+            path (str): The HDF5 recording.
+            celsius (bool, optional): Whether frames are converted to Celsius. Defaults to True.
+            group (str, optional): A group holding another stream of the recording, e.g.
+                'denoised' for the averaged frames. Defaults to None, the main stream.
+        """
+        self.path = path
+        self.celsius = celsius
+        self.file = h5py.File(path, "r")
+        self.root = self.file if group is None else self.file[group]
+        self._times = None
+
+        if FRAMES_DATASET in self.root:
+            self.layout = "contiguous"
+            dataset = self.root[FRAMES_DATASET]
+            self._frames = dataset
+            self._columns = {
+                field: self.root[field]
+                for field in (TIMESTAMPS_DATASET, ARRIVAL_DATASET, SEQUENCE_DATASET)
+                if field in self.root
+            }
+            # an interrupted recording is not trimmed, frame_count holds the written frames
+            self._length = int(dataset.attrs.get("frame_count", dataset.shape[0]))
+            self.frame_shape = dataset.shape[1:]
+            self.dtype = dataset.dtype
+            self.chunk_frames = (
+                dataset.chunks[0] if dataset.chunks else DEFAULT_CHUNK_FRAMES
+            )
+        else:
+            self.layout = "per_frame"
+            self.frame_numbers = per_frame_numbers(self.root)
+            self._length = len(self.frame_numbers)
+            if self._length:
+                dataset = self.root[f"frame{self.frame_numbers[0]}"]
+                self.frame_shape = dataset.shape
+                self.dtype = dataset.dtype
+            else:
+                dataset = None
+                self.frame_shape = ()
+                self.dtype = np.dtype(np.float64)
+            self.chunk_frames = DEFAULT_CHUNK_FRAMES
+
+        self.storage = self.root.attrs.get("storage", "celsius")
+        self._calibration = CalibratedFrames(dataset) if dataset is not None else None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """
+        Closes the file.
+        """
+        self.file.close()
+
+    def __len__(self):
+        return self._length
+
+    @property
+    def shape(self):
+        return (len(self),) + tuple(self.frame_shape)
+
+    @property
+    def times(self):
+        """
+        RecordingColumn: The timestamps in seconds from the recording start, lazily sliced.
+        """
+        return RecordingColumn(self, TIMESTAMPS_DATASET)
+
+    @property
+    def arrival_ns(self):
+        """
+        RecordingColumn: The perf_counter_ns arrival times of the frames, lazily sliced.
+        """
+        return RecordingColumn(self, ARRIVAL_DATASET)
+
+    @property
+    def sequence(self):
+        """
+        RecordingColumn: The driver sequence numbers of the frames, lazily sliced.
+        """
+        return RecordingColumn(self, SEQUENCE_DATASET)
+
+    @property
+    def telemetry(self):
+        """
+        dict: The parsed Lepton telemetry fields of every frame, e.g. 'frame_counter' and
+            'ffc_state', or None if the recording has no telemetry.
+        """
+        if TELEMETRY_GROUP not in self.root:
+            return None
+        group = self.root[TELEMETRY_GROUP]
+        return {name: group[name][: len(self)] for name in group if name != "row_a"}
+
+    @property
+    def frame_index(self):
+        """
+        np.ndarray: For every frame the camera delivered, the index of the stored frame
+            with its image, or None if duplicates were not elided. ``rec[rec.frame_index]``
+            restores the delivered stream. Frames whose image was not stored, e.g. frames
+            the background writer dropped, are -1.
+        """
+        if FRAME_INDEX_DATASET not in self.root:
+            return None
+        return self.root[FRAME_INDEX_DATASET][:]
+
+    @property
+    def metadata(self):
+        """
+        dict: The metadata JSON written by ``save_metadata``, or None.
+        """
+        return read_metadata(self.path)
+
+    def __getitem__(self, key):
+        if isinstance(key, tuple):
+            # frames first, then the pixel selection applied to the loaded frames
+            frames = self._read(key[0])
+            leading = frames.ndim - len(self.frame_shape)
+            return frames[(slice(None),) * leading + key[1:]]
+        return self._read(key)
+
+    def __iter__(self):
+        for _, frames, _ in self.iter_batches():
+            yield from frames
+
+    def iter_batches(self, batch_size=None, start=0, stop=None):
+        """
+        Iterates over the frames in batches that follow the dataset chunks.
+
+        In the contiguous layout batches end on chunk boundaries, so every chunk is
+        read and decompressed exactly once.
+
+        Args:
+            batch_size (int, optional): Frames per batch, rounded to whole chunks.
+                Defaults to one chunk.
+            start (int, optional): The first frame. Defaults to 0.
+            stop (int, optional): One past the last frame. Defaults to the number of frames.
+
+        Yields:
+            tuple: The index of the first frame, the ``(k, height, width)`` frames and
+                their ``k`` timestamps.
+        """
+        chunk = self.chunk_frames
+        batch_size = chunk if batch_size is None else max(batch_size // chunk, 1) * chunk
+        stop = len(self) if stop is None else min(stop, len(self))
+        index = start
+        while index < stop:
+            end = min((index // batch_size + 1) * batch_size, stop)
+            batch = slice(index, end)
+            yield index, self._read(batch), self._read(batch, TIMESTAMPS_DATASET)
+            index = end
+
+    def index_at(self, timestamp, side="left"):
+        """
+        Finds the frame recorded at a time.
+
+        Args:
+            timestamp (float): Seconds from the recording start.
+            side (str, optional): 'left' returns the first frame at or after the time,
+                'right' the first frame after it. Defaults to 'left'.
+
+        Returns:
+            int: The frame index, ``len(rec)`` if the time is after the last frame.
+        """
+        return int(np.searchsorted(self._all_times(), timestamp, side=side))
+
+    def time_slice(self, start=None, stop=None):
+        """
+        Returns the slice of frames recorded between two times, e.g.
+        ``rec[rec.time_slice(10, 20)]``.
+
+        Args:
+            start (float, optional): Seconds from the recording start. Defaults to the start.
+            stop (float, optional): Seconds from the recording start, exclusive.
+                Defaults to the end.
+
+        Returns:
+            slice: The frame indices.
+        """
+        first = 0 if start is None else self.index_at(start)
+        last = len(self) if stop is None else self.index_at(stop)
+        return slice(first, last)
+
+    def _all_times(self):
+        """
+        Loads and caches all timestamps, for lookups.
+        """
+        if self._times is None:
+            self._times = self._read(slice(None), TIMESTAMPS_DATASET)
+        return self._times
+
+    def _read(self, key, field=FRAMES_DATASET):
+        """
+        Reads frames or a column for an int, slice or list of frame indices.
+        """
+        n = len(self)
+        if isinstance(key, slice):
+            start, stop, step = key.indices(n)
+            if step == 1:
+                indices = slice(start, max(start, stop))
+            else:
+                indices = np.arange(start, stop, step)
+        elif np.ndim(key) == 0:
+            index = int(key)
+            if index < 0:
+                index += n
+            if not 0 <= index < n:
+                raise IndexError(f"Frame index {key} is out of range for {n} frames.")
+            return self._read(slice(index, index + 1), field)[0]
+        else:
+            indices = np.asarray(key)
+            if indices.dtype == bool:
+                indices = np.flatnonzero(indices)
+            indices = np.where(indices < 0, indices + n, indices)
+            if indices.size and (indices.min() < 0 or indices.max() >= n):
+                raise IndexError(f"Frame indices are out of range for {n} frames.")
+
+        if self.layout == "contiguous":
+            if field == FRAMES_DATASET:
+                dataset = self._frames
+            elif field in self._columns:
+                dataset = self._columns[field]
+            else:
+                # recorded before arrival times and sequence numbers were stored
+                return np.full(len(np.arange(n)[indices]), UNKNOWN, dtype=np.int64)
+            if isinstance(indices, slice):
+                data = dataset[indices]
+            else:
+                # h5py needs increasing unique indices
+                unique, inverse = np.unique(indices, return_inverse=True)
+                data = dataset[unique][inverse] if unique.size else dataset[0:0]
+        else:
+            if isinstance(indices, slice):
+                indices = range(indices.start, indices.stop)
+            keys = [self.frame_numbers[i] for i in indices]
+            if field == TIMESTAMPS_DATASET:
+                data = np.array(
+                    [self.root[f"time{k}"][0] for k in keys], dtype=np.float64
+                )
+            elif field != FRAMES_DATASET:
+                data = np.array(
+                    [self.root[f"frame{k}"].attrs.get(field, UNKNOWN) for k in keys],
+                    dtype=np.int64,
+                )
+            else:
+                data = np.empty((len(keys),) + tuple(self.frame_shape), self.dtype)
+                for j, k in enumerate(keys):
+                    self.root[f"frame{k}"].read_direct(data, dest_sel=np.s_[j])
+
+        if field != FRAMES_DATASET or not self.celsius or self._calibration is None:
+            return data
+        return self._calibration.to_celsius(data)
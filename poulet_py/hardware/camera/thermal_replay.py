@@ -0,0 +1,330 @@
+import abc
+import re
+import threading
+import time
+
+import h5py
+import numpy as np
+
+from poulet_py.hardware.camera.frame_buffer import FrameRingBuffer
+from poulet_py.hardware.camera.thermal_storage import (
+    FRAMES_DATASET,
+    celsius_to_kelvin,
+)
+from poulet_py.hardware.camera.thermal_telemetry import (
+    FFC_COMPLETE,
+    FFC_IN_PROGRESS,
+    FFC_NEVER_COMMANDED,
+    TELEMETRY_ROWS,
+    encode_telemetry,
+    telemetry_rows,
+)
+
+# Simulated FFCs mark this many frames as in progress, about half a second at 8.7 Hz
+SIMULATED_FFC_FRAMES = 4
+
+REPLAY_BATCH_FRAMES = 256
+
+
+def synthetic_frames(n_frames, frame_shape=(120, 160), seed=0):
+    """
+    Generates Lepton-like frames in centi-Kelvin: a room-temperature
+    background, a warm moving blob and sensor noise.
+
+    Args:
+        n_frames (int): The number of frames.
+        frame_shape (tuple, optional): The ``(height, width)`` of a frame. Defaults to (120, 160).
+        seed (int, optional): The random seed. Defaults to 0.
+
+    Returns:
+        np.ndarray: A ``(n_frames, height, width)`` uint16 array.
+    """
+    rng = np.random.default_rng(seed)
+    height, width = frame_shape
+    y, x = np.mgrid[0:height, 0:width]
+    frames = np.empty((n_frames, height, width), dtype=np.uint16)
+    background = 29315 + 40 * (x / width)
+    for i in range(n_frames):
+        cy = height / 2 + 0.25 * height * np.sin(i / 50)
+        cx = width / 2 + 0.3 * width * np.cos(i / 80)
+        blob = 1200 * np.exp(-((y - cy) ** 2 + (x - cx) ** 2) / 300)
+        noise = rng.normal(0, 4, (height, width))
+        frames[i] = background + blob + noise
+    return frames
+
+
+def iter_recording_frames(path, batch_frames=REPLAY_BATCH_FRAMES):
+    """
+    Reads the frames of a ThermalCamera recording as centi-Kelvin counts, batch by batch.
+
+    Args:
+        path (str): The HDF5 recording, in the per-frame or contiguous layout.
+        batch_frames (int, optional): Frames read per batch from a contiguous recording.
+            Defaults to 256.
+
+    Yields:
+        np.ndarray: ``(k, height, width)`` uint16 batches.
+    """
+    with h5py.File(path, "r") as f:
+        raw = f.attrs.get("storage", "celsius") == "raw"
+
+        if FRAMES_DATASET in f:
+            frames = f[FRAMES_DATASET]
+            n_frames = int(frames.attrs.get("frame_count", frames.shape[0]))
+            for start in range(0, n_frames, batch_frames):
+                batch = frames[start : min(start + batch_frames, n_frames)]
+                yield batch if raw else celsius_to_kelvin(batch)
+        else:
+            keys = sorted(
+                (k for k in f.keys() if re.fullmatch(r"frame\d+", k)),
+                key=lambda k: int(k[5:]),
+            )
+            for key in keys:
+                frame = f[key][()][np.newaxis]
+                yield frame if raw else celsius_to_kelvin(frame)
+
+
+class _PacedBackend(abc.ABC):
+    """
+    Base class for backends that push frames from a thread into the ring
+    buffer at a fixed rate, or as fast as possible.
+
+    With ``telemetry_location`` the frames get two telemetry rows like a
+    Lepton's: a frame counter advancing by 3 per frame and the FFC state.
+    """
+
+    supports_telemetry = True
+
+    def __init__(
+        self,
+        frame_shape=(120, 160),
+        buffer_size=32,
+        buffer_policy="drop_newest",
+        rate_hz=8.7,
+        lossless=False,
+        telemetry_location=None,
+    ):
+        self.frame_shape = tuple(frame_shape)
+        self.telemetry_location = telemetry_location
+        if telemetry_location is None:
+            self.image_shape = self.frame_shape
+        else:
+            height, width = self.frame_shape
+            self.image_shape = (height - TELEMETRY_ROWS, width)
+            self._image_rows, self._telemetry_rows = telemetry_rows(
+                self.frame_shape[0], telemetry_location
+            )
+        self.ffc_state = FFC_NEVER_COMMANDED
+        self._ffc_remaining = 0
+        self.frame_buffer = FrameRingBuffer(
+            buffer_size, frame_shape, policy=buffer_policy
+        )
+        self.rate_hz = rate_hz
+        self.lossless = lossless
+        self.frames_sent = 0
+
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start_streaming(self):
+        """
+        Starts delivering frames into the ring buffer.
+        """
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name=type(self).__name__, daemon=True
+        )
+        self._thread.start()
+
+    def stop_streaming(self):
+        """
+        Stops delivering frames.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    @property
+    def is_streaming(self):
+        """
+        Whether frames are still being delivered.
+        """
+        return self._thread is not None and self._thread.is_alive()
+
+    def get_frame(self, timeout=None, out=None):
+        """
+        Removes the oldest frame from the ring buffer.
+
+        Args:
+            timeout (float, optional): Maximum number of seconds to wait. Defaults to None.
+            out (np.ndarray, optional): A preallocated array to copy the frame into. Defaults to None.
+
+        Returns:
+            np.ndarray: The frame in centi-Kelvin counts.
+
+        Raises:
+            queue.Empty: If no frame arrives in time.
+        """
+        return self.frame_buffer.get(True, timeout, out=out)
+
+    def set_shutter_manual(self):  # noqa: B027, a deliberate no-op
+        """
+        There is no shutter, nothing to do.
+        """
+
+    def perform_manual_ffc(self):
+        """
+        There is no shutter, the next few frames are marked as taken during an FFC.
+        """
+        self._ffc_remaining = SIMULATED_FFC_FRAMES
+
+    @abc.abstractmethod
+    def _frames(self):
+        """
+        Yields ``(k, height, width)`` uint16 batches to deliver.
+        """
+
+    def _run(self):
+        """
+        Delivery thread: copies frames into the ring buffer through the same
+        raw-memory path the libuvc callback uses, paced to ``rate_hz``.
+        """
+        period = 1 / self.rate_hz if self.rate_hz else 0
+        deadline = time.perf_counter()
+        start = deadline
+        if self.telemetry_location is not None:
+            raw = np.zeros(self.frame_shape, dtype=np.uint16)
+        for batch in self._frames():
+            batch = np.ascontiguousarray(batch, dtype=np.uint16)
+            for frame in batch:
+                if self._stop.is_set():
+                    return
+
+                if self.telemetry_location is not None:
+                    if self._ffc_remaining:
+                        self._ffc_remaining -= 1
+                        self.ffc_state = (
+                            FFC_IN_PROGRESS if self._ffc_remaining else FFC_COMPLETE
+                        )
+                    raw[self._image_rows] = frame
+                    encode_telemetry(
+                        raw[self._telemetry_rows][0],
+                        frame_counter=3 * self.frames_sent,
+                        time_counter_ms=int((time.perf_counter() - start) * 1000),
+                        ffc_state=self.ffc_state,
+                    )
+                    frame = raw
+
+                if period:
+                    deadline += period
+                    delay = deadline - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+
+                if self.lossless:
+                    while len(self.frame_buffer) == self.frame_buffer.capacity:
+                        if self._stop.is_set():
+                            return
+                        time.sleep(0.0005)
+
+                self.frame_buffer.push(frame.ctypes.data, frame.nbytes, self.frames_sent)
+                self.frames_sent += 1
+
+
+class SyntheticBackend(_PacedBackend):
+    """
+    Delivers generated Lepton-like frames, for benchmarking without hardware.
+    """
+
+    def __init__(
+        self,
+        frame_shape=(120, 160),
+        buffer_size=32,
+        buffer_policy="drop_newest",
+        rate_hz=8.7,
+        n_frames=None,
+        n_distinct=64,
+        lossless=False,
+        telemetry_location=None,
+    ):
+        """
+        Initializes the SyntheticBackend object.
+
+        Args:
+            frame_shape (tuple, optional): The ``(height, width)`` of a frame. Defaults to (120, 160).
+            buffer_size (int, optional): Number of frames the ring buffer holds. Defaults to 32.
+            buffer_policy (str, optional): What happens when the ring buffer is full, 'drop_newest'
+                or 'drop_oldest'. Defaults to 'drop_newest'.
+            rate_hz (float, optional): Frames delivered per second, None for as fast as possible.
+                Defaults to 8.7.
+            n_frames (int, optional): Number of frames to deliver before stopping. Defaults to
+                None, which streams until stop_streaming.
+            n_distinct (int, optional): Number of distinct frames generated up front and cycled
+                through, so generation does not limit the rate. Defaults to 64.
+            lossless (bool, optional): Whether to wait for room in the ring buffer instead of
+                dropping frames. Defaults to False.
+            telemetry_location (str, optional): 'footer' or 'header' to add two simulated
+                telemetry rows to every frame. Defaults to None.
+        """
+        super().__init__(
+            frame_shape, buffer_size, buffer_policy, rate_hz, lossless, telemetry_location
+        )
+        self.n_frames = n_frames
+        self.pool = synthetic_frames(n_distinct, self.image_shape)
+
+    def _frames(self):
+        remaining = self.n_frames
+        while remaining is None or remaining > 0:
+            batch = self.pool if remaining is None else self.pool[:remaining]
+            yield batch
+            if remaining is not None:
+                remaining -= len(batch)
+
+
+class ReplayBackend(_PacedBackend):
+    """
+    Delivers the frames of an existing ThermalCamera recording.
+    """
+
+    def __init__(
+        self,
+        frame_shape=(120, 160),
+        buffer_size=32,
+        buffer_policy="drop_newest",
+        path=None,
+        rate_hz=8.7,
+        loop=False,
+        lossless=False,
+        telemetry_location=None,
+    ):
+        """
+        Initializes the ReplayBackend object.
+
+        Args:
+            frame_shape (tuple, optional): The ``(height, width)`` of a frame. Defaults to (120, 160).
+            buffer_size (int, optional): Number of frames the ring buffer holds. Defaults to 32.
+            buffer_policy (str, optional): What happens when the ring buffer is full, 'drop_newest'
+                or 'drop_oldest'. Defaults to 'drop_newest'.
+            path (str): The HDF5 recording to replay, in the per-frame or contiguous layout.
+            rate_hz (float, optional): Frames delivered per second, None for as fast as possible.
+                Defaults to 8.7.
+            loop (bool, optional): Whether to start over at the end of the recording. Defaults to False.
+            lossless (bool, optional): Whether to wait for room in the ring buffer instead of
+                dropping frames. Defaults to False.
+            telemetry_location (str, optional): 'footer' or 'header' to add two simulated
+                telemetry rows to every frame. Defaults to None.
+        """
+        if path is None:
+            raise ValueError("The replay backend needs the path of a recording.")
+        super().__init__(
+            frame_shape, buffer_size, buffer_policy, rate_hz, lossless, telemetry_location
+        )
+        self.path = path
+        self.loop = loop
+
+    def _frames(self):
+        while True:
+            yield from iter_recording_frames(self.path)
+            if not self.loop:
+                return
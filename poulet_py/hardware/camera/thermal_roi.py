@@ -0,0 +1,263 @@
+import collections
+import queue
+
+import numpy as np
+
+from poulet_py.hardware.camera.thermal_storage import RAW_OFFSET, RAW_SCALE
+
+ROI_DATASET = "roi_stats"
+ROI_MASKS_DATASET = "roi_masks"
+ROI_STATS = ("mean", "max", "min")
+DEFAULT_ROI_CHUNK = 256
+
+
+class RoiStatistics:
+    """
+    Computes temperature statistics inside regions of interest (ROIs).
+
+    ROIs are rectangles or boolean masks. The pixels of all ROIs are gathered
+    with one fancy index and reduced per ROI with ``np.ufunc.reduceat``, so a
+    stack of frames is processed without a Python loop over frames or ROIs.
+    Frames are expected in centi-Kelvin counts; mean, max and min commute with
+    the linear conversion, which is applied to the statistics only.
+    """
+
+    def __init__(self, frame_shape=(120, 160), stats=ROI_STATS, stream_size=256):
+        """
+        Initializes the RoiStatistics object.
+
+        Args:
+            frame_shape (tuple, optional): The ``(height, width)`` of a frame. Defaults to (120, 160).
+            stats (tuple, optional): The statistics to compute, any of 'mean', 'max' and 'min'.
+                Defaults to all three.
+            stream_size (int, optional): Number of results the live stream keeps for a slow
+                reader, older ones are dropped. Defaults to 256.
+        """
+        for stat in stats:
+            if stat not in ROI_STATS:
+                raise ValueError(f"Invalid ROI statistic '{stat}'. Choose from {ROI_STATS}.")
+
+        self.frame_shape = tuple(frame_shape)
+        self.stats = tuple(stats)
+        self.names = []
+        self.masks = []
+
+        self.stream = queue.Queue(maxsize=stream_size)
+        self.latest = None
+        self.stream_dropped = 0
+
+        self._index = None
+        self._offsets = None
+        self._counts = None
+
+    def __len__(self):
+        return len(self.names)
+
+    def add_rect(self, name, x, y, width, height):
+        """
+        Registers a rectangular ROI.
+
+        Args:
+            name (str): The name of the ROI, e.g. 'paw'.
+            x (int): The left column.
+            y (int): The top row.
+            width (int): The width in pixels.
+            height (int): The height in pixels.
+        """
+        mask = np.zeros(self.frame_shape, dtype=bool)
+        mask[y : y + height, x : x + width] = True
+        self.add_mask(name, mask)
+
+    def add_mask(self, name, mask):
+        """
+        Registers an ROI given as a boolean mask.
+
+        Args:
+            name (str): The name of the ROI.
+            mask (np.ndarray): A boolean array of the frame shape, True inside the ROI.
+        """
+        mask = np.asarray(mask, dtype=bool)
+        if mask.shape != self.frame_shape:
+            raise ValueError(
+                f"The ROI mask has shape {mask.shape}, expected {self.frame_shape}."
+            )
+        if not mask.any():
+            raise ValueError(f"The ROI '{name}' contains no pixels.")
+        if name in self.names:
+            raise ValueError(f"There is already an ROI called '{name}'.")
+
+        self.names.append(name)
+        self.masks.append(mask)
+
+        # flat pixel indices of all ROIs back to back, and where each one starts
+        indices = [np.flatnonzero(m) for m in self.masks]
+        self._counts = np.array([len(i) for i in indices])
+        self._offsets = np.concatenate([[0], np.cumsum(self._counts)[:-1]])
+        self._index = np.concatenate(indices)
+
+    def compute(self, frames, scale=RAW_SCALE, offset=RAW_OFFSET):
+        """
+        Computes the statistics of every ROI for a stack of frames.
+
+        Args:
+            frames (np.ndarray): A ``(k, height, width)`` stack or a single frame.
+            scale (float, optional): Multiplier applied to the statistics. Defaults to 0.01.
+            offset (float, optional): Added after scaling. Defaults to -273.15, so that
+                centi-Kelvin frames give degrees Celsius. Use 1 and 0 for frames that are
+                already in Celsius.
+
+        Returns:
+            np.ndarray: A ``(k, n_roi, n_stats)`` float64 array.
+        """
+        frames = np.asarray(frames)
+        if frames.ndim == 2:
+            frames = frames[np.newaxis]
+        if not self.names:
+            return np.empty((len(frames), 0, len(self.stats)))
+
+        pixels = frames.reshape(len(frames), -1)[:, self._index]
+        result = np.empty((len(frames), len(self.names), len(self.stats)))
+        for i, stat in enumerate(self.stats):
+            if stat == "mean":
+                result[:, :, i] = (
+                    np.add.reduceat(pixels, self._offsets, axis=1, dtype=np.float64)
+                    / self._counts
+                )
+            elif stat == "max":
+                result[:, :, i] = np.maximum.reduceat(pixels, self._offsets, axis=1)
+            else:
+                result[:, :, i] = np.minimum.reduceat(pixels, self._offsets, axis=1)
+
+        result *= scale
+        result += offset
+        return result
+
+    def publish(self, frame_number, timestamp, stats):
+        """
+        Puts a result on the live stream, dropping the oldest one if no one keeps up.
+
+        Args:
+            frame_number (int): The number of the frame.
+            timestamp (float): The capture time of the frame.
+            stats (np.ndarray): The ``(n_roi, n_stats)`` statistics of the frame.
+        """
+        item = (frame_number, timestamp, stats)
+        self.latest = item
+        while True:
+            try:
+                self.stream.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    self.stream.get_nowait()
+                    self.stream_dropped += 1
+                except queue.Empty:
+                    pass
+
+    def iter_stream(self, timeout=None):
+        """
+        Yields the live results as they arrive, until none comes within ``timeout``.
+
+        Args:
+            timeout (float, optional): Seconds to wait for the next result. Defaults to None,
+                which waits forever.
+
+        Yields:
+            tuple: ``(frame_number, timestamp, stats)`` with ``(n_roi, n_stats)`` statistics.
+        """
+        while True:
+            try:
+                yield self.stream.get(timeout=timeout)
+            except queue.Empty:
+                return
+
+    def to_dict(self, stats):
+        """
+        Labels the statistics of one frame.
+
+        Args:
+            stats (np.ndarray): The ``(n_roi, n_stats)`` statistics of a frame.
+
+        Returns:
+            dict: ``{roi: {stat: value}}``.
+        """
+        return {
+            name: dict(zip(self.stats, map(float, row)))
+            for name, row in zip(self.names, stats)
+        }
+
+
+class RoiStatsWriter:
+    """
+    Appends ROI statistics to a resizable ``(N, n_roi, n_stats)`` dataset, one
+    chunk of rows at a time. The ROI masks are stored once in a compressed
+    ``(n_roi, height, width)`` boolean ``roi_masks`` dataset next to it.
+    """
+
+    def __init__(self, hpy_file, roi_statistics, chunk_rows=DEFAULT_ROI_CHUNK):
+        """
+        Initializes the RoiStatsWriter object.
+
+        Args:
+            hpy_file (h5py.File): The open HDF5 file.
+            roi_statistics (RoiStatistics): The ROIs, their names and statistics are stored
+                as attributes of the dataset, their masks in the roi_masks dataset.
+            chunk_rows (int, optional): Frames per chunk and per write. Defaults to 256.
+        """
+        row_shape = (len(roi_statistics), len(roi_statistics.stats))
+        self.dataset = hpy_file.create_dataset(
+            ROI_DATASET,
+            shape=(0,) + row_shape,
+            maxshape=(None,) + row_shape,
+            chunks=(chunk_rows,) + row_shape,
+            dtype=np.float64,
+        )
+        self.dataset.attrs["roi_names"] = list(roi_statistics.names)
+        self.dataset.attrs["stat_names"] = list(roi_statistics.stats)
+        self.dataset.attrs["units"] = "degC"
+        # attributes are limited to 64 KB, a few full-frame masks already exceed it
+        self.masks = hpy_file.create_dataset(
+            ROI_MASKS_DATASET,
+            data=np.stack(roi_statistics.masks),
+            compression="gzip",
+        )
+        self.masks.attrs["roi_names"] = list(roi_statistics.names)
+
+        self._block = collections.deque()
+        self._block_rows = 0
+        self.chunk_rows = chunk_rows
+        self.row_count = 0
+
+    def append(self, stats):
+        """
+        Appends the statistics of one or more frames.
+
+        Args:
+            stats (np.ndarray): ``(n_roi, n_stats)`` or ``(k, n_roi, n_stats)`` statistics.
+        """
+        stats = np.asarray(stats)
+        if stats.ndim == 2:
+            stats = stats[np.newaxis]
+        self._block.append(stats)
+        self._block_rows += len(stats)
+        if self._block_rows >= self.chunk_rows:
+            self.flush()
+
+    def flush(self):
+        """
+        Writes the buffered rows.
+        """
+        if not self._block_rows:
+            return
+        rows = np.concatenate(self._block)
+        self.dataset.resize(self.row_count + len(rows), axis=0)
+        self.dataset[self.row_count :] = rows
+        self.row_count += len(rows)
+        self._block.clear()
+        self._block_rows = 0
+
+    def close(self):
+        """
+        Writes the buffered rows, the file is closed by its owner.
+        """
+        self.flush()
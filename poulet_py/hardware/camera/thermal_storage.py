@@ -0,0 +1,696 @@
+import logging
+import threading
+from queue import Empty, Full, Queue
+
+import numpy as np
+
+FRAMES_DATASET = "frames"
+TIMESTAMPS_DATASET = "timestamps"
+ARRIVAL_DATASET = "arrival_ns"
+SEQUENCE_DATASET = "sequence"
+
+# Stored when a frame has no arrival time or sequence number
+UNKNOWN = -1
+
+DEFAULT_CHUNK_FRAMES = 16
+DEFAULT_TIMESTAMP_CHUNK = 1024
+
+# Lepton radiometric counts are centi-Kelvin: celsius = raw * scale + offset
+RAW_SCALE = 0.01
+RAW_OFFSET = -273.15
+
+
+def kelvin_to_celsius(data, out=None):
+    """
+    Converts Lepton centi-Kelvin counts to degrees Celsius.
+
+    Args:
+        data (np.ndarray): A frame or a stack of frames in centi-Kelvin.
+        out (np.ndarray, optional): A preallocated float array to write the result into.
+            Defaults to None, which allocates a new array.
+
+    Returns:
+        np.ndarray: The data in degrees Celsius.
+    """
+    # subtract in floating point, uint16 counts below 0 °C would wrap around
+    if out is None:
+        return (np.asarray(data, dtype=np.float64) - 27315) / 100
+    np.subtract(data, 27315, out=out, dtype=out.dtype)
+    out /= 100
+    return out
+
+
+def celsius_to_kelvin(data):
+    """
+    Converts degrees Celsius back to Lepton centi-Kelvin counts.
+
+    Frames recorded in Celsius came from integer counts, so rounding recovers
+    them exactly.
+
+    Args:
+        data (np.ndarray): A frame or a stack of frames in degrees Celsius.
+
+    Returns:
+        np.ndarray: The data as uint16 centi-Kelvin counts.
+    """
+    counts = np.asarray(data, dtype=np.float64) * 100 + 27315
+    return np.round(counts, out=counts).astype(np.uint16)
+
+
+def compression_kwargs(compression=None, compression_level=None, shuffle=False):
+    """
+    Builds the ``create_dataset`` keyword arguments for a compression filter.
+
+    'blosc' and 'lz4' are third-party HDF5 filters and need the optional
+    ``hdf5plugin`` package; 'gzip' and 'lzf' ship with h5py.
+
+    Args:
+        compression (str, optional): None, 'gzip', 'lzf', 'blosc' (Blosc with LZ4) or 'lz4'.
+            Defaults to None.
+        compression_level (int, optional): The gzip level (0-9, default 4) or the Blosc level
+            (0-9, default 5). Ignored by 'lzf' and 'lz4'. Defaults to None.
+        shuffle (bool, optional): Whether to apply the byte shuffle filter before compressing.
+            Defaults to False.
+
+    Returns:
+        dict: The keyword arguments for ``h5py.Group.create_dataset``.
+    """
+    if compression is None:
+        return {}
+    if compression == "gzip":
+        level = 4 if compression_level is None else int(compression_level)
+        return {"compression": "gzip", "compression_opts": level, "shuffle": shuffle}
+    if compression == "lzf":
+        return {"compression": "lzf", "shuffle": shuffle}
+    if compression in ("blosc", "lz4"):
+        try:
+            import hdf5plugin
+        except ImportError as err:
+            raise ImportError(
+                f"The '{compression}' compression requires the 'hdf5plugin' package."
+            ) from err
+        if compression == "blosc":
+            level = 5 if compression_level is None else int(compression_level)
+            blosc_shuffle = (
+                hdf5plugin.Blosc.SHUFFLE if shuffle else hdf5plugin.Blosc.NOSHUFFLE
+            )
+            return dict(hdf5plugin.Blosc(cname="lz4", clevel=level, shuffle=blosc_shuffle))
+        return dict(hdf5plugin.LZ4(), shuffle=shuffle)
+
+    raise ValueError(
+        "Invalid compression. Choose None, 'gzip', 'lzf', 'blosc' or 'lz4'."
+    )
+
+
+def write_calibration_attrs(obj, storage):
+    """
+    Records how stored values map to degrees Celsius on an HDF5 file or dataset.
+
+    Args:
+        obj (h5py.File | h5py.Dataset): The object to annotate.
+        storage (str): 'celsius' for values already in Celsius, 'raw' for centi-Kelvin counts.
+    """
+    if storage == "raw":
+        scale, offset = RAW_SCALE, RAW_OFFSET
+    elif storage == "celsius":
+        scale, offset = 1.0, 0.0
+    else:
+        raise ValueError("Invalid storage. Choose 'celsius' or 'raw'.")
+
+    obj.attrs["storage"] = storage
+    obj.attrs["scale"] = scale
+    obj.attrs["offset"] = offset
+    obj.attrs["units"] = "degC"
+
+
+class CalibratedFrames:
+    """
+    A lazy view returning stored thermal frames in degrees Celsius.
+
+    Slicing reads only the requested frames from disk and converts them in
+    one vectorized step to float32 using the ``scale``/``offset`` attributes
+    written at recording time.
+    """
+
+    def __init__(self, dataset, scale=None, offset=None):
+        """
+        Initializes the CalibratedFrames object.
+
+        Args:
+            dataset (h5py.Dataset): A ``(N, height, width)`` frames dataset.
+            scale (float, optional): Multiplier from stored values to Celsius. Defaults to the
+                dataset's or file's 'scale' attribute, or 1.
+            offset (float, optional): Offset added after scaling. Defaults to the dataset's or
+                file's 'offset' attribute, or 0.
+        """
+        self.dataset = dataset
+        attrs = dataset.attrs if "scale" in dataset.attrs else dataset.file.attrs
+        self.scale = float(attrs.get("scale", 1.0) if scale is None else scale)
+        self.offset = float(attrs.get("offset", 0.0) if offset is None else offset)
+
+    def __len__(self):
+        return self.dataset.shape[0]
+
+    @property
+    def shape(self):
+        return self.dataset.shape
+
+    def __getitem__(self, key):
+        return self.to_celsius(self.dataset[key])
+
+    def to_celsius(self, data):
+        """
+        Converts stored values to Celsius as float32.
+
+        Args:
+            data (np.ndarray): Values as read from the dataset.
+
+        Returns:
+            np.ndarray: The values in degrees Celsius.
+        """
+        celsius = np.asarray(data, dtype=np.float32)
+        if self.scale != 1.0:
+            celsius = np.multiply(celsius, np.float32(self.scale), out=celsius)
+        if self.offset != 0.0:
+            celsius = np.add(celsius, np.float32(self.offset), out=celsius)
+        return celsius
+
+    def iter_batches(self, batch_size=None, start=0, stop=None):
+        """
+        Iterates over the frames in batches converted to Celsius.
+
+        Args:
+            batch_size (int, optional): Frames per batch. Defaults to the dataset's chunk length.
+            start (int, optional): The first frame. Defaults to 0.
+            stop (int, optional): One past the last frame. Defaults to the number of frames.
+
+        Yields:
+            tuple: The index of the first frame in the batch and the ``(k, height, width)``
+                float32 batch.
+        """
+        if batch_size is None:
+            chunks = self.dataset.chunks
+            batch_size = chunks[0] if chunks else DEFAULT_CHUNK_FRAMES
+        stop = len(self) if stop is None else min(stop, len(self))
+        for index in range(start, stop, batch_size):
+            yield index, self[index : min(index + batch_size, stop)]
+
+
+class PerFrameWriter:
+    """
+    Writes every frame into its own ``frame{n}`` / ``time{n}`` dataset pair.
+
+    This is the original layout produced by ``ThermalCamera.capture_frame``.
+    """
+
+    layout = "per_frame"
+
+    def __init__(self, hpy_file, dtype=None, storage="celsius", compression=None):
+        """
+        Initializes the PerFrameWriter object.
+
+        Args:
+            hpy_file (h5py.File): The open HDF5 file to write into.
+            dtype (np.dtype, optional): The data type of the stored frames. Defaults to the
+                type of the frames passed in.
+            storage (str, optional): 'celsius' or 'raw', recorded as calibration attributes.
+                Defaults to 'celsius'.
+            compression (dict, optional): Filter arguments from ``compression_kwargs`` applied to
+                every frame dataset. Defaults to None.
+        """
+        self.hpy_file = hpy_file
+        self.dtype = dtype
+        self.compression = compression or {}
+        self.frame_count = 0
+        write_calibration_attrs(hpy_file, storage)
+
+    def append(self, frame, timestamp, arrival_ns=None, sequence=None):
+        """
+        Writes a single frame and its timestamp.
+
+        Args:
+            frame (np.ndarray): The 2-D frame to store.
+            timestamp (float): The time of the frame relative to the recording start.
+            arrival_ns (int, optional): The ``perf_counter_ns`` arrival time of the frame,
+                stored as an attribute of the frame dataset. Defaults to None.
+            sequence (int, optional): The driver's frame sequence number, stored as an
+                attribute of the frame dataset. Defaults to None.
+        """
+        frame_number = self.frame_count + 1
+        dataset = self.hpy_file.create_dataset(
+            f"frame{frame_number}", data=frame, dtype=self.dtype, **self.compression
+        )
+        if arrival_ns is not None and arrival_ns != UNKNOWN:
+            dataset.attrs[ARRIVAL_DATASET] = arrival_ns
+        if sequence is not None and sequence != UNKNOWN:
+            dataset.attrs[SEQUENCE_DATASET] = sequence
+        self.hpy_file.create_dataset(f"time{frame_number}", data=[timestamp])
+        self.frame_count = frame_number
+
+    def append_batch(self, frames, timestamps, arrival_ns=None, sequence=None):
+        """
+        Writes a stack of frames and their timestamps.
+
+        Args:
+            frames (np.ndarray): The ``(k, height, width)`` frames to store.
+            timestamps (np.ndarray): The ``k`` timestamps of the frames.
+            arrival_ns (np.ndarray, optional): The ``k`` arrival times. Defaults to None.
+            sequence (np.ndarray, optional): The ``k`` sequence numbers. Defaults to None.
+        """
+        for i, (frame, timestamp) in enumerate(zip(frames, timestamps)):
+            self.append(
+                frame,
+                timestamp,
+                None if arrival_ns is None else int(arrival_ns[i]),
+                None if sequence is None else int(sequence[i]),
+            )
+
+    def flush(self):
+        """
+        Flushes the HDF5 file buffers to disk.
+        """
+        self.hpy_file.flush()
+
+    def close(self):
+        """
+        Finalises the recording. The file itself is closed by the caller.
+        """
+        self.flush()
+
+
+class ContiguousFrameWriter:
+    """
+    Appends frames into one resizable, chunked ``(N, height, width)`` dataset
+    and their timestamps into a 1-D dataset next to it.
+
+    Frames are collected in a preallocated block of one chunk and written to
+    disk a whole chunk at a time. The datasets grow according to the growth
+    policy and are trimmed to the number of recorded frames on ``close``.
+
+    Next to the timestamps, the ``perf_counter_ns`` arrival time and the
+    driver's sequence number of every frame are stored in the int64
+    ``arrival_ns`` and ``sequence`` datasets, -1 where unknown.
+    """
+
+    layout = "contiguous"
+
+    def __init__(
+        self,
+        hpy_file,
+        frame_shape,
+        dtype=np.float64,
+        chunk_shape=None,
+        growth_policy="linear",
+        growth_frames=None,
+        expected_frames=0,
+        storage="celsius",
+        compression=None,
+    ):
+        """
+        Initializes the ContiguousFrameWriter object.
+
+        Args:
+            hpy_file (h5py.File): The open HDF5 file, or a group of it, to write into.
+            frame_shape (tuple): The ``(height, width)`` of a single frame.
+            dtype (np.dtype, optional): The data type of the stored frames. Defaults to float64.
+            chunk_shape (tuple, optional): The HDF5 chunk shape ``(frames, height, width)``.
+                Defaults to ``(16, height, width)``.
+            growth_policy (str, optional): How the datasets grow once full. 'linear' adds
+                ``growth_frames`` frames, 'double' doubles the current size. Defaults to 'linear'.
+            growth_frames (int, optional): Number of frames added per linear growth step, and the
+                minimum growth for 'double'. Defaults to eight chunks.
+            expected_frames (int, optional): Number of frames to preallocate up front. Defaults to 0.
+            storage (str, optional): 'celsius' or 'raw', recorded as calibration attributes.
+                Defaults to 'celsius'.
+            compression (dict, optional): Filter arguments from ``compression_kwargs`` applied to
+                the frames dataset. Defaults to None.
+        """
+        height, width = frame_shape
+        if chunk_shape is None:
+            chunk_shape = (DEFAULT_CHUNK_FRAMES, height, width)
+        chunk_shape = tuple(int(n) for n in chunk_shape)
+        if (
+            len(chunk_shape) != 3
+            or chunk_shape[0] < 1
+            or not 0 < chunk_shape[1] <= height
+            or not 0 < chunk_shape[2] <= width
+        ):
+            raise ValueError(
+                f"Invalid chunk shape {chunk_shape} for frames of shape {(height, width)}."
+            )
+        if growth_policy not in ("linear", "double"):
+            raise ValueError("Invalid growth policy. Choose 'linear' or 'double'.")
+
+        self.hpy_file = hpy_file
+        self.frame_shape = (height, width)
+        self.chunk_shape = chunk_shape
+        self.chunk_frames = chunk_shape[0]
+        self.growth_policy = growth_policy
+        self.growth_frames = int(growth_frames or 8 * self.chunk_frames)
+
+        initial_frames = self._round_to_chunk(int(expected_frames))
+        self.frames = hpy_file.create_dataset(
+            FRAMES_DATASET,
+            shape=(initial_frames, height, width),
+            maxshape=(None, height, width),
+            chunks=chunk_shape,
+            dtype=dtype,
+            **(compression or {}),
+        )
+        self.timestamps = hpy_file.create_dataset(
+            TIMESTAMPS_DATASET,
+            shape=(initial_frames,),
+            maxshape=(None,),
+            chunks=(DEFAULT_TIMESTAMP_CHUNK,),
+            dtype=np.float64,
+        )
+        self.arrival_ns = hpy_file.create_dataset(
+            ARRIVAL_DATASET,
+            shape=(initial_frames,),
+            maxshape=(None,),
+            chunks=(DEFAULT_TIMESTAMP_CHUNK,),
+            dtype=np.int64,
+            fillvalue=UNKNOWN,
+        )
+        self.arrival_ns.attrs["clock"] = "time.perf_counter_ns"
+        self.sequence = hpy_file.create_dataset(
+            SEQUENCE_DATASET,
+            shape=(initial_frames,),
+            maxshape=(None,),
+            chunks=(DEFAULT_TIMESTAMP_CHUNK,),
+            dtype=np.int64,
+            fillvalue=UNKNOWN,
+        )
+        self.frames.attrs["frame_count"] = 0
+        hpy_file.attrs["layout"] = self.layout
+        write_calibration_attrs(self.frames, storage)
+        write_calibration_attrs(hpy_file, storage)
+
+        self._block = np.empty((self.chunk_frames, height, width), dtype=dtype)
+        self._block_times = np.empty(self.chunk_frames, dtype=np.float64)
+        self._block_arrival = np.full(self.chunk_frames, UNKNOWN, dtype=np.int64)
+        self._block_sequence = np.full(self.chunk_frames, UNKNOWN, dtype=np.int64)
+        self._pending = 0
+        self._written = 0
+
+    @property
+    def frame_count(self):
+        """
+        The number of frames appended so far, including those not yet flushed.
+        """
+        return self._written + self._pending
+
+    def append(self, frame, timestamp, arrival_ns=None, sequence=None):
+        """
+        Appends a single frame and its timestamp.
+
+        Args:
+            frame (np.ndarray): The 2-D frame to store.
+            timestamp (float): The time of the frame relative to the recording start.
+            arrival_ns (int, optional): The ``perf_counter_ns`` arrival time of the frame.
+                Defaults to None.
+            sequence (int, optional): The driver's frame sequence number. Defaults to None.
+        """
+        self._block[self._pending] = frame
+        self._block_times[self._pending] = timestamp
+        self._block_arrival[self._pending] = UNKNOWN if arrival_ns is None else arrival_ns
+        self._block_sequence[self._pending] = UNKNOWN if sequence is None else sequence
+        self._pending += 1
+        if self._pending == self.chunk_frames:
+            self.flush()
+
+    def append_batch(self, frames, timestamps, arrival_ns=None, sequence=None):
+        """
+        Appends a stack of frames and their timestamps.
+
+        Args:
+            frames (np.ndarray): The ``(k, height, width)`` frames to store.
+            timestamps (np.ndarray): The ``k`` timestamps of the frames.
+            arrival_ns (np.ndarray, optional): The ``k`` arrival times. Defaults to None.
+            sequence (np.ndarray, optional): The ``k`` sequence numbers. Defaults to None.
+        """
+        start = 0
+        n_frames = len(frames)
+        while start < n_frames:
+            stop = min(n_frames, start + self.chunk_frames - self._pending)
+            count = stop - start
+            block = slice(self._pending, self._pending + count)
+            self._block[block] = frames[start:stop]
+            self._block_times[block] = timestamps[start:stop]
+            self._block_arrival[block] = (
+                UNKNOWN if arrival_ns is None else arrival_ns[start:stop]
+            )
+            self._block_sequence[block] = (
+                UNKNOWN if sequence is None else sequence[start:stop]
+            )
+            self._pending += count
+            if self._pending == self.chunk_frames:
+                self.flush()
+            start = stop
+
+    def flush(self):
+        """
+        Writes the pending frames to the datasets and flushes the file.
+        """
+        if self._pending == 0:
+            return
+
+        start = self._written
+        stop = start + self._pending
+        self._reserve(stop)
+        self.frames[start:stop] = self._block[: self._pending]
+        self.timestamps[start:stop] = self._block_times[: self._pending]
+        self.arrival_ns[start:stop] = self._block_arrival[: self._pending]
+        self.sequence[start:stop] = self._block_sequence[: self._pending]
+        self.frames.attrs["frame_count"] = stop
+
+        self._written = stop
+        self._pending = 0
+        # hpy_file may also be a group of the file
+        self.hpy_file.file.flush()
+
+    def close(self):
+        """
+        Flushes the pending frames and trims the datasets to the recorded length.
+        """
+        self.flush()
+        for dataset in (self.frames, self.timestamps, self.arrival_ns, self.sequence):
+            dataset.resize(self._written, axis=0)
+
+    def _reserve(self, n_frames):
+        """
+        Grows the datasets so that they can hold at least ``n_frames`` frames.
+        """
+        size = self.frames.shape[0]
+        if n_frames <= size:
+            return
+
+        if self.growth_policy == "double":
+            new_size = max(2 * size, size + self.growth_frames)
+        else:
+            new_size = size + self.growth_frames
+        new_size = self._round_to_chunk(max(new_size, n_frames))
+
+        for dataset in (self.frames, self.timestamps, self.arrival_ns, self.sequence):
+            dataset.resize(new_size, axis=0)
+
+    def _round_to_chunk(self, n_frames):
+        """
+        Rounds a number of frames up to a whole number of chunks.
+        """
+        return -(-n_frames // self.chunk_frames) * self.chunk_frames
+
+
+class BackgroundFrameWriter:
+    """
+    Hands frames to a frame writer running on a dedicated thread.
+
+    The acquisition side only enqueues frames into a bounded queue. The writer
+    thread drains the queue in batches, applies ``transform`` to the whole
+    batch at once and appends it to the wrapped writer. When the queue is full
+    the backpressure policy decides what happens:
+
+    - 'block': the caller waits until the writer has made room.
+    - 'drop_newest': the incoming frame is discarded.
+    - 'drop_oldest': the oldest queued frame is discarded to make room.
+    """
+
+    layout = None
+
+    def __init__(
+        self,
+        frame_writer,
+        transform=None,
+        queue_size=256,
+        batch_size=16,
+        policy="block",
+    ):
+        """
+        Initializes the BackgroundFrameWriter object and starts the writer thread.
+
+        Args:
+            frame_writer (PerFrameWriter | ContiguousFrameWriter): The writer that stores the frames.
+            transform (function, optional): A vectorized function applied to each
+                ``(k, height, width)`` batch before it is written. Defaults to None.
+            queue_size (int, optional): Maximum number of frames waiting to be written. Defaults to 256.
+            batch_size (int, optional): Maximum number of frames written per batch. Defaults to 16.
+            policy (str, optional): Backpressure policy, 'block', 'drop_newest' or 'drop_oldest'.
+                Defaults to 'block'.
+        """
+        if policy not in ("block", "drop_newest", "drop_oldest"):
+            raise ValueError(
+                "Invalid policy. Choose 'block', 'drop_newest' or 'drop_oldest'."
+            )
+
+        self.frame_writer = frame_writer
+        self.layout = frame_writer.layout
+        self.transform = transform
+        self.batch_size = int(batch_size)
+        self.policy = policy
+        self.dropped_frames = 0
+        # the positions in append order of the dropped frames, see frames_appended
+        self.dropped_tickets = []
+        self.frames_appended = 0
+        self.error = None
+
+        # frames are dropped by the acquisition thread and, after an error, the writer thread
+        self._drop_lock = threading.Lock()
+        self._queue = Queue(int(queue_size))
+        self._stop = object()
+        self._thread = threading.Thread(
+            target=self._run, name="thermal-frame-writer", daemon=True
+        )
+        self._thread.start()
+
+    @property
+    def frame_count(self):
+        """
+        The number of frames handed to the wrapped writer so far.
+        """
+        return self.frame_writer.frame_count
+
+    @property
+    def queue_depth(self):
+        """
+        The number of frames currently waiting to be written.
+        """
+        return self._queue.qsize()
+
+    def append(self, frame, timestamp, arrival_ns=None, sequence=None):
+        """
+        Enqueues a copy of a frame and its timestamp for writing.
+
+        Args:
+            frame (np.ndarray): The 2-D frame to store.
+            timestamp (float): The time of the frame relative to the recording start.
+            arrival_ns (int, optional): The ``perf_counter_ns`` arrival time of the frame.
+                Defaults to None.
+            sequence (int, optional): The driver's frame sequence number. Defaults to None.
+
+        Returns:
+            bool: Whether the frame was enqueued.
+
+        Raises:
+            RuntimeError: If the writer thread has stopped because of an error.
+        """
+        if self.error is not None:
+            raise RuntimeError(f"Frame writer thread failed: {self.error}")
+
+        item = (
+            np.array(frame, copy=True),
+            timestamp,
+            UNKNOWN if arrival_ns is None else arrival_ns,
+            UNKNOWN if sequence is None else sequence,
+            self.frames_appended,
+        )
+        self.frames_appended += 1
+        if self.policy == "block":
+            self._queue.put(item)
+            return True
+
+        try:
+            self._queue.put_nowait(item)
+            return True
+        except Full:
+            pass
+
+        if self.policy == "drop_oldest":
+            try:
+                self._count_dropped([self._queue.get_nowait()])
+                self._queue.task_done()
+            except Empty:
+                pass
+            try:
+                self._queue.put_nowait(item)
+                return True
+            except Full:
+                pass
+
+        self._count_dropped([item])
+        return False
+
+    def flush(self):
+        """
+        Blocks until every enqueued frame has been handed to the wrapped writer,
+        then flushes it.
+        """
+        self._queue.join()
+        self.frame_writer.flush()
+
+    def close(self):
+        """
+        Writes the remaining frames, stops the writer thread and closes the wrapped writer.
+        """
+        if self._thread.is_alive():
+            self._queue.put(self._stop)
+            self._thread.join()
+        self.frame_writer.close()
+
+    def _count_dropped(self, items):
+        """
+        Counts discarded queue items, from either thread.
+        """
+        with self._drop_lock:
+            self.dropped_frames += len(items)
+            self.dropped_tickets.extend(item[-1] for item in items)
+
+    def _run(self):
+        """
+        Writer thread loop: drains the queue in batches until the stop marker arrives.
+        After a write error the remaining frames are discarded so producers never block.
+        """
+        running = True
+        while running:
+            items = [self._queue.get()]
+            while len(items) < self.batch_size:
+                try:
+                    items.append(self._queue.get_nowait())
+                except Empty:
+                    break
+
+            n_items = len(items)
+            if items[-1] is self._stop:
+                items.pop()
+                running = False
+
+            try:
+                if items and self.error is None:
+                    frames, timestamps, arrival_ns, sequence, _ = zip(*items)
+                    frames = np.stack(frames)
+                    if self.transform is not None:
+                        frames = self.transform(frames)
+                    self.frame_writer.append_batch(
+                        frames,
+                        np.array(timestamps),
+                        np.array(arrival_ns, dtype=np.int64),
+                        np.array(sequence, dtype=np.int64),
+                    )
+                elif items:
+                    self._count_dropped(items)
+            except Exception as e:
+                self.error = e
+                self._count_dropped(items)
+                logging.error(e)
+            finally:
+                for _ in range(n_items):
+                    self._queue.task_done()
@@ -0,0 +1,243 @@
+import numpy as np
+
+TELEMETRY_GROUP = "telemetry"
+TELEMETRY_ROWS = 2
+DEFAULT_TELEMETRY_CHUNK = 256
+
+# Word offsets in telemetry row A, see the Lepton engineering datasheet
+REVISION_WORD = 0
+TIME_COUNTER_WORDS = (1, 2)
+STATUS_WORDS = (3, 4)
+FRAME_COUNTER_WORDS = (20, 21)
+FPA_TEMP_WORD = 24
+HOUSING_TEMP_WORD = 26
+
+# Status bits
+FFC_DESIRED_BIT = 3
+FFC_STATE_SHIFT = 4
+FFC_STATE_MASK = 0b11
+
+FFC_NEVER_COMMANDED = 0
+FFC_IMMINENT = 1
+FFC_IN_PROGRESS = 2
+FFC_COMPLETE = 3
+
+TELEMETRY_FIELDS = (
+    "frame_counter",
+    "time_counter_ms",
+    "status",
+    "ffc_state",
+    "ffc_desired",
+    "fpa_temp",
+    "housing_temp",
+)
+
+
+def telemetry_rows(frame_height, location="footer"):
+    """
+    Returns the row slices of the image and of the telemetry in a raw frame.
+
+    Args:
+        frame_height (int): The number of rows of the raw frame, image plus telemetry.
+        location (str, optional): 'footer' or 'header'. Defaults to 'footer'.
+
+    Returns:
+        tuple: The ``(image, telemetry)`` row slices.
+    """
+    if location == "footer":
+        split = frame_height - TELEMETRY_ROWS
+        return slice(0, split), slice(split, frame_height)
+    if location == "header":
+        return slice(TELEMETRY_ROWS, frame_height), slice(0, TELEMETRY_ROWS)
+    raise ValueError("Invalid telemetry location. Choose 'footer' or 'header'.")
+
+
+def _combine_words(words, offsets):
+    """
+    Combines two 16-bit words, least significant first, into a 32-bit value.
+    """
+    low, high = offsets
+    return words[..., low].astype(np.uint32) | (
+        words[..., high].astype(np.uint32) << 16
+    )
+
+
+def parse_telemetry(row_a):
+    """
+    Parses telemetry row A of one or more frames, vectorized over frames.
+
+    Args:
+        row_a (np.ndarray): A ``(width,)`` row or a ``(k, width)`` stack of rows of
+            uint16 telemetry words.
+
+    Returns:
+        dict: Arrays of ``frame_counter``, ``time_counter_ms``, ``status``, ``ffc_state``
+            (0 never commanded, 1 imminent, 2 in progress, 3 complete), ``ffc_desired``,
+            and the ``fpa_temp`` and ``housing_temp`` in degrees Celsius.
+    """
+    words = np.asarray(row_a, dtype=np.uint16)
+    status = _combine_words(words, STATUS_WORDS)
+    return {
+        "frame_counter": _combine_words(words, FRAME_COUNTER_WORDS),
+        "time_counter_ms": _combine_words(words, TIME_COUNTER_WORDS),
+        "status": status,
+        "ffc_state": ((status >> FFC_STATE_SHIFT) & FFC_STATE_MASK).astype(np.uint8),
+        "ffc_desired": ((status >> FFC_DESIRED_BIT) & 1).astype(bool),
+        "fpa_temp": words[..., FPA_TEMP_WORD] / 100 - 273.15,
+        "housing_temp": words[..., HOUSING_TEMP_WORD] / 100 - 273.15,
+    }
+
+
+def encode_telemetry(
+    row_a, frame_counter, time_counter_ms=0, ffc_state=FFC_COMPLETE, fpa_kelvin100=30015
+):
+    """
+    Writes the parsed fields back into telemetry row A, for simulated cameras.
+
+    Args:
+        row_a (np.ndarray): The uint16 row to fill in place.
+        frame_counter (int): The frame counter.
+        time_counter_ms (int, optional): Milliseconds since the camera started. Defaults to 0.
+        ffc_state (int, optional): The FFC state. Defaults to complete.
+        fpa_kelvin100 (int, optional): The FPA temperature in centi-Kelvin. Defaults to 30015.
+    """
+    status = (ffc_state & FFC_STATE_MASK) << FFC_STATE_SHIFT
+    for offsets, value in (
+        (FRAME_COUNTER_WORDS, frame_counter),
+        (TIME_COUNTER_WORDS, time_counter_ms),
+        (STATUS_WORDS, status),
+    ):
+        row_a[offsets[0]] = value & 0xFFFF
+        row_a[offsets[1]] = (value >> 16) & 0xFFFF
+    row_a[FPA_TEMP_WORD] = fpa_kelvin100
+    row_a[HOUSING_TEMP_WORD] = fpa_kelvin100
+
+
+def missing_frames(frame_counter, step=None):
+    """
+    Counts the frames missing between consecutive telemetry frame counters.
+
+    The Lepton counts frames at its internal rate, so consecutive exported frames
+    differ by a constant step (3 at 8.7 Hz). Larger gaps are missing frames.
+
+    Args:
+        frame_counter (np.ndarray): The frame counters of the recorded frames.
+        step (int, optional): The counter step between consecutive frames. Defaults to
+            the most common step.
+
+    Returns:
+        np.ndarray: For every frame, how many frames are missing right before it.
+    """
+    frame_counter = np.asarray(frame_counter, dtype=np.int64)
+    missing = np.zeros(len(frame_counter), dtype=np.int64)
+    if len(frame_counter) < 2:
+        return missing
+    diff = np.diff(frame_counter)
+    if step is None:
+        values, counts = np.unique(diff[diff > 0], return_counts=True)
+        step = int(values[np.argmax(counts)]) if len(values) else 1
+    missing[1:] = np.maximum(diff // step - 1, 0)
+    return missing
+
+
+def ffc_frames(ffc_state):
+    """
+    Marks the frames captured while a flat field correction was imminent or running.
+
+    Args:
+        ffc_state (np.ndarray): The FFC states of the frames.
+
+    Returns:
+        np.ndarray: A boolean mask, True for frames to exclude.
+    """
+    ffc_state = np.asarray(ffc_state)
+    return (ffc_state == FFC_IMMINENT) | (ffc_state == FFC_IN_PROGRESS)
+
+
+class TelemetryWriter:
+    """
+    Stores the telemetry of every frame in a ``telemetry`` group: the raw row A
+    words and the parsed fields, one resizable dataset each.
+
+    Rows are collected in a block and parsed and written a chunk at a time.
+    """
+
+    def __init__(self, hpy_file, width=160, chunk_rows=DEFAULT_TELEMETRY_CHUNK):
+        """
+        Initializes the TelemetryWriter object.
+
+        Args:
+            hpy_file (h5py.File): The open HDF5 file.
+            width (int, optional): The number of words per telemetry row. Defaults to 160.
+            chunk_rows (int, optional): Frames per chunk and per write. Defaults to 256.
+        """
+        self.group = hpy_file.create_group(TELEMETRY_GROUP)
+        self.chunk_rows = int(chunk_rows)
+        self.row_count = 0
+        self.frames_missing = 0
+        self._last_counter = None
+
+        self.datasets = {
+            "row_a": self.group.create_dataset(
+                "row_a",
+                shape=(0, width),
+                maxshape=(None, width),
+                chunks=(self.chunk_rows, width),
+                dtype=np.uint16,
+            )
+        }
+        sample = parse_telemetry(np.zeros((1, width), dtype=np.uint16))
+        for field in TELEMETRY_FIELDS:
+            self.datasets[field] = self.group.create_dataset(
+                field,
+                shape=(0,),
+                maxshape=(None,),
+                chunks=(self.chunk_rows,),
+                dtype=sample[field].dtype,
+            )
+        self.datasets["fpa_temp"].attrs["units"] = "degC"
+        self.datasets["housing_temp"].attrs["units"] = "degC"
+
+        self._block = np.empty((self.chunk_rows, width), dtype=np.uint16)
+        self._pending = 0
+
+    def append(self, row_a):
+        """
+        Appends telemetry row A of one frame.
+
+        Args:
+            row_a (np.ndarray): The uint16 telemetry row.
+        """
+        self._block[self._pending] = row_a
+        self._pending += 1
+        if self._pending == self.chunk_rows:
+            self.flush()
+
+    def flush(self):
+        """
+        Parses and writes the buffered rows.
+        """
+        if not self._pending:
+            return
+        rows = self._block[: self._pending]
+        fields = parse_telemetry(rows)
+
+        counters = fields["frame_counter"].astype(np.int64)
+        if self._last_counter is not None:
+            counters = np.concatenate([[self._last_counter], counters])
+        self.frames_missing += int(missing_frames(counters).sum())
+        self._last_counter = int(counters[-1])
+
+        start, stop = self.row_count, self.row_count + self._pending
+        for name, dataset in self.datasets.items():
+            dataset.resize(stop, axis=0)
+            dataset[start:stop] = rows if name == "row_a" else fields[name]
+        self.group.attrs["frames_missing"] = self.frames_missing
+        self.row_count = stop
+        self._pending = 0
+
+    def close(self):
+        """
+        Writes the buffered rows, the file is closed by its owner.
+        """
+        self.flush()
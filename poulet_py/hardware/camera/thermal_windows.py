@@ -0,0 +1,170 @@
+import os
+import platform
+import signal
+import sys
+import time
+
+import clr
+import numpy as np
+import pythoncom
+
+from poulet_py.hardware.camera.frame_buffer import FrameRingBuffer
+
+folder = "x64" if platform.architecture()[0] == "64bit" else "x86"
+path = os.path.sep.join(__file__.split(os.path.sep)[:-1])
+sys.path.append(os.path.sep.join([path, folder]))
+clr.AddReference("LeptonUVC")
+clr.AddReference("ManagedIR16Filters")
+
+from Lepton import CCI
+from IR16Filters import IR16Capture, NewBytesFrameEvent
+
+
+def handle_exit(sig, frame):
+    print("Exiting and cleaning up...")
+    pythoncom.CoUninitialize()
+
+
+class CameraWindows:
+    """
+    Streams a PureThermal board through the Lepton .NET SDK (Windows).
+    """
+
+    def __init__(
+        self, frame_shape=(120, 160), buffer_size=32, buffer_policy="drop_newest"
+    ):
+        """
+        Initializes the CameraWindows object.
+
+        Args:
+            frame_shape (tuple, optional): The ``(height, width)`` of a frame. Defaults to (120, 160).
+            buffer_size (int, optional): Number of frames the ring buffer holds. Defaults to 32.
+            buffer_policy (str, optional): What happens when the ring buffer is full, 'drop_newest'
+                or 'drop_oldest'. Defaults to 'drop_newest'.
+        """
+        self.frame_buffer = FrameRingBuffer(
+            buffer_size, frame_shape, policy=buffer_policy
+        )
+        self.frame_shape = tuple(frame_shape)
+        self.bad_frames = 0
+        self.latest_frame = None
+        self.CCI = CCI
+        self.IR16Capture = IR16Capture
+        self.NewBytesFrameEvent = NewBytesFrameEvent
+        self.device = None
+        self.reader = None
+
+    def add_frame(self, array, width, height):
+        """
+        Add a new frame to the buffer of read data.
+
+        The SDK calls this on its own thread, where an exception silently stops the
+        stream, so a frame of the wrong size is counted in ``bad_frames`` and dropped.
+        """
+        if (height, width) != self.frame_shape or len(array) != height * width:
+            self.bad_frames += 1
+            self.frame_buffer.drop()
+            return
+        img = np.fromiter(array, dtype="uint16").reshape(height, width)  # parse
+        self.latest_frame = img  # update the last reading
+        self.frame_buffer.put(img)
+
+    def initialise_camera(self):
+        """
+        Initialize the camera and start capturing frames.
+        """
+        # Initialize COM
+        pythoncom.CoInitialize()
+
+        # Register signal handlers for clean exit
+        signal.signal(signal.SIGINT, handle_exit)
+        signal.signal(signal.SIGTERM, handle_exit)
+
+        devices = []
+        for i in self.CCI.GetDevices():
+            if i.Name.startswith("PureThermal"):
+                devices.append(i)
+
+        if len(devices) > 1:
+            print("Multiple Pure Thermal devices have been found.\n")
+            for i, d in enumerate(devices):
+                print("{}. {}".format(i, d))
+            while True:
+                idx = input("Select the index of the required device: ")
+                try:
+                    idx = int(idx)
+                    if idx in range(len(devices)):
+                        self.device = devices[idx]
+                        break
+                except ValueError:
+                    print("Unrecognized input value.\n")
+
+        elif len(devices) == 1:
+            self.device = devices[0]
+
+        else:
+            self.device = None
+
+        txt = "No devices called 'PureThermal' have been found."
+        assert self.device is not None, txt
+        self.device = self.device.Open()
+        self.device.sys.RunFFCNormalization()
+
+        self.device.sys.SetGainMode(self.CCI.Sys.GainMode.HIGH)
+
+        self.reader = self.IR16Capture()
+        callback = self.NewBytesFrameEvent(self.add_frame)
+        self.reader.SetupGraphWithBytesCallback(callback)
+
+    def start_streaming(self):
+        """
+        Start capturing frames, initialising the camera first if needed.
+        """
+        if self.reader is None:
+            self.initialise_camera()
+            time.sleep(1)
+        self.reader.RunGraph()
+
+    def set_shutter_manual(self):
+        """
+        Set the shutter mode to manual.
+        """
+        new_shutter_mode_obj = self.device.sys.GetFfcShutterModeObj()
+        new_shutter_mode_obj.shutterMode = self.CCI.Sys.FfcShutterMode.MANUAL
+
+        self.device.sys.SetFfcShutterModeObj(new_shutter_mode_obj)
+
+    def perform_manualff(self):
+        """
+        Perform a manual flat field correction.
+        """
+        self.device.sys.RunFFCNormalization()
+
+    def perform_manual_ffc(self):
+        """
+        Perform a manual flat field correction.
+        """
+        self.perform_manualff()
+
+    def stop_streaming(self):
+        """
+        Stop capturing frames.
+        """
+        self.reader.StopGraph()
+        handle_exit(None, None)
+
+    def get_frame(self, timeout=None, out=None):
+        """
+        Removes the oldest frame from the ring buffer.
+
+        Args:
+            timeout (float, optional): Maximum number of seconds to wait. Defaults to None.
+            out (np.ndarray, optional): A preallocated array to copy the frame into. Defaults to None.
+
+        Returns:
+            np.ndarray: The frame in centi-Kelvin counts.
+
+        Raises:
+            queue.Empty: If no frame arrives in time.
+        """
+        return self.frame_buffer.get(True, timeout, out=out)
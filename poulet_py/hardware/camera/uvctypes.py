@@ -519,3 +519,45 @@ def set_gain_auto(devh):
         devh, SYS_UNIT_ID, controlID, byref(gain_mode), sizeData
     )  # set_extension_unit(devh, unit, control, data, size)
     perform_manual_ffc(devh)
+
+
+TELEMETRY_LOCATION_HEADER = 0
+TELEMETRY_LOCATION_FOOTER = 1
+
+
+def set_telemetry_location(devh, location=TELEMETRY_LOCATION_FOOTER):
+    """
+    Puts the two telemetry rows before (header) or after (footer) the image rows.
+    """
+    sizeData = 4
+    telemetry_location = (c_uint32)(location)  # 0=HEADER, 1=FOOTER
+    setTelemetryLocationSDK = 0x1C
+    controlID = (setTelemetryLocationSDK >> 2) + 1  # formula from Kurt Kiefer
+    print("controlID: " + str(controlID))
+    set_extension_unit(
+        devh, SYS_UNIT_ID, controlID, byref(telemetry_location), sizeData
+    )  # set_extension_unit(devh, unit, control, data, size)
+
+
+def set_telemetry(devh, enable=True):
+    """
+    Enables or disables the Lepton telemetry rows, which make Y16 frames 122 rows high.
+    """
+    sizeData = 4
+    telemetry_enable = (c_uint32)(1 if enable else 0)  # 0=DISABLED, 1=ENABLED
+    setTelemetrySDK = 0x18
+    controlID = (setTelemetrySDK >> 2) + 1  # formula from Kurt Kiefer
+    print("controlID: " + str(controlID))
+    set_extension_unit(
+        devh, SYS_UNIT_ID, controlID, byref(telemetry_enable), sizeData
+    )  # set_extension_unit(devh, unit, control, data, size)
+
+
+def enable_telemetry(devh, location=TELEMETRY_LOCATION_FOOTER):
+    set_telemetry_location(devh, location)
+    set_telemetry(devh, True)
+    print("TELEMETRY " + ("HEADER" if location == TELEMETRY_LOCATION_HEADER else "FOOTER"))
+
+
+def disable_telemetry(devh):
+    set_telemetry(devh, False)
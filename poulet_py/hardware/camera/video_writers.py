@@ -0,0 +1,306 @@
+import os
+import subprocess
+
+import cv2
+import numpy as np
+
+VIDEO_WRITERS = ("opencv", "ffmpeg")
+
+# OpenCV fourcc per container when none is given
+DEFAULT_FOURCC = {"mp4": "mp4v", "avi": "MJPG", "mkv": "XVID"}
+
+# Codecs that take the x264-style -preset and -crf options
+X26X_CODECS = ("libx264", "libx265")
+
+
+class VideoWriter:
+    """
+    Base class of the video writers: frames are written one at a time and
+    ``release`` finishes the file, like ``cv2.VideoWriter``.
+
+    With ``segment_frames`` the video is split into files of that many frames,
+    named ``<name>_000.<ext>``, ``<name>_001.<ext>`` and so on, so a long
+    recording is never lost to a single corrupt file. Subclasses implement
+    ``_open``, ``_write`` and ``_close`` for one file.
+    """
+
+    def __init__(self, path, fps, frame_size, is_color=True, segment_frames=None):
+        """
+        Initializes the VideoWriter object.
+
+        Args:
+            path (str): The output file.
+            fps (float): The frame rate stored in the file.
+            frame_size (tuple): The ``(width, height)`` of the frames.
+            is_color (bool, optional): Whether frames are BGR, otherwise single-channel.
+                Defaults to True.
+            segment_frames (int, optional): Frames per file. Defaults to None, one file.
+        """
+        if segment_frames is not None and int(segment_frames) < 1:
+            raise ValueError("segment_frames must be at least 1.")
+        self.path = path
+        self.fps = fps
+        self.frame_size = tuple(int(n) for n in frame_size)
+        self.is_color = is_color
+        self.segment_frames = None if segment_frames is None else int(segment_frames)
+        self.frames_written = 0
+        self.paths = []
+        self._segment_written = 0
+        self._open_segment()
+
+    def _open_segment(self):
+        """
+        Opens the file of the next segment.
+        """
+        if self.segment_frames is None:
+            path = self.path
+        else:
+            base, extension = os.path.splitext(self.path)
+            path = f"{base}_{len(self.paths):03d}{extension}"
+        self._open(path)
+        self.paths.append(path)
+        self._segment_written = 0
+
+    def write(self, frame):
+        """
+        Writes one frame, starting a new segment when the current one is full.
+
+        Args:
+            frame (np.ndarray): A uint8 ``(height, width, 3)`` BGR frame, or ``(height, width)``
+                if the writer is not in colour.
+        """
+        if self._segment_written == self.segment_frames:
+            self._close()
+            self._open_segment()
+        self._write(frame)
+        self._segment_written += 1
+        self.frames_written += 1
+
+    def release(self):
+        """
+        Finishes the current file.
+        """
+        self._close()
+
+    def _open(self, path):
+        raise NotImplementedError
+
+    def _write(self, frame):
+        raise NotImplementedError
+
+    def _close(self):
+        raise NotImplementedError
+
+
+class OpenCVVideoWriter(VideoWriter):
+    """
+    Writes through ``cv2.VideoWriter`` with a fourcc code, MP4V for '.mp4' files
+    by default.
+    """
+
+    def __init__(
+        self, path, fps, frame_size, is_color=True, segment_frames=None, fourcc=None
+    ):
+        """
+        Initializes the OpenCVVideoWriter object.
+
+        Args:
+            fourcc (str, optional): The four character codec code. Defaults to one matching the
+                file extension, see DEFAULT_FOURCC.
+            Other arguments: see VideoWriter.
+        """
+        extension = os.path.splitext(path)[1].lstrip(".").lower()
+        self.fourcc = fourcc or DEFAULT_FOURCC.get(extension, "mp4v")
+        self._writer = None
+        super().__init__(path, fps, frame_size, is_color, segment_frames)
+
+    def _open(self, path):
+        self._writer = cv2.VideoWriter(
+            path,
+            cv2.VideoWriter_fourcc(*self.fourcc),
+            self.fps,
+            self.frame_size,
+            isColor=self.is_color,
+        )
+        if not self._writer.isOpened():
+            raise RuntimeError(
+                f"OpenCV cannot write {path} with fourcc '{self.fourcc}'."
+            )
+
+    def _write(self, frame):
+        self._writer.write(frame)
+
+    def _close(self):
+        if self._writer is not None:
+            self._writer.release()
+            self._writer = None
+
+
+class FfmpegVideoWriter(VideoWriter):
+    """
+    Pipes raw frames into an ``ffmpeg`` process, which encodes them with any of
+    its codecs, e.g. 'libx264' with a preset and CRF, or 'ffv1' for lossless
+    video. The encoder runs in its own process and on its own threads, so
+    only the copy into the pipe costs time in the writing thread.
+
+    ffmpeg's messages go to ``<file>.ffmpeg.log`` next to each file, so a
+    full stderr pipe can never block the writing thread.
+    """
+
+    def __init__(
+        self,
+        path,
+        fps,
+        frame_size,
+        is_color=True,
+        segment_frames=None,
+        codec="libx264",
+        preset="veryfast",
+        crf=18,
+        threads=0,
+        pix_fmt=None,
+        extra_args=(),
+        ffmpeg="ffmpeg",
+    ):
+        """
+        Initializes the FfmpegVideoWriter object.
+
+        Args:
+            codec (str, optional): The ffmpeg video codec. Defaults to 'libx264'.
+            preset (str, optional): The x264/x265 preset, faster presets use less CPU for
+                larger files. Defaults to 'veryfast'.
+            crf (int, optional): The x264/x265 constant rate factor, lower is better quality,
+                0 is lossless. Defaults to 18.
+            threads (int, optional): Encoder threads, 0 lets ffmpeg choose. Defaults to 0.
+            pix_fmt (str, optional): The pixel format of the encoded video. Defaults to
+                'yuv420p' for x264/x265, which every player decodes, and to the input format
+                otherwise, so e.g. ffv1 keeps the frames exactly.
+            extra_args (tuple, optional): More ffmpeg output options. Defaults to ().
+            ffmpeg (str, optional): The ffmpeg executable. Defaults to 'ffmpeg'.
+            Other arguments: see VideoWriter.
+        """
+        self.codec = codec
+        self.preset = preset
+        self.crf = crf
+        self.threads = threads
+        self.input_pix_fmt = "bgr24" if is_color else "gray"
+        if pix_fmt is None:
+            pix_fmt = "yuv420p" if codec in X26X_CODECS else self.input_pix_fmt
+        self.pix_fmt = pix_fmt
+        self.extra_args = list(extra_args)
+        self.ffmpeg = ffmpeg
+        self._process = None
+        self._log = None
+        self._log_path = None
+        self.error = None
+        super().__init__(path, fps, frame_size, is_color, segment_frames)
+
+    def command(self, path):
+        """
+        Returns:
+            list: The ffmpeg command line writing one file.
+        """
+        width, height = self.frame_size
+        command = [self.ffmpeg, "-y", "-loglevel", "error"]
+        # raw frames on stdin
+        command += ["-f", "rawvideo", "-pix_fmt", self.input_pix_fmt]
+        command += ["-s", f"{width}x{height}", "-framerate", str(self.fps), "-i", "-"]
+        command += ["-c:v", self.codec]
+        if self.codec in X26X_CODECS:
+            if self.preset is not None:
+                command += ["-preset", self.preset]
+            if self.crf is not None:
+                command += ["-crf", str(self.crf)]
+        command += ["-threads", str(self.threads), "-pix_fmt", self.pix_fmt]
+        return command + self.extra_args + [path]
+
+    def _open(self, path):
+        self._log_path = f"{path}.ffmpeg.log"
+        self._log = open(self._log_path, "wb")
+        try:
+            self._process = subprocess.Popen(
+                self.command(path),
+                stdin=subprocess.PIPE,
+                stdout=subprocess.DEVNULL,
+                stderr=self._log,
+            )
+        except FileNotFoundError as err:
+            self._log.close()
+            raise RuntimeError(
+                f"'{self.ffmpeg}' was not found, install ffmpeg or pass its path."
+            ) from err
+
+    def _write(self, frame):
+        if self.error is not None:
+            raise RuntimeError(
+                f"ffmpeg stopped, no more frames are written: {self.error}"
+            )
+        try:
+            self._process.stdin.write(memoryview(np.ascontiguousarray(frame)).cast("B"))
+        except BrokenPipeError as err:
+            # ffmpeg stopped, its log says why
+            try:
+                self._close()
+            except RuntimeError as close_error:
+                self.error = close_error
+            else:
+                self.error = RuntimeError("ffmpeg closed its input.")
+            raise self.error from err
+
+    def _close(self):
+        if self._process is None:
+            return
+        process, self._process = self._process, None
+        try:
+            process.stdin.close()
+        except BrokenPipeError:
+            pass
+        returncode = process.wait()
+        self._log.close()
+        if returncode != 0:
+            with open(self._log_path, errors="replace") as f:
+                message = f.read().strip()
+            raise RuntimeError(f"ffmpeg failed with code {returncode}: {message}")
+        if os.path.getsize(self._log_path) == 0:
+            os.remove(self._log_path)
+
+
+def open_video_writer(
+    path,
+    fps,
+    frame_size,
+    is_color=True,
+    writer="opencv",
+    segment_frames=None,
+    **options,
+):
+    """
+    Opens a video writer.
+
+    Args:
+        path (str): The output file, its extension sets the container.
+        fps (float): The frame rate stored in the file.
+        frame_size (tuple): The ``(width, height)`` of the frames.
+        is_color (bool, optional): Whether frames are BGR. Defaults to True.
+        writer (str, optional): 'opencv' or 'ffmpeg'. Defaults to 'opencv'.
+        segment_frames (int, optional): Frames per file. Defaults to None, one file.
+        **options: Passed on to the writer, e.g. fourcc for OpenCV or codec, preset, crf and
+            threads for ffmpeg.
+
+    Returns:
+        VideoWriter: The open writer.
+    """
+    if writer == "opencv":
+        writer_class = OpenCVVideoWriter
+    elif writer == "ffmpeg":
+        writer_class = FfmpegVideoWriter
+    else:
+        raise ValueError(f"Invalid video writer. Choose from {VIDEO_WRITERS}.")
+    return writer_class(
+        path,
+        fps,
+        frame_size,
+        is_color=is_color,
+        segment_frames=segment_frames,
+        **options,
+    )
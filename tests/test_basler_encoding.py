@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+basler_encoding = pytest.importorskip("poulet_py.hardware.camera.basler_encoding")
+
+
+@pytest.mark.parametrize(
+    "pixel_format, bits",
+    [
+        ("Mono8", 8),
+        ("Mono10", 10),
+        ("Mono10p", 10),
+        ("Mono12p", 12),
+        ("Mono12Packed", 12),
+        ("Mono16", 16),
+        ("BayerRG12p", 12),
+        ("RGB8", 8),
+        ("RGB8Packed", 8),
+        ("BGR8", 8),
+    ],
+)
+def test_pixel_bit_depth(pixel_format, bits):
+    assert basler_encoding.pixel_bit_depth(pixel_format) == bits
+
+
+@pytest.mark.parametrize("pixel_format", ["YUV422_8", "YCbCr422_8", "Mono14x", "Coord3D_C16"])
+def test_unsupported_pixel_formats_are_rejected(pixel_format):
+    with pytest.raises(ValueError, match="Unsupported pixel format"):
+        basler_encoding.FrameConverter(pixel_format)
+
+
+@pytest.mark.parametrize(
+    "pixel_format, red_offset",
+    [("BayerRG8", (0, 0)), ("BayerGR8", (0, 1)), ("BayerGB8", (1, 0)), ("BayerBG8", (1, 1))],
+)
+def test_bayer_frames_are_demosaiced(pixel_format, red_offset):
+    # a red scene: only the red sites of the mosaic are lit
+    mosaic = np.zeros((8, 8), dtype=np.uint8)
+    mosaic[red_offset[0] :: 2, red_offset[1] :: 2] = 200
+
+    bgr = basler_encoding.FrameConverter(pixel_format)(mosaic)
+
+    assert bgr.shape == (8, 8, 3)
+    blue, green, red = bgr[2:6, 2:6].reshape(-1, 3).mean(axis=0)
+    assert red > 150 and green < 50 and blue < 50
+
+
+def test_mono_frames_are_passed_through():
+    frame = np.arange(12, dtype=np.uint8).reshape(3, 4)
+    assert basler_encoding.FrameConverter("Mono8")(frame) is frame
+    frame16 = frame.astype(np.uint16) << 4
+    np.testing.assert_array_equal(basler_encoding.FrameConverter("Mono12")(frame16), frame)
@@ -0,0 +1,142 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+pytest.importorskip("pypylon")
+basler_pipeline = pytest.importorskip("poulet_py.hardware.camera.basler_pipeline")
+
+
+class FakeGrabResult:
+    def __init__(self, block_id):
+        self.BlockID = block_id
+        self.TimeStamp = 1000 * block_id
+        self.Array = np.full((4, 6), block_id % 256, dtype=np.uint8)
+
+    def IsValid(self):
+        return True
+
+    def GrabSucceeded(self):
+        return True
+
+    def Release(self):
+        pass
+
+
+class FakeBaslerCamera:
+    """Delivers n_frames frames, then times out like RetrieveResult does."""
+
+    def __init__(self, n_frames=None):
+        self.n_frames = n_frames
+        self.block_id = 0
+
+    def RetrieveResult(self, timeout_ms, timeout_handling):
+        if self.n_frames is not None and self.block_id >= self.n_frames:
+            time.sleep(0.001)
+            return None
+        self.block_id += 1
+        return FakeGrabResult(self.block_id)
+
+
+class FakeWriter:
+    def __init__(self, fail_at=None):
+        self.frames = []
+        self.fail_at = fail_at
+        self.blocked = threading.Event()
+        self.blocked.set()
+
+    def write(self, image):
+        self.blocked.wait()
+        if len(self.frames) == self.fail_at:
+            raise OSError("disk full")
+        self.frames.append(int(image[0, 0]))
+
+
+class FakeCamera:
+    def __init__(self, n_frames=None, writer=None, copy=True):
+        self.basler_camera = FakeBaslerCamera(n_frames)
+        self.out = writer or FakeWriter()
+        self.start_time = time.time()
+        self.frame_number = 1
+        self.block_ids = []
+        self.copy = copy
+
+    def _convert_frame(self, frame):
+        return frame.copy() if self.copy else frame
+
+    def save_timestamp(self, timestamp, camera_tick, block_id):
+        self.block_ids.append(block_id)
+
+
+def wait_for(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def test_frames_are_written_in_grab_order():
+    camera = FakeCamera(n_frames=300)
+    pipeline = basler_pipeline.GrabPipeline(camera, n_encoders=4, pool_size=8)
+    pipeline.start()
+    wait_for(lambda: pipeline.frames_grabbed == 300)
+    pipeline.stop()
+
+    written = pipeline.frames_encoded + pipeline.dropped_frames
+    assert written == 300
+    assert camera.block_ids == sorted(camera.block_ids)
+    assert camera.out.frames == [block_id % 256 for block_id in camera.block_ids]
+    assert camera.frame_number == 1 + pipeline.frames_encoded
+    assert pipeline.stats()["error"] is None
+
+
+def test_drop_newest_drops_frames_while_the_pool_is_full():
+    writer = FakeWriter()
+    writer.blocked.clear()
+    # the written frame shares the slot memory, so a slot stays in use until written
+    camera = FakeCamera(n_frames=10, writer=writer, copy=False)
+    pipeline = basler_pipeline.GrabPipeline(camera, pool_size=2)
+    pipeline.start()
+    wait_for(lambda: pipeline.frames_grabbed == 10)
+    writer.blocked.set()
+    pipeline.stop()
+
+    assert writer.frames == [1, 2]
+    assert camera.block_ids == [1, 2]
+    stats = pipeline.stats()
+    assert stats["frames_encoded"] == 2
+    assert stats["dropped_frames"] == 8
+
+
+def test_block_policy_keeps_every_frame():
+    writer = FakeWriter()
+    writer.blocked.clear()
+    camera = FakeCamera(n_frames=10, writer=writer, copy=False)
+    pipeline = basler_pipeline.GrabPipeline(camera, pool_size=2, policy="block")
+    pipeline.start()
+    time.sleep(0.05)
+    assert pipeline.frames_grabbed < 10
+    writer.blocked.set()
+    wait_for(lambda: pipeline.frames_grabbed == 10)
+    pipeline.stop()
+
+    assert writer.frames == list(range(1, 11))
+    assert pipeline.dropped_frames == 0
+
+
+def test_write_error_stops_the_pipeline_and_is_raised(capsys):
+    camera = FakeCamera(writer=FakeWriter(fail_at=3))
+    pipeline = basler_pipeline.GrabPipeline(camera, n_encoders=2, pool_size=4)
+    pipeline.start()
+    # the grab thread stops by itself after the failed write
+    pipeline._grab_thread.join(10)
+    assert not pipeline._grab_thread.is_alive()
+
+    with pytest.raises(OSError, match="disk full"):
+        pipeline.stop()
+    assert camera.out.frames == [1, 2, 3]
+    stats = pipeline.stats()
+    assert stats["frames_encoded"] == 3
+    assert "disk full" in stats["error"]
+    assert capsys.readouterr().out.count("Grab pipeline") == 1
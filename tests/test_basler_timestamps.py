@@ -0,0 +1,33 @@
+import csv
+
+import numpy as np
+import pytest
+
+h5py = pytest.importorskip("h5py")
+basler_timestamps = pytest.importorskip("poulet_py.hardware.camera.basler_timestamps")
+
+
+def log_rows(csv_path, binary, start, stop):
+    log = basler_timestamps.TimestampLog(str(csv_path), binary=binary, block_rows=4)
+    for i in range(start, stop):
+        log.append(i / 10, camera_tick=i * 100, frame_id=i)
+    log.close()
+
+
+@pytest.mark.parametrize("binary", ["npy", "hdf5"])
+def test_reopened_log_appends_to_csv_and_binary_column(tmp_path, binary):
+    csv_path = tmp_path / "camera_timestamps.csv"
+    log_rows(csv_path, binary, 0, 6)
+    log_rows(csv_path, binary, 6, 15)
+
+    with open(csv_path, newline="") as f:
+        csv_times = [float(row[0]) for row in list(csv.reader(f))[1:]]
+    if binary == "npy":
+        rows = np.load(tmp_path / "camera_timestamps.npy")
+        frame_ids, times = rows["frame_id"], rows["host_time"]
+    else:
+        with h5py.File(tmp_path / "camera_timestamps.hdf5", "r") as f:
+            frame_ids, times = f["frame_id"][:], f["host_time"][:]
+
+    np.testing.assert_array_equal(frame_ids, np.arange(15))
+    np.testing.assert_allclose(times, csv_times)
@@ -0,0 +1,223 @@
+import itertools
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pytest
+
+h5py = pytest.importorskip("h5py")
+thermal_camera = pytest.importorskip("poulet_py.hardware.camera.thermal_camera")
+thermal_duplicates = pytest.importorskip("poulet_py.hardware.camera.thermal_duplicates")
+thermal_processing = pytest.importorskip("poulet_py.hardware.camera.thermal_processing")
+thermal_recording = pytest.importorskip("poulet_py.hardware.camera.thermal_recording")
+
+
+def repeat_every_third_frame(backend):
+    """Makes the backend deliver every third frame again, like the USB stream does."""
+    get_frame = backend.get_frame
+    counter = itertools.count()
+    last = {}
+
+    def get_frame_with_repeats(timeout=None, out=None):
+        if next(counter) % 3 == 2 and "frame" in last:
+            out[...] = last["frame"]
+            return out
+        frame = get_frame(timeout, out=out)
+        last["frame"] = frame.copy()
+        return frame
+
+    backend.get_frame = get_frame_with_repeats
+
+
+@pytest.mark.parametrize("layout", ["contiguous", "per_frame"])
+def test_frame_index_with_elided_duplicates_and_averaged_frames_only(tmp_path, layout):
+    camera = thermal_camera.ThermalCamera(
+        backend="synthetic", backend_options={"rate_hz": None}
+    )
+    camera.set_output_file(
+        str(tmp_path), "index", layout=layout, storage="raw", elide_duplicates=True
+    )
+    camera.set_denoising(window=4, downsample=4, keep_raw=False)
+    camera.start_streaming()
+    camera.set_timer(time.time())
+    camera.create_hdf5_file()
+    repeat_every_third_frame(camera.backend)
+    for _ in range(30):
+        camera.capture_frame()
+    camera.stop_streaming()
+
+    path = tmp_path / "thermal-camera_index.hdf5"
+    with thermal_recording.ThermalRecording(str(path), celsius=False) as rec:
+        index = rec.frame_index
+        assert len(index) == 30
+        # 20 new frames, one averaged frame every 4
+        assert len(rec) == 5
+        stored = index[index != -1]
+        assert stored.min() == 0 and stored.max() == len(rec) - 1
+        assert np.all(np.diff(stored) >= 0)
+        # every averaged frame stands for 4 new frames and their repeats
+        assert np.array_equal(np.bincount(stored), [6] * 5)
+        assert np.all(index[2::3] == index[1::3])
+
+
+def test_frame_index_skips_dropped_frames(tmp_path):
+    with h5py.File(tmp_path / "index.hdf5", "w") as f:
+        writer = thermal_duplicates.FrameIndexWriter(f, chunk_rows=4)
+        # positions in append order, 2 and 5 were dropped by the writer
+        for position in range(8):
+            writer.append(position)
+            if position == 3:
+                writer.append_duplicate()
+        writer.close(dropped=[5, 2])
+        index = f[thermal_duplicates.FRAME_INDEX_DATASET][:]
+
+    np.testing.assert_array_equal(index, [0, 1, -1, 2, 2, 3, -1, 4, 5])
+    assert writer.duplicates == 1
+
+
+def test_schedule_ffc_fails_if_the_shutter_stays_automatic():
+    camera = thermal_camera.ThermalCamera(
+        backend="synthetic", backend_options={"rate_hz": None}
+    )
+    camera.start_streaming()
+
+    def fail():
+        raise OSError("device busy")
+
+    camera.backend.set_shutter_manual = fail
+    with pytest.raises(RuntimeError, match="manual FFC"):
+        camera.schedule_ffc()
+    assert not camera.shutter_manual
+    assert camera.ffc_scheduler is None
+    camera.stop_streaming()
+
+
+def test_importing_thermal_camera_does_not_load_the_basler_dependencies():
+    code = (
+        "import sys\n"
+        "import poulet_py.hardware.camera.thermal_camera\n"
+        "print(sorted({'pypylon', 'cv2', 'pytcsii'} & set(sys.modules)))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip() == "[]"
+
+
+def test_grab_data_func_converts_frames_below_zero(tmp_path):
+    camera = thermal_camera.ThermalCamera(
+        backend="synthetic", backend_options={"rate_hz": None}
+    )
+    camera.set_output_file(str(tmp_path), "cold")
+    camera.start_streaming()
+    camera.set_timer(time.time())
+    camera.create_hdf5_file()
+    camera.backend.get_frame = lambda timeout=None, out=None: np.full(
+        (120, 160), 26315, dtype=np.uint16
+    )
+    seen = []
+
+    def record(thermal_image_data, **kwargs):
+        seen.append(thermal_image_data.copy())
+        return True
+
+    camera.grab_data_func(record)
+    camera.stop_streaming()
+
+    np.testing.assert_allclose(seen[0], -10.0)
+
+
+def frame_mean(frame, frame_number, timestamp):
+    """Analysis function of the processor tests, run in a worker process."""
+    return frame_number, timestamp, float(frame.mean())
+
+
+def slow_frame_mean(frame, frame_number, timestamp):
+    time.sleep(0.2)
+    return frame_mean(frame, frame_number, timestamp)
+
+
+def test_processor_returns_results_in_frame_order(tmp_path):
+    camera = thermal_camera.ThermalCamera(
+        backend="synthetic", backend_options={"rate_hz": None}
+    )
+    camera.set_output_file(str(tmp_path), "processed")
+    camera.start_streaming()
+    camera.set_timer(time.time())
+    camera.create_hdf5_file()
+    processor = thermal_processing.FrameProcessor(frame_mean, n_workers=2, max_lag=4)
+    means = {}
+    ready = []
+
+    def record(thermal_image_data, frame_number, results, **kwargs):
+        means[frame_number] = float(thermal_image_data.mean())
+        ready.extend(results)
+        return len(means) == 40
+
+    camera.grab_data_func(record, processor=processor)
+    camera.stop_streaming()
+    results = ready + processor.collect(timeout=None)
+    stats = processor.stats()
+    processor.close()
+
+    numbers = [number for number, _, _ in results]
+    assert numbers == sorted(numbers) and len(set(numbers)) == len(numbers)
+    for number, timestamp, (worker_number, worker_timestamp, mean) in results:
+        assert (worker_number, worker_timestamp) == (number, timestamp)
+        assert mean == pytest.approx(means[number])
+    assert stats["processor_frames_submitted"] + stats["processor_frames_skipped"] == 40
+    assert stats["processor_frames_processed"] == len(results)
+    assert len(results) == stats["processor_frames_submitted"]
+    assert stats["processor_lag_frames"] == 0
+    assert (
+        camera.processor_stats["processor_frames_skipped"]
+        == (stats["processor_frames_skipped"])
+    )
+
+
+def test_processor_skips_frames_beyond_max_lag():
+    processor = thermal_processing.FrameProcessor(
+        slow_frame_mean, frame_shape=(4, 5), n_workers=1, max_lag=2
+    )
+    frames = np.arange(5 * 20, dtype=np.float64).reshape(5, 4, 5)
+    submitted = [processor.submit(frames[i], i, 0.1 * i) for i in range(5)]
+
+    assert submitted == [True, True, False, False, False]
+    assert processor.lag == 2
+    assert processor.lag_seconds == pytest.approx(0.1)
+    assert processor.collect() == []
+
+    results = processor.collect(timeout=None)
+    assert [result for _, _, result in results] == [
+        (0, 0.0, float(frames[0].mean())),
+        (1, 0.1, float(frames[1].mean())),
+    ]
+    # both slots are free again once their frames are processed
+    deadline = time.monotonic() + 5
+    while len(processor._free_slots) < 2:
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+    assert processor.submit(frames[4], 5, 0.5)
+    assert processor.collect(timeout=None)[0][2] == (5, 0.5, float(frames[4].mean()))
+
+    stats = processor.stats()
+    assert stats["processor_frames_submitted"] == 3
+    assert stats["processor_frames_skipped"] == 3
+    assert stats["processor_frames_processed"] == 3
+    assert stats["processor_max_lag_seen"] == 2
+    processor.close()
+
+
+def test_processor_close_frees_the_shared_memory():
+    processor = thermal_processing.FrameProcessor(
+        slow_frame_mean, frame_shape=(4, 5), n_workers=1, max_lag=3
+    )
+    name = processor._shm.name
+    for i in range(3):
+        assert processor.submit(np.zeros((4, 5)), i, 0.0)
+    processor.close(wait=False)
+
+    assert processor.lag == 0
+    with pytest.raises(FileNotFoundError):
+        thermal_processing.shared_memory.SharedMemory(name=name)
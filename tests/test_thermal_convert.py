@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+h5py = pytest.importorskip("h5py")
+thermal_convert = pytest.importorskip("poulet_py.hardware.camera.thermal_convert")
+
+
+def write_per_frame_recording(path, n_frames=3):
+    with h5py.File(path, "w") as f:
+        for n in range(1, n_frames + 1):
+            f.create_dataset(f"frame{n}", data=np.full((4, 5), 20.0 + n))
+            f.create_dataset(f"time{n}", data=[n / 10])
+
+
+def test_refuses_to_convert_a_recording_onto_itself(tmp_path):
+    source = tmp_path / "thermal-camera_a.hdf5"
+    write_per_frame_recording(source)
+    before = source.read_bytes()
+
+    with pytest.raises(ValueError, match="overwritten"):
+        thermal_convert.convert_recordings([str(source)], str(tmp_path), workers=1)
+    with pytest.raises(SystemExit):
+        thermal_convert.main([str(source), "--output-dir", str(tmp_path)])
+    with pytest.raises(ValueError):
+        thermal_convert.convert_recording(str(source), str(source), allow_mismatch=True)
+    assert source.read_bytes() == before
+
+
+def test_converts_into_another_directory(tmp_path):
+    source = tmp_path / "thermal-camera_a.hdf5"
+    write_per_frame_recording(source)
+
+    results = thermal_convert.convert_recordings(
+        [str(source)], str(tmp_path / "converted"), workers=1
+    )
+
+    assert [result["status"] for result in results] == ["converted"]
+    with h5py.File(tmp_path / "converted" / source.name, "r") as f:
+        assert f["frames"].shape == (3, 4, 5)
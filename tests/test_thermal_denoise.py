@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+
+thermal_denoise = pytest.importorskip("poulet_py.hardware.camera.thermal_denoise")
+
+SHAPE = (3, 4)
+
+
+def constant(value):
+    return np.full(SHAPE, value, dtype=np.uint16)
+
+
+def step_input(n_before, n_after, low=29000, high=30000):
+    return [constant(low)] * n_before + [constant(high)] * n_after
+
+
+@pytest.mark.parametrize("mode", ["mean", "ema"])
+def test_constant_input_is_unchanged(mode):
+    denoise = thermal_denoise.TemporalFilter(SHAPE, mode=mode, window=4)
+    for _ in range(10):
+        out = denoise.update(constant(29815))
+        np.testing.assert_array_equal(out, 29815)
+    np.testing.assert_array_equal(denoise.counts(), 29815)
+    assert denoise.counts().dtype == np.uint16
+
+
+def test_mean_averages_the_last_window_frames():
+    denoise = thermal_denoise.TemporalFilter(SHAPE, mode="mean", window=4)
+    frames = step_input(6, 6)
+    means = [float(denoise.update(frame)[0, 0]) for frame in frames]
+
+    expected = [
+        np.mean([f[0, 0] for f in frames[max(i - 3, 0) : i + 1]])
+        for i in range(len(frames))
+    ]
+    np.testing.assert_allclose(means, expected)
+    # one frame into the step the window holds 1 of 4 new frames
+    assert means[6] == 29250
+    # the window is all new frames 4 frames after the step
+    assert means[9:] == [30000] * 3
+
+
+def test_ema_follows_its_recurrence():
+    alpha = 0.25
+    denoise = thermal_denoise.TemporalFilter(SHAPE, mode="ema", alpha=alpha)
+    frames = step_input(3, 8)
+    outputs = [float(denoise.update(frame)[0, 0]) for frame in frames]
+
+    state = 29000.0
+    expected = []
+    for frame in frames:
+        state += alpha * (float(frame[0, 0]) - state)
+        expected.append(state)
+    np.testing.assert_allclose(outputs, expected, rtol=1e-6)
+    assert outputs[2] == 29000
+    assert outputs[3] == pytest.approx(29250)
+    assert 29000 < outputs[-1] < 30000
+
+
+def test_ema_default_alpha_uses_the_window_span():
+    denoise = thermal_denoise.TemporalFilter(SHAPE, mode="ema", window=7)
+    assert denoise.alpha == pytest.approx(0.25)
+
+
+@pytest.mark.parametrize("mode", ["mean", "ema"])
+def test_downsample_returns_every_nth_average(mode):
+    denoise = thermal_denoise.TemporalFilter(SHAPE, mode=mode, window=4, downsample=3)
+    outputs = [denoise.update(frame) for frame in step_input(5, 5)]
+
+    returned = [i for i, out in enumerate(outputs) if out is not None]
+    assert returned == [2, 5, 8]
+    assert denoise.frames_seen == 10
+    assert denoise.frames_out == 3
+    assert denoise.to_dict()["frames_out"] == 3
+
+
+def test_reset_forgets_the_window():
+    denoise = thermal_denoise.TemporalFilter(SHAPE, mode="mean", window=4)
+    for frame in step_input(4, 0):
+        denoise.update(frame)
+    denoise.reset()
+
+    np.testing.assert_array_equal(denoise.update(constant(30000)), 30000)
+    assert denoise.frames_seen == 1
+
+
+def test_invalid_settings_are_rejected():
+    with pytest.raises(ValueError):
+        thermal_denoise.TemporalFilter(SHAPE, mode="median")
+    with pytest.raises(ValueError):
+        thermal_denoise.TemporalFilter(SHAPE, downsample=0)
+    with pytest.raises(ValueError):
+        thermal_denoise.TemporalFilter(SHAPE, mode="ema", alpha=1.5)
@@ -0,0 +1,109 @@
+import time
+
+import pytest
+
+thermal_ffc = pytest.importorskip("poulet_py.hardware.camera.thermal_ffc")
+
+
+class FakeCamera:
+    def __init__(self, manual_ok=True):
+        self.manual_ok = manual_ok
+        self.shutter_manual = False
+        self.ffc_calls = 0
+        self.start_perf_counter_ns = time.perf_counter_ns()
+
+    def set_shutter_manual(self):
+        self.shutter_manual = self.manual_ok
+        return self.manual_ok
+
+    def perform_manual_ffc(self):
+        self.ffc_calls += 1
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+def make_scheduler(camera, **kwargs):
+    options = {"max_interval_s": 0.1, "min_interval_s": 0.05, "settle_s": 0}
+    options.update(kwargs)
+    return thermal_ffc.FfcScheduler(camera, poll_s=0.005, **options)
+
+
+def test_start_aborts_if_the_camera_stays_in_automatic_ffc():
+    camera = FakeCamera(manual_ok=False)
+    scheduler = make_scheduler(camera)
+
+    with pytest.raises(RuntimeError, match="manual FFC"):
+        scheduler.start()
+    assert camera.ffc_calls == 0
+    assert scheduler._thread is None
+
+
+def test_max_interval_runs_ffcs_outside_windows():
+    camera = FakeCamera()
+    scheduler = make_scheduler(camera)
+    scheduler.start()
+    wait_for(lambda: camera.ffc_calls >= 3)
+    scheduler.stop()
+
+    assert camera.shutter_manual
+    assert scheduler.ffc_reasons[0] == "start"
+    assert set(scheduler.ffc_reasons[1:]) == {"max_interval"}
+    assert scheduler.stats()["ffc_longest_interval_s"] >= 0.1
+
+
+def test_due_ffc_waits_for_the_end_of_the_window():
+    camera = FakeCamera()
+    scheduler = make_scheduler(camera)
+    scheduler.start()
+    with scheduler.measurement():
+        assert not scheduler.perform_ffc()
+        time.sleep(0.3)
+        # the FFC fell due inside the window and was held back once
+        assert camera.ffc_calls == 1
+        assert scheduler.deferred == 1
+    # end_measurement runs the overdue FFC right away
+    assert camera.ffc_calls == 2
+    assert scheduler.ffc_reasons == ["start", "max_interval"]
+    scheduler.stop()
+
+
+def test_hard_max_interval_interrupts_a_window():
+    camera = FakeCamera()
+    scheduler = make_scheduler(camera, hard_max_interval_s=0.2)
+    scheduler.start()
+    scheduler.begin_measurement()
+    wait_for(lambda: camera.ffc_calls == 2)
+    assert scheduler.in_measurement
+    assert scheduler.ffc_reasons == ["start", "hard_max_interval"]
+    gap = (scheduler.ffc_ns[1] - scheduler.ffc_ns[0]) / 1e9
+    assert gap >= 0.2
+    scheduler.end_measurement()
+    scheduler.stop()
+
+
+def test_inter_trial_respects_min_interval():
+    camera = FakeCamera()
+    scheduler = make_scheduler(camera, max_interval_s=60, min_interval_s=0.2)
+    scheduler.start()
+
+    assert not scheduler.inter_trial()
+    assert scheduler.inter_trial(force=True)
+    assert not scheduler.inter_trial()
+    time.sleep(0.25)
+    assert scheduler.inter_trial()
+    scheduler.stop()
+
+    assert camera.ffc_calls == 3
+    assert scheduler.ffc_reasons == ["start", "inter_trial", "inter_trial"]
+
+
+def test_invalid_intervals_are_rejected():
+    with pytest.raises(ValueError):
+        make_scheduler(FakeCamera(), max_interval_s=1, min_interval_s=2)
+    with pytest.raises(ValueError):
+        make_scheduler(FakeCamera(), max_interval_s=1, hard_max_interval_s=0.5)
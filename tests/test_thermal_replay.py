@@ -0,0 +1,100 @@
+import time
+
+import numpy as np
+import pytest
+
+h5py = pytest.importorskip("h5py")
+thermal_camera = pytest.importorskip("poulet_py.hardware.camera.thermal_camera")
+thermal_recording = pytest.importorskip("poulet_py.hardware.camera.thermal_recording")
+thermal_replay = pytest.importorskip("poulet_py.hardware.camera.thermal_replay")
+thermal_storage = pytest.importorskip("poulet_py.hardware.camera.thermal_storage")
+
+N_FRAMES = 40
+
+
+def record(tmp_path, name, n_frames, **output_options):
+    """Records n_frames frames with the given backend options, returns the path."""
+    backend_options = output_options.pop("backend_options")
+    camera = thermal_camera.ThermalCamera(
+        backend=backend_options.pop("backend"), backend_options=backend_options
+    )
+    camera.set_output_file(str(tmp_path), name, **output_options)
+    camera.start_streaming()
+    camera.set_timer(time.time())
+    camera.create_hdf5_file()
+    for _ in range(n_frames):
+        camera.capture_frame()
+    backend = camera.backend
+    camera.stop_streaming()
+    return tmp_path / f"thermal-camera_{name}.hdf5", backend
+
+
+def read_counts(path):
+    """Reads a recording as centi-Kelvin counts, whatever its storage."""
+    with thermal_recording.ThermalRecording(str(path), celsius=False) as rec:
+        frames = np.asarray(rec[:])
+    if frames.dtype == np.uint16:
+        return frames
+    return thermal_storage.celsius_to_kelvin(frames)
+
+
+@pytest.mark.parametrize("layout", ["contiguous", "per_frame"])
+@pytest.mark.parametrize("storage", ["raw", "celsius"])
+def test_replay_reproduces_the_recorded_frames(tmp_path, layout, storage):
+    source, _ = record(
+        tmp_path,
+        "source",
+        N_FRAMES,
+        layout=layout,
+        storage=storage,
+        backend_options={
+            "backend": "synthetic",
+            "rate_hz": None,
+            "lossless": True,
+            "n_distinct": 16,
+        },
+    )
+    replayed, backend = record(
+        tmp_path,
+        "replayed",
+        N_FRAMES,
+        layout="contiguous",
+        storage="raw",
+        backend_options={
+            "backend": "replay",
+            "path": str(source),
+            "rate_hz": None,
+            "lossless": True,
+        },
+    )
+
+    source_frames = read_counts(source)
+    assert source_frames.shape == (N_FRAMES, 120, 160)
+    np.testing.assert_array_equal(read_counts(replayed), source_frames)
+    # the replay stopped at the end of the recording
+    assert backend.frames_sent == N_FRAMES
+    assert not backend.is_streaming
+
+
+def test_replay_loops_over_the_recording(tmp_path):
+    source, _ = record(
+        tmp_path,
+        "source",
+        10,
+        storage="raw",
+        backend_options={"backend": "synthetic", "rate_hz": None, "lossless": True},
+    )
+    backend = thermal_replay.ReplayBackend(
+        path=str(source), rate_hz=None, loop=True, lossless=True
+    )
+    backend.start_streaming()
+    frames = np.stack([backend.get_frame(5) for _ in range(25)])
+    backend.stop_streaming()
+
+    source_frames = read_counts(source)
+    np.testing.assert_array_equal(frames, source_frames[np.arange(25) % 10])
+
+
+def test_replay_needs_a_path():
+    with pytest.raises(ValueError):
+        thermal_replay.ReplayBackend()
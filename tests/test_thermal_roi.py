@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+
+h5py = pytest.importorskip("h5py")
+thermal_roi = pytest.importorskip("poulet_py.hardware.camera.thermal_roi")
+
+
+def test_roi_masks_are_stored_in_a_dataset(tmp_path):
+    roi_statistics = thermal_roi.RoiStatistics((120, 160))
+    for i in range(6):
+        roi_statistics.add_rect(f"roi{i}", 20 * i, 10, 15, 30)
+
+    with h5py.File(tmp_path / "rois.hdf5", "w") as f:
+        writer = thermal_roi.RoiStatsWriter(f, roi_statistics)
+        frames = np.random.default_rng(0).integers(29000, 31000, (3, 120, 160))
+        writer.append(roi_statistics.compute(frames))
+        writer.close()
+
+    with h5py.File(tmp_path / "rois.hdf5", "r") as f:
+        masks = f[thermal_roi.ROI_MASKS_DATASET]
+        assert masks.shape == (6, 120, 160)
+        assert masks.dtype == bool
+        np.testing.assert_array_equal(masks[:], np.stack(roi_statistics.masks))
+        assert list(masks.attrs["roi_names"]) == roi_statistics.names
+        stats = f[thermal_roi.ROI_DATASET]
+        assert stats.shape == (3, 6, 3)
+        assert "masks" not in stats.attrs
+        assert list(stats.attrs["roi_names"]) == roi_statistics.names
@@ -0,0 +1,61 @@
+import threading
+
+import numpy as np
+import pytest
+
+thermal_storage = pytest.importorskip("poulet_py.hardware.camera.thermal_storage")
+thermal_convert = pytest.importorskip("poulet_py.hardware.camera.thermal_convert")
+
+
+class BlockedWriter:
+    """A frame writer that stores nothing until it is released."""
+
+    layout = "contiguous"
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.frame_count = 0
+
+    def append_batch(self, frames, timestamps, arrival_ns=None, sequence=None):
+        self.release.wait()
+        self.frame_count += len(frames)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+@pytest.mark.parametrize("policy", ["drop_newest", "drop_oldest"])
+def test_background_writer_counts_every_dropped_frame(policy):
+    inner = BlockedWriter()
+    writer = thermal_storage.BackgroundFrameWriter(
+        inner, queue_size=4, batch_size=1, policy=policy
+    )
+    frame = np.zeros((2, 3), dtype=np.uint16)
+    accepted = [writer.append(frame, float(i)) for i in range(20)]
+    inner.release.set()
+    writer.close()
+
+    assert inner.frame_count + writer.dropped_frames == 20
+    if policy == "drop_newest":
+        assert accepted.count(False) == writer.dropped_frames
+
+
+def test_expected_frame_count_subtracts_dropped_frames():
+    metadata = {"number_of_frames": 101, "writer_dropped_frames": 7}
+    assert thermal_convert.expected_frame_count(metadata) == 93
+    metadata["denoise"] = {"keep_raw": False, "frames_out": 12}
+    assert thermal_convert.expected_frame_count(metadata) == 5
+
+
+@pytest.mark.parametrize("out_dtype", [None, np.float64, np.float32])
+def test_kelvin_to_celsius_below_zero(out_dtype):
+    counts = np.array([[25315, 27000], [27315, 31315]], dtype=np.uint16)
+    out = None if out_dtype is None else np.empty(counts.shape, dtype=out_dtype)
+
+    celsius = thermal_storage.kelvin_to_celsius(counts, out=out)
+
+    np.testing.assert_allclose(celsius, [[-20.0, -3.15], [0.0, 40.0]], atol=1e-5)
+    np.testing.assert_array_equal(thermal_storage.celsius_to_kelvin(celsius), counts)
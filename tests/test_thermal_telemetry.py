@@ -0,0 +1,112 @@
+import time
+
+import numpy as np
+import pytest
+
+h5py = pytest.importorskip("h5py")
+thermal_telemetry = pytest.importorskip("poulet_py.hardware.camera.thermal_telemetry")
+thermal_camera = pytest.importorskip("poulet_py.hardware.camera.thermal_camera")
+thermal_recording = pytest.importorskip("poulet_py.hardware.camera.thermal_recording")
+
+
+def make_row_a(frame_counter, time_counter_ms, status, fpa, housing):
+    row = np.zeros(160, dtype=np.uint16)
+    row[1], row[2] = time_counter_ms & 0xFFFF, time_counter_ms >> 16
+    row[3], row[4] = status & 0xFFFF, status >> 16
+    row[20], row[21] = frame_counter & 0xFFFF, frame_counter >> 16
+    row[24] = fpa
+    row[26] = housing
+    return row
+
+
+def test_parse_telemetry_decodes_row_a_words():
+    # FFC desired (bit 3), FFC in progress (bits 4-5) and a bit in the high word
+    status = (1 << 3) | (2 << 4) | (1 << 16)
+    row = make_row_a(0x2ABCD, 0x12345678, status, fpa=30015, housing=29815)
+
+    fields = thermal_telemetry.parse_telemetry(row)
+
+    assert fields["frame_counter"] == 0x2ABCD
+    assert fields["time_counter_ms"] == 0x12345678
+    assert fields["status"] == status
+    assert fields["ffc_state"] == thermal_telemetry.FFC_IN_PROGRESS
+    assert fields["ffc_desired"]
+    assert fields["fpa_temp"] == pytest.approx(27.0)
+    assert fields["housing_temp"] == pytest.approx(25.0)
+
+
+def test_parse_telemetry_is_vectorized_over_frames():
+    rows = np.stack(
+        [make_row_a(3 * i, 100 * i, i << 4, 30015 + i, 29815) for i in range(4)]
+    )
+
+    fields = thermal_telemetry.parse_telemetry(rows)
+
+    np.testing.assert_array_equal(fields["frame_counter"], [0, 3, 6, 9])
+    np.testing.assert_array_equal(fields["time_counter_ms"], [0, 100, 200, 300])
+    np.testing.assert_array_equal(fields["ffc_state"], [0, 1, 2, 3])
+    np.testing.assert_array_equal(fields["ffc_desired"], [False] * 4)
+    np.testing.assert_allclose(fields["fpa_temp"], [27.0, 27.01, 27.02, 27.03])
+    np.testing.assert_array_equal(
+        thermal_telemetry.ffc_frames(fields["ffc_state"]), [False, True, True, False]
+    )
+
+
+def test_encode_telemetry_round_trips():
+    row = np.zeros(160, dtype=np.uint16)
+    thermal_telemetry.encode_telemetry(
+        row, frame_counter=70000, time_counter_ms=123456, ffc_state=1
+    )
+
+    fields = thermal_telemetry.parse_telemetry(row)
+
+    assert fields["frame_counter"] == 70000
+    assert fields["time_counter_ms"] == 123456
+    assert fields["ffc_state"] == thermal_telemetry.FFC_IMMINENT
+
+
+@pytest.mark.parametrize("location", ["footer", "header"])
+def test_telemetry_rows_split_the_image_from_row_a(location):
+    raw = np.zeros((122, 160), dtype=np.uint16)
+    image_rows, rows = thermal_telemetry.telemetry_rows(122, location)
+    raw[image_rows] = 7
+    raw[rows][0] = make_row_a(42, 0, 0, 30015, 30015)
+
+    assert raw[image_rows].shape == (120, 160)
+    assert np.all(raw[image_rows] == 7)
+    assert thermal_telemetry.parse_telemetry(raw[rows][0])["frame_counter"] == 42
+    with pytest.raises(ValueError):
+        thermal_telemetry.telemetry_rows(122, "middle")
+
+
+def test_missing_frames_counts_counter_gaps():
+    np.testing.assert_array_equal(
+        thermal_telemetry.missing_frames([0, 3, 6, 12, 15, 24]), [0, 0, 0, 1, 0, 2]
+    )
+
+
+def test_camera_stores_120_row_images_and_their_telemetry(tmp_path):
+    camera = thermal_camera.ThermalCamera(
+        backend="synthetic", backend_options={"rate_hz": None}, telemetry="footer"
+    )
+    camera.set_output_file(str(tmp_path), "telemetry", storage="raw")
+    camera.start_streaming()
+    camera.set_timer(time.time())
+    camera.create_hdf5_file()
+    for _ in range(20):
+        camera.capture_frame()
+    pool = camera.backend.pool
+    camera.stop_streaming()
+
+    path = tmp_path / "thermal-camera_telemetry.hdf5"
+    with thermal_recording.ThermalRecording(str(path), celsius=False) as rec:
+        frames = rec[:]
+    assert frames.shape == (20, 120, 160)
+    np.testing.assert_array_equal(frames, pool[np.arange(20) % len(pool)])
+
+    with h5py.File(path, "r") as f:
+        telemetry = f[thermal_telemetry.TELEMETRY_GROUP]
+        np.testing.assert_array_equal(telemetry["frame_counter"][:], 3 * np.arange(20))
+        assert telemetry["row_a"].shape == (20, 160)
+        assert telemetry.attrs["frames_missing"] == 0
+    assert camera.telemetry_frames_missing == 0
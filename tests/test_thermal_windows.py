@@ -0,0 +1,51 @@
+import types
+
+import numpy as np
+import pytest
+
+thermal_windows = pytest.importorskip("poulet_py.hardware.camera.thermal_windows")
+
+
+def test_frames_of_the_wrong_size_are_counted_and_dropped():
+    camera = thermal_windows.CameraWindows(frame_shape=(4, 5), buffer_size=4)
+
+    camera.add_frame(list(range(20)), 5, 4)
+    camera.add_frame(list(range(12)), 4, 3)
+    camera.add_frame(list(range(19)), 5, 4)
+
+    assert camera.bad_frames == 2
+    stats = camera.frame_buffer.stats()
+    assert stats["frames_received"] == 3
+    assert stats["frames_dropped"] == 2
+    np.testing.assert_array_equal(
+        camera.frame_buffer.get(timeout=1), np.arange(20).reshape(4, 5)
+    )
+
+
+class FakeSys:
+    """The sys module of a Lepton device, keeping the shutter mode object."""
+
+    def __init__(self, mode):
+        self.mode_obj = types.SimpleNamespace(shutterMode=mode, tempLockoutState=0)
+        self.set_calls = 0
+
+    def GetFfcShutterModeObj(self):
+        return types.SimpleNamespace(**vars(self.mode_obj))
+
+    def SetFfcShutterModeObj(self, mode_obj):
+        self.mode_obj = mode_obj
+        self.set_calls += 1
+
+
+def test_set_shutter_manual_selects_the_manual_mode():
+    camera = thermal_windows.CameraWindows()
+    modes = types.SimpleNamespace(AUTO="auto", MANUAL="manual", EXTERNAL="external")
+    camera.CCI = types.SimpleNamespace(Sys=types.SimpleNamespace(FfcShutterMode=modes))
+    camera.device = types.SimpleNamespace(sys=FakeSys(modes.AUTO))
+
+    camera.set_shutter_manual()
+
+    assert camera.device.sys.set_calls == 1
+    assert camera.device.sys.mode_obj.shutterMode == modes.MANUAL
+    # the other settings of the mode object are kept
+    assert camera.device.sys.mode_obj.tempLockoutState == 0
@@ -0,0 +1,65 @@
+import os
+import sys
+import threading
+
+import numpy as np
+import pytest
+
+pytest.importorskip("cv2")
+video_writers = pytest.importorskip("poulet_py.hardware.camera.video_writers")
+
+FRAME = np.zeros((48, 64), dtype=np.uint8)
+
+
+def fake_ffmpeg(tmp_path, body):
+    """Writes an executable Python script standing in for ffmpeg."""
+    path = tmp_path / "fake-ffmpeg"
+    path.write_text(f"#!{sys.executable}\nimport sys\n{body}\n")
+    path.chmod(0o755)
+    return str(path)
+
+
+def open_writer(tmp_path, ffmpeg):
+    return video_writers.FfmpegVideoWriter(
+        str(tmp_path / "video.mkv"), 30, (64, 48), is_color=False, ffmpeg=ffmpeg
+    )
+
+
+@pytest.mark.skipif(os.name == "nt", reason="uses a script as executable")
+def test_verbose_ffmpeg_does_not_block_the_writer(tmp_path):
+    ffmpeg = fake_ffmpeg(
+        tmp_path,
+        "sys.stderr.write('x' * (1 << 20)); sys.stderr.flush()\n"
+        "while sys.stdin.buffer.read(1 << 16): pass",
+    )
+    writer = open_writer(tmp_path, ffmpeg)
+
+    def write_all():
+        for _ in range(200):
+            writer.write(FRAME)
+        writer.release()
+
+    thread = threading.Thread(target=write_all, daemon=True)
+    thread.start()
+    thread.join(20)
+    assert not thread.is_alive()
+    assert writer.frames_written == 200
+    assert os.path.getsize(tmp_path / "video.mkv.ffmpeg.log") == 1 << 20
+
+
+@pytest.mark.skipif(os.name == "nt", reason="uses a script as executable")
+def test_writes_after_ffmpeg_failed_raise(tmp_path):
+    ffmpeg = fake_ffmpeg(tmp_path, "sys.stderr.write('no such codec'); sys.exit(1)")
+    writer = open_writer(tmp_path, ffmpeg)
+
+    with pytest.raises(RuntimeError, match="no such codec"):
+        for _ in range(1000):
+            writer.write(FRAME)
+    with pytest.raises(RuntimeError, match="ffmpeg stopped"):
+        writer.write(FRAME)
+    writer.release()
+
+
+def test_missing_ffmpeg_raises(tmp_path):
+    with pytest.raises(RuntimeError, match="not found"):
+        open_writer(tmp_path, str(tmp_path / "no-ffmpeg"))